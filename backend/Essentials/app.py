@@ -1,17 +1,31 @@
-from flask import Flask, request, jsonify
-from services.calender_manager import CalendarManager
+from flask import Flask, request, jsonify, Response, stream_with_context
+from services.calender_manager import CalendarManager, new_event_id
 from services.gemini_parser import GeminiParser
+from services.free_slots import format_slot_suggestions
+from services.event_creation import create_event_from_text, creation_response, job_result
+from services.bulk_events import BulkEventRequest, split_inputs
+from services.streaming import stream_format, split_lines, STREAM_HEADERS
+from services.lazy import LazyInstance
+from services.singleflight import SingleFlight, plan_request_key
+from services.metrics import render as render_metrics, instrument_views, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from services.job_queue import get_job_queue, QueueFull
 from datetime import timezone, timedelta
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from flask_cors import CORS
 
-cal = CalendarManager()
-gem = GeminiParser()
+# Built on first use so importing the app stays fast and never opens the OAuth flow.
+cal = LazyInstance(CalendarManager)
+gem = LazyInstance(GeminiParser)
 
 
 app = Flask(__name__)
 CORS(app)
 
+# Runs independent Gemini calls next to Google API calls inside a single request
+io_pool = ThreadPoolExecutor(max_workers=8)
+plan_flight = SingleFlight("plan_event")
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Test if API is working"""
@@ -36,24 +50,86 @@ def create_event():
 def create_event_nlp():
     """        Args:
             user_input (str): The structured string containing event details,
-                            e.g., "Gaming event Every Monday: 8:00 PM - 10:00 PM (2 hours)"."""
+                            e.g., "Gaming event Every Monday: 8:00 PM - 10:00 PM (2 hours)".
+            async (bool): Optional (JSON field or ?async=1). Queue the work and answer 202 with
+                          a job id right away; poll /jobs/<job_id> for the outcome."""
     try:
         data = request.get_json()
         # user_input = request.data.decode("utf-8")
         #Or user_input = request.get_data(as_text=True)
-        user_input = gem.parse_event_details(data["input"])
-        event_details = gem.parse_event_line(user_input)
-        cal.add_event(event_details)
-        return jsonify({
-            'status': 'success',
-            'message': 'Event created successfully',
-            'input': user_input,
-            'event_details': event_details
-        }), 201
+        if data.get("async") or request.args.get("async") in ("1", "true"):
+            # The event id is chosen now, so a job that runs twice inserts the event once.
+            return enqueue_job("create_event_nlp", {"input": data["input"], "event_id": new_event_id()})
+        created = create_event_from_text(data["input"], parse_with_gemini, cal.add_event)
+        body, status = creation_response(created)
+        return jsonify(body), status
         
     except Exception as e:
         return str(e)
+
+def parse_with_gemini(text):
+    """Gemini structures the input, the structured line becomes the event."""
+    user_input = gem.parse_event_details(text)
+    return user_input, gem.parse_event_line(user_input)
+
+def run_create_event_job(payload):
+    """Job handler for queued /create_event_nlp requests; a failed insert fails the job."""
+    created = create_event_from_text(payload["input"], parse_with_gemini, cal.add_event, payload.get("event_id"))
+    return job_result(created)
+
+def start_job_queue():
+    queue = get_job_queue()
+    queue.register("create_event_nlp", run_create_event_job)
+    return queue.start()
+
+# Built and started on the first enqueue or status request, or by the __main__ block below,
+# so importing app.py (tests, benchmarks, fakes/serve.py) opens no database and starts no threads.
+jobs = LazyInstance(start_job_queue)
+
+def enqueue_job(kind, payload):
+    """Queues a job and answers 202 Accepted with where to poll for it."""
+    try:
+        job_id = jobs.enqueue(kind, payload)
+    except QueueFull as e:
+        return jsonify({'status': 'error', 'message': f'Too many queued jobs: {e}'}), 503
+    status_url = f"/jobs/{job_id}"
+    return jsonify({'status': 'queued', 'job_id': job_id, 'status_url': status_url}), 202, {'Location': status_url}
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """Status of a queued job: queued, running, succeeded (with result) or failed (with error)."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown job id'}), 404
+    return jsonify(job)
     
+@app.route("/create_events_batch", methods=["POST"])
+def create_events_batch():
+    """
+    Creates many events from free text at once.
+
+    Expects JSON with "inputs" (list of strings) or "input" (a multi-line schedule,
+    one event per line). Inputs the rules cannot parse share ONE Gemini call and all
+    events are inserted with batched Calendar requests.
+
+    Returns the per-input results; 201 when everything was created, 207 otherwise.
+    """
+    try:
+        inputs = split_inputs(request.get_json())
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    bulk = BulkEventRequest(inputs)
+    if bulk.pending_inputs:
+        bulk.apply_structured_lines(gem.parse_event_details_batch(bulk.pending_inputs), gem)
+    bodies = bulk.event_bodies()
+    results = bulk.results(cal.add_events_batch(bodies) if bodies else [])
+    all_created = all(result['status'] == 'created' for result in results)
+    return jsonify({
+        'status': 'success' if all_created else 'partial',
+        'created': sum(len(result['events']) for result in results),
+        'results': results
+    }), 201 if all_created else 207
+
 @app.route("/delete_event", methods = ['POST'])
 def delete_event():
     data  = request.get_json()
@@ -67,7 +143,12 @@ def delete_event():
 def plan_single_event():
     """
     Expecting JSON file that has the "input" key that maps to user input and
-    "range" which is number of days
+    "range" which is number of days.
+    Optional keys: "duration" (minutes) and "count" (number of suggestions, default 3).
+    Without "duration", Gemini reads it from the input while free/busy data is fetched.
+
+    Suggestions are computed locally from the free/busy data; Gemini is only
+    asked when no free slot fits inside working hours.
 
     Returns strings
     """
@@ -75,6 +156,18 @@ def plan_single_event():
     data = request.get_json()
     user_input = data["input"]
     days_to_add = int(data["range"])
+    count = int(data.get("count", 3))
+    duration = data.get("duration")
+    # Identical requests arriving together (same prompt, range and minute) share one answer.
+    key = plan_request_key(user_input, days_to_add, count, duration)
+    return plan_flight.do(key, lambda: plan_event_suggestions(user_input, days_to_add, count, duration))
+
+def plan_event_suggestions(user_input, days_to_add, count, duration=None):
+    """The /plan_event answer: suggestion lines, or None when nothing could be suggested."""
+    intent_future = None
+    if duration is None:
+        # The intent parse doesn't depend on the free/busy fetch, so run them side by side.
+        intent_future = io_pool.submit(gem.parse_planning_intent, user_input)
     
     # 2. Get free/busy data from the CalendarManager.
     #    You'll need to decide the date range to check (e.g., next 7 days).
@@ -88,8 +181,19 @@ def plan_single_event():
     
     end_date = end.strftime("%Y-%m-%dT%H:%M:%SZ")
     free_busy_data = cal.get_free_busy_slots(start_date, end_date)
-    
-    # 3. Call the new GeminiParser method.
+    if intent_future is not None:
+        intent = intent_future.result()
+        duration = intent["duration_minutes"] if intent else 60
+    else:
+        duration = int(duration)
+
+    # 3. Answer from the local free-slot engine.
+    slots = cal.calculate_free_slots(start_date, end_date, free_busy_data.get('busy', []),
+                                     duration_minutes=duration, count=count)
+    if slots:
+        return format_slot_suggestions(slots, duration)
+
+    # 4. Nothing fits inside working hours, let Gemini propose something.
     suggestions_str = gem.suggest_time(user_input, free_busy_data)
     
     if suggestions_str:
@@ -101,9 +205,88 @@ def plan_single_event():
     else:
         print("Could not generate suggestions. Please try again.")
 
+@app.route("/plan_event_stream", methods=["POST"])
+def plan_single_event_stream():
+    """
+    Streaming /plan_event. Same JSON body; every suggestion is sent as its own event as soon
+    as it is ready, so the frontend can show the first option while the rest are generated.
+
+    Query parameter "format": "sse" (default, text/event-stream) or "ndjson".
+    Events: "suggestion" {"index", "text", "source"} for each option, then
+    "done" {"count"}; "error" {"message"} if something fails along the way.
+    """
+    data = request.get_json()
+    user_input = data["input"]
+    days_to_add = int(data["range"])
+    count = int(data.get("count", 3))
+    formatter, mimetype = stream_format(request.args.get("format", "sse"))
+
+    def events():
+        # Runs after the headers are sent, so the client sees the stream open right away.
+        intent_future = None
+        if "duration" not in data:
+            intent_future = io_pool.submit(gem.parse_planning_intent, user_input)
+        now = datetime.now(timezone.utc)
+        start_date = now.strftime("%Y-%m-%dT%H:%M:%SZ")
+        end_date = (now + timedelta(days=days_to_add)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        sent = 0
+        try:
+            free_busy_data = cal.get_free_busy_slots(start_date, end_date)
+            if intent_future is not None:
+                intent = intent_future.result()
+                duration = intent["duration_minutes"] if intent else 60
+            else:
+                duration = int(data["duration"])
+
+            slots = cal.calculate_free_slots(start_date, end_date, free_busy_data.get('busy', []),
+                                             duration_minutes=duration, count=count)
+            if slots:
+                lines, source = split_lines([format_slot_suggestions(slots, duration)]), "calendar"
+            else:
+                lines, source = gem.stream_suggest_time(user_input, free_busy_data), "gemini"
+            for line in lines:
+                yield formatter({"index": sent, "text": line, "source": source}, event="suggestion")
+                sent += 1
+        except Exception as e:
+            yield formatter({"message": str(e)}, event="error")
+        yield formatter({"count": sent}, event="done")
+
+    return Response(stream_with_context(events()), mimetype=mimetype, headers=STREAM_HEADERS)
+
+@app.route("/stats/weekly", methods=["GET"])
+def weekly_stats():
+    """
+    Hours per category for each of the last "weeks" weeks (query parameter, default 12).
+    Applies the calendar changes since the last call to the MongoDB rollups first,
+    then answers from the rollups.
+    """
+    # pymongo is slow to import, so the rollups are only loaded once stats are asked for.
+    from Essentials.stats_rollups import get_rollup_store, DEFAULT_USER_ID
+    weeks = int(request.args.get("weeks", 12))
+    user_id = request.args.get("user_id", DEFAULT_USER_ID)
+    calendar_id = request.args.get("calendar_id", "primary")
+    store = get_rollup_store()
+    store.sync(cal.service, user_id, calendar_id)
+    return jsonify({
+        'weeks': store.weekly_category_hours(user_id, weeks, calendar_id)
+    })
+
 @app.route("/plan_recurring_event", methods = ["POST"])
 def plan_recurring_event():
     pass
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Request, Gemini, Google API, MongoDB and cache metrics in the Prometheus format."""
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+# Counts and times every route above (must stay after the last @app.route).
+instrument_views(app, lambda: request.method)
+
 
-app.run(host="0.0.0.0", port= 80)
\ No newline at end of file
+if __name__ == "__main__":
+    # Threaded development server. For the async mode see Essentials/async_app.py.
+    # The job workers start with the server, so jobs queued before a restart are picked up
+    # right away (jobs cut off by a crash are taken over once their lease expires).
+    jobs.get_instance()
+    app.run(host="0.0.0.0", port= 80)
@@ -0,0 +1,334 @@
+# Async serving mode for the AI Scheduler API.
+# Same routes as Essentials/app.py, served by Quart (the asyncio re-implementation of Flask)
+# behind an ASGI server, so a single worker can keep hundreds of Gemini calls in flight.
+#
+# Run from the backend folder:
+#     hypercorn Essentials.async_app:app --bind 0.0.0.0:80
+#
+# Gemini calls are awaited through generate_content_async. The Google API client has no
+# async transport, so Calendar calls run on a bounded thread pool via asyncio.to_thread.
+#
+# Settings (environment variables):
+#     ASYNC_MAX_IN_FLIGHT  requests handled at the same time (default 256), the rest wait
+#     ASYNC_IO_THREADS     threads for blocking Google API calls (default 32)
+import asyncio
+import functools
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone, timedelta
+from datetime import datetime
+from quart import Quart, request, jsonify, Response
+from quart_cors import cors
+from services.calender_manager import CalendarManager, new_event_id
+from services.gemini_parser import GeminiParser
+from services.free_slots import format_slot_suggestions
+from services.event_creation import (create_event_from_text, create_event_from_text_async,
+                                     creation_response, job_result)
+from services.bulk_events import BulkEventRequest, split_inputs
+from services.streaming import stream_format, split_lines, STREAM_HEADERS
+from services.lazy import LazyInstance
+from services.singleflight import SingleFlight, plan_request_key
+from services.metrics import render as render_metrics, instrument_views, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from services.job_queue import get_job_queue, QueueFull
+
+MAX_IN_FLIGHT = int(os.getenv("ASYNC_MAX_IN_FLIGHT", 256))
+IO_THREADS = int(os.getenv("ASYNC_IO_THREADS", 32))
+
+# Built on first use so importing the app stays fast and never opens the OAuth flow.
+cal = LazyInstance(CalendarManager)
+gem = LazyInstance(GeminiParser)
+
+app = cors(Quart(__name__))
+in_flight = asyncio.Semaphore(MAX_IN_FLIGHT)
+plan_flight = SingleFlight("plan_event")
+
+
+@app.before_serving
+async def configure_io_pool():
+    """Blocking Google API calls share one bounded pool instead of the default executor."""
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix="google-io")
+    )
+
+
+@app.after_serving
+async def close_mongo_pool():
+    """Closes the async MongoDB pool if a route opened it (see Essentials/async_db.py)."""
+    async_db = sys.modules.get("Essentials.async_db")
+    if async_db is not None:
+        await async_db.close()
+
+
+def bounded(view):
+    """Limits how many requests are processed at once; extra requests wait their turn."""
+    @functools.wraps(view)
+    async def wrapper(*args, **kwargs):
+        async with in_flight:
+            return await view(*args, **kwargs)
+    return wrapper
+
+
+@app.route('/api/health', methods=['GET'])
+async def health_check():
+    """Test if API is working"""
+    return jsonify({
+        'status': 'healthy',
+        'message': 'AI Scheduler API is running!',
+        'mode': 'async',
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@app.route("/create_event", methods=['POST'])
+@bounded
+async def create_event():
+    data = await request.get_json()
+    det = await gem.parse_event_details_async(data["input"])
+    return await asyncio.to_thread(cal.add_event, det)
+
+
+@app.route("/create_event_nlp", methods=["POST"])
+@bounded
+async def create_event_nlp():
+    """        Args:
+            user_input (str): The structured string containing event details,
+                            e.g., "Gaming event Every Monday: 8:00 PM - 10:00 PM (2 hours)".
+            async (bool): Optional (JSON field or ?async=1). Queue the work and answer 202 with
+                          a job id right away; poll /jobs/<job_id> for the outcome."""
+    try:
+        data = await request.get_json()
+        if data.get("async") or request.args.get("async") in ("1", "true"):
+            # The event id is chosen now, so a job that runs twice inserts the event once.
+            return await enqueue_job("create_event_nlp", {"input": data["input"], "event_id": new_event_id()})
+        created = await create_event_from_text_async(data["input"], parse_with_gemini_async, add_event_async)
+        body, status = creation_response(created)
+        return jsonify(body), status
+
+    except Exception as e:
+        return str(e)
+
+
+async def parse_with_gemini_async(text):
+    """Gemini structures the input, the structured line becomes the event."""
+    user_input = await gem.parse_event_details_async(text)
+    return user_input, gem.parse_event_line(user_input)
+
+
+async def add_event_async(event_details):
+    return await asyncio.to_thread(cal.add_event, event_details)
+
+
+def parse_with_gemini(text):
+    user_input = gem.parse_event_details(text)
+    return user_input, gem.parse_event_line(user_input)
+
+
+def run_create_event_job(payload):
+    """
+    Job handler for queued /create_event_nlp requests. Runs on a job queue worker thread,
+    so it uses the blocking parser calls; a failed insert fails the job.
+    """
+    created = create_event_from_text(payload["input"], parse_with_gemini, cal.add_event, payload.get("event_id"))
+    return job_result(created)
+
+
+def start_job_queue():
+    queue = get_job_queue()
+    queue.register("create_event_nlp", run_create_event_job)
+    return queue.start()
+
+
+# Built and started by start_job_workers when the server starts.
+jobs = LazyInstance(start_job_queue)
+
+
+@app.before_serving
+async def start_job_workers():
+    """Starts the job workers, so jobs queued before a restart are picked up right away."""
+    await asyncio.to_thread(jobs.get_instance)
+
+
+async def enqueue_job(kind, payload):
+    """Queues a job and answers 202 Accepted with where to poll for it."""
+    try:
+        job_id = await asyncio.to_thread(jobs.enqueue, kind, payload)
+    except QueueFull as e:
+        return jsonify({'status': 'error', 'message': f'Too many queued jobs: {e}'}), 503
+    status_url = f"/jobs/{job_id}"
+    return jsonify({'status': 'queued', 'job_id': job_id, 'status_url': status_url}), 202, {'Location': status_url}
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+async def job_status(job_id):
+    """Status of a queued job: queued, running, succeeded (with result) or failed (with error)."""
+    job = await asyncio.to_thread(jobs.get, job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown job id'}), 404
+    return jsonify(job)
+
+
+@app.route("/create_events_batch", methods=["POST"])
+@bounded
+async def create_events_batch():
+    """
+    Creates many events from free text: one Gemini call for the inputs the rules cannot
+    parse, batched Calendar inserts for all events. See Essentials/app.py for the format.
+    """
+    try:
+        inputs = split_inputs(await request.get_json())
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    bulk = BulkEventRequest(inputs)
+    if bulk.pending_inputs:
+        bulk.apply_structured_lines(await gem.parse_event_details_batch_async(bulk.pending_inputs), gem)
+    bodies = bulk.event_bodies()
+    results = bulk.results(await asyncio.to_thread(cal.add_events_batch, bodies) if bodies else [])
+    all_created = all(result['status'] == 'created' for result in results)
+    return jsonify({
+        'status': 'success' if all_created else 'partial',
+        'created': sum(len(result['events']) for result in results),
+        'results': results
+    }), 201 if all_created else 207
+
+
+@app.route("/delete_event", methods=['POST'])
+@bounded
+async def delete_event():
+    data = await request.get_json()
+    try:
+        await asyncio.to_thread(cal.delete_event, data["id"], data["calendar_id"], True)
+        return "True"
+    except Exception as e:
+        return f"{e}"
+
+
+@app.route("/plan_event", methods=["POST"])
+@bounded
+async def plan_single_event():
+    """
+    Expecting JSON file that has the "input" key that maps to user input and
+    "range" which is number of days.
+    Optional keys: "duration" (minutes) and "count" (number of suggestions, default 3).
+
+    The free/busy fetch and the Gemini intent parse run concurrently.
+
+    Returns strings
+    """
+    data = await request.get_json()
+    user_input = data["input"]
+    days_to_add = int(data["range"])
+    count = int(data.get("count", 3))
+    duration = data.get("duration")
+    # Identical requests arriving together (same prompt, range and minute) share one answer.
+    key = plan_request_key(user_input, days_to_add, count, duration)
+    return await plan_flight.do_async(key, lambda: plan_event_suggestions(user_input, days_to_add, count, duration))
+
+
+async def plan_event_suggestions(user_input, days_to_add, count, duration=None):
+    """The /plan_event answer (suggestion lines)."""
+    now = datetime.now(timezone.utc)
+    start_date = now.strftime("%Y-%m-%dT%H:%M:%SZ")
+    end_date = (now + timedelta(days=days_to_add)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    free_busy_task = asyncio.to_thread(cal.get_free_busy_slots, start_date, end_date)
+    if duration is not None:
+        free_busy_data = await free_busy_task
+        duration = int(duration)
+    else:
+        free_busy_data, intent = await asyncio.gather(free_busy_task,
+                                                      gem.parse_planning_intent_async(user_input))
+        duration = intent["duration_minutes"] if intent else 60
+
+    slots = cal.calculate_free_slots(start_date, end_date, free_busy_data.get('busy', []),
+                                     duration_minutes=duration, count=count)
+    if slots:
+        return format_slot_suggestions(slots, duration)
+
+    # Nothing fits inside working hours, let Gemini propose something.
+    suggestions_str = await gem.suggest_time_async(user_input, free_busy_data)
+    if suggestions_str:
+        return suggestions_str
+    return "Could not generate suggestions. Please try again."
+
+
+@app.route("/plan_event_stream", methods=["POST"])
+async def plan_single_event_stream():
+    """
+    Streaming /plan_event: each suggestion is sent as its own event as soon as it is ready.
+    Query parameter "format": "sse" (default) or "ndjson". Events: "suggestion"
+    {"index", "text", "source"}, then "done" {"count"}; "error" {"message"} on failure.
+    """
+    data = await request.get_json()
+    user_input = data["input"]
+    days_to_add = int(data["range"])
+    count = int(data.get("count", 3))
+    formatter, mimetype = stream_format(request.args.get("format", "sse"))
+
+    async def events():
+        # The work happens while the response streams, after the view has returned, so the
+        # in-flight slot is held here (for the whole stream) rather than by @bounded.
+        async with in_flight:
+            now = datetime.now(timezone.utc)
+            start_date = now.strftime("%Y-%m-%dT%H:%M:%SZ")
+            end_date = (now + timedelta(days=days_to_add)).strftime("%Y-%m-%dT%H:%M:%SZ")
+            sent = 0
+            try:
+                free_busy_task = asyncio.to_thread(cal.get_free_busy_slots, start_date, end_date)
+                if "duration" in data:
+                    free_busy_data = await free_busy_task
+                    duration = int(data["duration"])
+                else:
+                    free_busy_data, intent = await asyncio.gather(free_busy_task,
+                                                                  gem.parse_planning_intent_async(user_input))
+                    duration = intent["duration_minutes"] if intent else 60
+
+                slots = cal.calculate_free_slots(start_date, end_date, free_busy_data.get('busy', []),
+                                                 duration_minutes=duration, count=count)
+                if slots:
+                    for line in split_lines([format_slot_suggestions(slots, duration)]):
+                        yield formatter({"index": sent, "text": line, "source": "calendar"}, event="suggestion")
+                        sent += 1
+                else:
+                    async for line in gem.stream_suggest_time_async(user_input, free_busy_data):
+                        yield formatter({"index": sent, "text": line, "source": "gemini"}, event="suggestion")
+                        sent += 1
+            except Exception as e:
+                yield formatter({"message": str(e)}, event="error")
+            yield formatter({"count": sent}, event="done")
+
+    response = Response(events(), mimetype=mimetype, headers=STREAM_HEADERS)
+    # Streams may outlive Quart's default response timeout while Gemini is still writing.
+    response.timeout = None
+    return response
+
+
+@app.route("/stats/weekly", methods=["GET"])
+@bounded
+async def weekly_stats():
+    """Hours per category for each of the last "weeks" weeks, from the MongoDB rollups."""
+    # pymongo is slow to import, so the rollups are only loaded once stats are asked for.
+    from Essentials.stats_rollups import get_rollup_store, DEFAULT_USER_ID
+    weeks = int(request.args.get("weeks", 12))
+    user_id = request.args.get("user_id", DEFAULT_USER_ID)
+    calendar_id = request.args.get("calendar_id", "primary")
+    store = get_rollup_store()
+    # cal.service is per thread, so it is looked up on the worker thread that uses it.
+    await asyncio.to_thread(lambda: store.sync(cal.service, user_id, calendar_id))
+    weekly = await asyncio.to_thread(store.weekly_category_hours, user_id, weeks, calendar_id)
+    return jsonify({'weeks': weekly})
+
+
+@app.route("/metrics", methods=["GET"])
+async def metrics():
+    """Request, Gemini, Google API, MongoDB and cache metrics in the Prometheus format."""
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+
+# Counts and times every route above (must stay after the last @app.route).
+instrument_views(app, lambda: request.method)
+
+
+if __name__ == "__main__":
+    # Development only; use hypercorn (or another ASGI server) in production.
+    app.run(host="0.0.0.0", port=80)
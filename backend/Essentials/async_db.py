@@ -0,0 +1,137 @@
+# Purpose: Non-blocking versions of the task <-> event link store functions in Essentials/db.py,
+# for the async server (Essentials/async_app.py). They use pymongo's native asyncio client
+# (AsyncMongoClient, pymongo >= 4.9), so a link update awaits instead of blocking the event loop.
+#
+# Documents, indexes and connection settings (MONGO_URI, MONGO_DB, MONGO_MAX_POOL_SIZE,
+# MONGO_MIN_POOL_SIZE, MONGO_WAIT_QUEUE_TIMEOUT_MS) are the same as in Essentials/db.py,
+# whose synchronous functions stay in place for existing callers.
+import asyncio
+from datetime import datetime
+from pymongo import AsyncMongoClient, ASCENDING
+from pymongo.errors import OperationFailure
+from Essentials.db import MONGO_URI, MONGO_DB, LINKS_COLLECTION, EVENT_IDS_BACKFILL, client_options
+from services.metrics import mongo_operation
+
+# An AsyncMongoClient belongs to the event loop it was created on.
+_client = None
+_client_loop = None
+_indexes_ready = False
+_indexes_lock = None
+
+
+def get_async_client() -> AsyncMongoClient:
+    """
+    Returns the client for the running event loop, creating it on first use.
+    Nothing connects until the first query.
+    """
+    global _client, _client_loop, _indexes_ready, _indexes_lock
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = AsyncMongoClient(MONGO_URI, **client_options())
+        _client_loop = loop
+        _indexes_ready = False
+        _indexes_lock = asyncio.Lock()
+    return _client
+
+
+async def _links():
+    """The link collection, with its indexes in place (see db.ensure_indexes)."""
+    global _indexes_ready
+    collection = get_async_client()[MONGO_DB][LINKS_COLLECTION]
+    if not _indexes_ready:
+        async with _indexes_lock:
+            if not _indexes_ready:
+                await collection.update_many(*EVENT_IDS_BACKFILL)
+                try:
+                    await collection.create_index([("task_id", ASCENDING)], unique=True, name="task_id_unique")
+                except OperationFailure as e:
+                    print(f"[MONGO_SERVICE] Could not create unique task_id index: {e}")
+                    await collection.create_index([("task_id", ASCENDING)], name="task_id")
+                await collection.create_index([("event_ids", ASCENDING)], name="event_ids")
+                _indexes_ready = True
+    return collection
+
+
+async def close():
+    """Closes the pool (e.g. from the server's after_serving hook)."""
+    global _client, _client_loop
+    if _client is not None:
+        await _client.close()
+        _client = None
+        _client_loop = None
+
+
+@mongo_operation
+async def save_sync_link(task_id: str, event_links: list):
+    """Async db.save_sync_link: upserts the task's [[event_id, calendar_id], ...] links."""
+    sync_document = {
+        "task_id": task_id,
+        "linked_events": event_links,
+        "event_ids": [link[0] for link in event_links],
+        "created_at": datetime.now()
+    }
+    collection = await _links()
+    return await collection.replace_one({"task_id": task_id}, sync_document, upsert=True)
+
+
+@mongo_operation
+async def add_event_to_task_link(task_id: str, new_event_link: list) -> bool:
+    """Async db.add_event_to_task_link: appends one [event_id, calendar_id] pair."""
+    if not task_id:
+        return False
+    collection = await _links()
+    result = await collection.update_one({"task_id": task_id}, {
+        "$push": {"linked_events": new_event_link},
+        "$addToSet": {"event_ids": new_event_link[0]},
+        "$set": {"last_updated": datetime.now()}
+    })
+    if result.modified_count > 0:
+        return True
+    print(f"No document found or modified for task {task_id}")
+    return False
+
+
+@mongo_operation
+async def remove_event_from_task_link(task_id: str, event_to_remove: list) -> bool:
+    """Async db.remove_event_from_task_link: removes one [event_id, calendar_id] pair."""
+    collection = await _links()
+    result = await collection.update_one({"task_id": task_id}, {
+        "$pull": {"linked_events": event_to_remove, "event_ids": event_to_remove[0]},
+        "$set": {"last_updated": datetime.now()}
+    })
+    if result.modified_count > 0:
+        return True
+    print(f"UNABLE to remove event from sync link for Task ID: {task_id}, removed {event_to_remove}")
+    return False
+
+
+@mongo_operation
+async def delete_task_id(task_id: str) -> bool:
+    """Async db.delete_task_id: deletes the task's whole link document."""
+    collection = await _links()
+    result = await collection.delete_one({"task_id": task_id})
+    if result.deleted_count == 0:
+        print(f"UNABLE TO  DELETE ENTIRE sync link document for Task ID: {task_id}")
+        return False
+    return True
+
+
+@mongo_operation
+async def get_event_by_task_id(task_id: str):
+    """Async db.get_event_by_task_id: the task's [[event_id, calendar_id], ...] or None."""
+    collection = await _links()
+    document = await collection.find_one({"task_id": task_id}, {"linked_events": 1})
+    if document:
+        return document['linked_events']
+    return None
+
+
+@mongo_operation
+async def get_task_by_event_id(event_id: str):
+    """Async db.get_task_by_event_id: the link document holding event_id, or None."""
+    try:
+        collection = await _links()
+        return await collection.find_one({"event_ids": event_id})
+    except Exception as e:
+        print(f"ERROR in get_task_by_event_id: {e}")
+        return None
@@ -1,10 +1,80 @@
-from pymongo import MongoClient
+import os
+from pymongo import MongoClient, ASCENDING, ReplaceOne, UpdateOne
+from pymongo.errors import OperationFailure
 from datetime import datetime
+from services.metrics import mongo_operation
+
+# --- Connection settings (environment variables) ---
+#     MONGO_URI                     default mongodb://localhost:27017/
+#     MONGO_DB                      default mydatabase
+#     MONGO_MAX_POOL_SIZE           connections per client (default 100, pymongo's default)
+#     MONGO_MIN_POOL_SIZE           connections kept open when idle (default 0)
+#     MONGO_WAIT_QUEUE_TIMEOUT_MS   how long a request waits for a free connection (default 5000)
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+MONGO_DB = os.getenv("MONGO_DB", "mydatabase")
+LINKS_COLLECTION = 'product_mappings'
+
+
+def client_options() -> dict:
+    """Pool settings shared by the sync client here and the async one in Essentials/async_db.py."""
+    return {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", 100)),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", 0)),
+        "waitQueueTimeoutMS": int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5000)),
+        # Don't open connections at import; the first query does.
+        "connect": False,
+    }
+
 
 # --- Setup Connection (Ensure your mongod server is running) ---
-client = MongoClient("mongodb://localhost:27017/")
-db = client['mydatabase']
-my_collection = db['product_mappings']
+client = MongoClient(MONGO_URI, **client_options())
+db = client[MONGO_DB]
+my_collection = db[LINKS_COLLECTION]
+
+# Link documents look like:
+#     {"task_id": "...", "linked_events": [["event_id", "calendar_id"], ...],
+#      "event_ids": ["event_id", ...], "created_at": ..., "last_updated": ...}
+# "event_ids" mirrors the first element of every linked_events pair so the reverse lookup
+# (event -> task) can use a multikey index.
+_indexes_ready = False
+# (filter, pipeline) that fills event_ids for documents written before the field existed.
+EVENT_IDS_BACKFILL = (
+    {"event_ids": {"$exists": False}},
+    [{"$set": {"event_ids": {"$map": {"input": {"$ifNull": ["$linked_events", []]},
+                                      "as": "link", "in": {"$arrayElemAt": ["$$link", 0]}}}}}],
+)
+
+
+def ensure_indexes() -> None:
+    """
+    Creates the link store indexes once per process (MongoClient connects lazily, so this
+    runs on first use rather than at import):
+      - unique index on task_id (one link document per task),
+      - multikey index on event_ids (event -> task lookups).
+    Documents written before event_ids existed are backfilled first.
+    """
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    my_collection.update_many(*EVENT_IDS_BACKFILL)
+    try:
+        my_collection.create_index([("task_id", ASCENDING)], unique=True, name="task_id_unique")
+    except OperationFailure as e:
+        # Older data may hold duplicate task_ids; lookups still work, just without the guarantee.
+        print(f"[MONGO_SERVICE] Could not create unique task_id index: {e}")
+        my_collection.create_index([("task_id", ASCENDING)], name="task_id")
+    my_collection.create_index([("event_ids", ASCENDING)], name="event_ids")
+    _indexes_ready = True
+
+
+def _links():
+    """The link collection, with its indexes in place."""
+    ensure_indexes()
+    return my_collection
+
+
+def _event_ids(event_links: list) -> list:
+    return [link[0] for link in event_links]
 
 # # --- Define Your Data Structure ---
 # fruit_color_mapping = {
@@ -25,6 +95,7 @@ my_collection = db['product_mappings']
 #     client.close()
 
 
+@mongo_operation
 def save_sync_link(task_id: str, event_links: list) -> bool:
     """
     Saves a record linking a task to one or more calendar events.
@@ -39,20 +110,35 @@ def save_sync_link(task_id: str, event_links: list) -> bool:
     sync_document = {
         "task_id": task_id,
         "linked_events": event_links,
+        "event_ids": _event_ids(event_links),
         "created_at": datetime.now() # Good practice to always timestamp data
     }
     
-    # 2. Database Insertion Placeholder
-    # Example: db.sync_links.insert_one(sync_document)
-    result = my_collection.insert_one(sync_document)
-    
-    # print(f"[MONGO_SERVICE] Successfully prepared and (placeholder) saved sync link:")
-    # print(f"  Task ID: {sync_document['task_id']}")
-    # print(f"  Linked Events Count: {len(sync_document['linked_events'])}")
-    # print(f"  Example Link: {sync_document['linked_events'][0] if sync_document['linked_events'] else 'None'}")
-    
-    # You would check the insertion result here (e.g., if insert_one.inserted_id)
+    # 2. Upsert, so saving a task twice replaces its links instead of duplicating the task
+    result = _links().replace_one({"task_id": task_id}, sync_document, upsert=True)
     return result
+
+@mongo_operation
+def save_sync_links(links_by_task: dict):
+    """
+    Bulk save_sync_link: {task_id: [[event_id, calendar_id], ...], ...} in one round trip.
+    Returns the BulkWriteResult (None when there is nothing to write).
+    """
+    if not links_by_task:
+        return None
+    now = datetime.now()
+    operations = [
+        ReplaceOne({"task_id": task_id}, {
+            "task_id": task_id,
+            "linked_events": event_links,
+            "event_ids": _event_ids(event_links),
+            "created_at": now,
+        }, upsert=True)
+        for task_id, event_links in links_by_task.items()
+    ]
+    return _links().bulk_write(operations, ordered=False)
+
+@mongo_operation
 def add_event_to_task_link(task_id: str, new_event_link: list) -> bool:
     if not task_id:
             return False
@@ -63,10 +149,11 @@ def add_event_to_task_link(task_id: str, new_event_link: list) -> bool:
     # 2. Define the Update Operation
     update_operation = {
         "$push": {"linked_events": new_event_link},
+        "$addToSet": {"event_ids": new_event_link[0]},
         "$set": {"last_updated": datetime.now()}
     }
 
-    result = my_collection.update_one(query, update_operation)  # Changed from db.sync_links
+    result = _links().update_one(query, update_operation)  # Changed from db.sync_links
     if result.modified_count > 0:
         print(f"Successfully updated task {task_id}")
         return True
@@ -74,6 +161,7 @@ def add_event_to_task_link(task_id: str, new_event_link: list) -> bool:
         print(f"No document found or modified for task {task_id}")
         return False
 
+@mongo_operation
 def remove_event_from_task_link(task_id: str, event_to_remove: list) -> bool:
     """
     Finds an existing document by task_id and REMOVES a specific 
@@ -85,7 +173,7 @@ def remove_event_from_task_link(task_id: str, event_to_remove: list) -> bool:
     
     query = {"task_id": task_id}
     update_operation = {
-        "$pull": {"linked_events": event_to_remove},
+        "$pull": {"linked_events": event_to_remove, "event_ids": event_to_remove[0]},
         "$set": {"last_updated": datetime.now()}
     }
     
@@ -93,7 +181,7 @@ def remove_event_from_task_link(task_id: str, event_to_remove: list) -> bool:
     # PRACTICAL CODE STEP: MongoDB Update using $pull
     # --------------------------------------------------------------------------
 
-    result = my_collection.update_one(query, update_operation)
+    result = _links().update_one(query, update_operation)
     # print(result)
     if result.modified_count > 0:
         # print("Success") 
@@ -102,6 +190,44 @@ def remove_event_from_task_link(task_id: str, event_to_remove: list) -> bool:
     print(f"UNABLE to remove event from sync link for Task ID: {task_id}, removed {event_to_remove}")
     return False
 
+@mongo_operation
+def add_event_links(new_links: list):
+    """
+    Bulk add_event_to_task_link: [(task_id, [event_id, calendar_id]), ...] in one round trip.
+    Returns the BulkWriteResult (None when there is nothing to write).
+    """
+    if not new_links:
+        return None
+    now = datetime.now()
+    operations = [
+        UpdateOne({"task_id": task_id}, {
+            "$push": {"linked_events": event_link},
+            "$addToSet": {"event_ids": event_link[0]},
+            "$set": {"last_updated": now}
+        })
+        for task_id, event_link in new_links if task_id
+    ]
+    return _links().bulk_write(operations, ordered=False) if operations else None
+
+@mongo_operation
+def remove_event_links(links_to_remove: list):
+    """
+    Bulk remove_event_from_task_link: [(task_id, [event_id, calendar_id]), ...] in one round trip.
+    Returns the BulkWriteResult (None when there is nothing to write).
+    """
+    if not links_to_remove:
+        return None
+    now = datetime.now()
+    operations = [
+        UpdateOne({"task_id": task_id}, {
+            "$pull": {"linked_events": event_link, "event_ids": event_link[0]},
+            "$set": {"last_updated": now}
+        })
+        for task_id, event_link in links_to_remove
+    ]
+    return _links().bulk_write(operations, ordered=False)
+
+@mongo_operation
 def delete_task_id(task_id: str) -> bool:
     """
     Deletes the entire sync link document (the key-value pair) 
@@ -110,12 +236,13 @@ def delete_task_id(task_id: str) -> bool:
     
     query = {"task_id": task_id}
     
-    result = my_collection.delete_one(query)
+    result = _links().delete_one(query)
     if result.deleted_count == 0:
         print(f"UNABLE TO  DELETE ENTIRE sync link document for Task ID: {task_id}")
         return False
     return True
 
+@mongo_operation
 def get_event_by_task_id(task_id: str):
     """
     Returns a 2D list of event_ids and calender ids using the task_id. 
@@ -124,56 +251,65 @@ def get_event_by_task_id(task_id: str):
     
     query = {"task_id": task_id}
 
-    document = my_collection.find_one(query)
+    document = _links().find_one(query, {"linked_events": 1})
     if document:
         return document ['linked_events']
     
     
     print(f"[MONGO_SERVICE] Placeholder: No sync link found for Task ID: {task_id}")
     return None
-# Assuming 'db' is your initialized PyMongo database instance
-# and 'sync_links' is your collection name
+@mongo_operation
+def get_events_by_task_ids(task_ids: list) -> dict:
+    """
+    Bulk get_event_by_task_id: returns {task_id: [[event_id, calendar_id], ...]} for the
+    tasks that have links, with one indexed query.
+    """
+    if not task_ids:
+        return {}
+    cursor = _links().find({"task_id": {"$in": list(task_ids)}}, {"task_id": 1, "linked_events": 1})
+    return {document["task_id"]: document.get("linked_events", []) for document in cursor}
 
-def get_task_by_event_id(db_client, event_id: str):
+@mongo_operation
+def get_task_by_event_id(event_id: str):
     """
     Finds the task associated with a specific Google Calendar Event ID.
 
     This is necessary for the synchronization logic: when an event needs 
     to be deleted or modified based on an action taken on the corresponding task.
+    Uses the multikey index on event_ids, so the lookup is O(log n).
 
     Args:
-        db_client: The PyMongo database client object.
         event_id: The Google Calendar Event ID string to search for.
 
     Returns:
-        dict | None: The document containing the task_id, tasklist_id, 
-                     and the list of event_ids, or None if not found.
+        dict | None: The link document (task_id, linked_events, event_ids), or None if not found.
     """
     try:
-        # 1. Access the 'sync_links' collection
-        sync_links_collection = db_client.sync_links
-        
-        # 2. Query: Find the document where the 'event_ids' array contains the target event_id.
-        query = {
-            "event_ids": event_id
-        }
-        
-        # 3. Execute the query
-        sync_link_document = sync_links_collection.find_one(query)
-        
-        if sync_link_document:
-            print(f"DEBUG: Found sync link for event ID {event_id}.")
-            
-            # The document includes the _id field which contains the task_id and tasklist_id
-            return sync_link_document
-        else:
+        sync_link_document = _links().find_one({"event_ids": event_id})
+        if sync_link_document is None:
             print(f"DEBUG: No sync link found for event ID {event_id}.")
-            return None
+        return sync_link_document
 
     except Exception as e:
         print(f"ERROR in get_task_by_event_id: {e}")
         return None
 
+@mongo_operation
+def get_tasks_by_event_ids(event_ids: list) -> dict:
+    """
+    Bulk get_task_by_event_id: returns {event_id: task_id} for the linked events,
+    with one indexed query.
+    """
+    if not event_ids:
+        return {}
+    wanted = set(event_ids)
+    tasks = {}
+    for document in _links().find({"event_ids": {"$in": list(wanted)}}, {"task_id": 1, "event_ids": 1}):
+        for event_id in document.get("event_ids", []):
+            if event_id in wanted:
+                tasks[event_id] = document["task_id"]
+    return tasks
+
 
 if __name__ == "__main__":
     #---------------------------------------------------------------------
@@ -1,85 +1,26 @@
 from datetime import datetime, timedelta
 import pytz
-from googleapiclient.errors import HttpError
+from services.event_stats import CATEGORY_KEYWORDS, calculate_stats
 
-# --- Configuration for Event Categorization ---
-# NOTE: Customize these lists based on common event titles in your calendar.
-CATEGORY_KEYWORDS = {
-    'Sleep': ['Sleep', 'Nap', 'Rest', 'Asleep'],
-    'Work': ['Work', 'Meeting', 'Client', 'Project', 'Sprint', 'Standup'],
-    'Leisure': ['Gym', 'Workout', 'Hobby', 'Reading', 'Movie', 'Personal Project', 'Run'],
-    # Any event not matching the above will fall into the 'Other' category.
-}
 
-
-def calculate_weekly_stats(calendar_service, start_date_iso, end_date_iso, calendar_id='primary'):
+def calculate_weekly_stats(calendar_service, start_date_iso, end_date_iso, calendar_id='primary', category_keywords=None):
     """
     Analyzes all events for a week and aggregates time spent per category.
+    Reads every page of events, so any range (months, years) works; see services/event_stats.py.
 
     Args:
         calendar_service: The authenticated Google Calendar API service object.
         start_date_iso (str): Start date/time in ISO format (e.g., '2025-11-01T00:00:00Z').
         end_date_iso (str): End date/time in ISO format.
         calendar_id (str): The calendar ID to analyze.
+        category_keywords (dict): Optional {category: [keywords]} in priority order,
+                                  defaults to CATEGORY_KEYWORDS.
 
     Returns:
         dict: Total time spent in hours for each category.
     """
-    total_time_spent = {cat: timedelta(0) for cat in CATEGORY_KEYWORDS}
-    total_time_spent['Other'] = timedelta(0)
-    
-    try:
-        # gets the event list
-        events_result = calendar_service.events().list(
-            calendarId=calendar_id, 
-            timeMin=start_date_iso,
-            timeMax=end_date_iso,
-            singleEvents=True, # Essential for counting every instance of a recurring event
-            orderBy='startTime'
-        ).execute()
-        
-        events = events_result.get('items', [])
-        
-    except HttpError as err:
-        print(f"Error fetching events for stats: {err}")
-        return {k: 0 for k in total_time_spent}
-
-    for event in events:
-        summary = event.get('summary', '').lower()
-        start = event['start'].get('dateTime')
-        end = event['end'].get('dateTime')
-        
-        # Skip all-day events and events without clear start/end times
-        if not start or not end:
-            continue
-
-        try:
-            # Parse times with robust handling for timezones (crucial for duration)
-            start_dt = datetime.fromisoformat(start)
-            end_dt = datetime.fromisoformat(end)
-            duration = end_dt - start_dt
-        except ValueError:
-            # Skip if time format is unexpected
-            continue
-
-        # 2. Categorize the event
-        category_found = False
-        for category, keywords in CATEGORY_KEYWORDS.items():
-            if any(keyword.lower() in summary for keyword in keywords):
-                total_time_spent[category] += duration
-                category_found = True
-                break
-        
-        if not category_found:
-            total_time_spent['Other'] += duration
-
-    # 3. Aggregate and convert results to hours (float)
-    stats_in_hours = {
-        category: duration.total_seconds() / 3600 
-        for category, duration in total_time_spent.items()
-    }
-
-    return stats_in_hours
+    return calculate_stats(calendar_service, start_date_iso, end_date_iso, calendar_id,
+                           category_keywords or CATEGORY_KEYWORDS)
 
 # --- Example of function call preparation ---
 
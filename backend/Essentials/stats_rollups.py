@@ -0,0 +1,403 @@
+# Purpose: Materialized time-spent statistics in MongoDB, kept up to date incrementally.
+# Instead of re-reading and re-categorizing every event of the range on each stats request,
+# every event's contribution (hours per category, split per local day and hour of the week)
+# is added to small rollup documents once, and only events that changed since the last
+# nextSyncToken are re-applied. A dashboard asking for "the last 12 weeks by category"
+# then reads 12 documents.
+#
+# Collections (in the same database as the task/event links, see Essentials/db.py):
+#     stats_daily        one document per user, calendar and local day:
+#                        {"user_id", "calendar_id", "day": "2025-09-02", "hours": {category: h}}
+#     stats_weekly       one document per user, calendar and week (starting Monday):
+#                        {"user_id", "calendar_id", "week": "2025-09-01", "hours": {category: h},
+#                         "hour_of_week": {category: {"0".."167": h}}}
+#     stats_event_parts  what each event currently contributes, so a changed or deleted
+#                        event can be subtracted again
+#     stats_sync_state   the Calendar sync token and category configuration per calendar,
+#                        and the lease of the process currently syncing it
+#     stats_pending      batches of changes that were not completely applied yet
+#
+# Writes to several collections can't be made atomic without a replica set, so every batch of
+# changes goes through stats_pending: the batch (increments + part documents) is stored first,
+# then the parts are written, then the increments, each guarded by the batch id in the rollup
+# document, so a batch is never counted twice. A sync that died halfway leaves its batch in
+# stats_pending and the next sync finishes it before reading new changes.
+# Only the holder of a calendar's lease syncs it, across every process sharing the database.
+import hashlib
+import os
+import socket
+import threading
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+import pytz
+from googleapiclient.errors import HttpError
+from pymongo import ASCENDING, DeleteOne, ReplaceOne, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from services.event_stats import CATEGORY_KEYWORDS, get_categorizer
+
+HOURS_PER_WEEK = 7 * 24
+# The app serves a single Google account (token.json) unless callers pass their own id.
+DEFAULT_USER_ID = "default"
+# What the rollups need from every changed event.
+SYNC_FIELDS = "items(id,etag,status,summary,start,end),nextPageToken,nextSyncToken,timeZone"
+# How long a sync may hold a calendar without renewing its lease (renewed after every page).
+SYNC_LEASE_SECONDS = float(os.getenv("STATS_SYNC_LEASE_SECONDS", 120))
+# Recent batch ids kept in every rollup document. A batch is only ever re-applied by the next
+# sync of the same calendar, so a few are enough.
+APPLIED_BATCHES_KEPT = 20
+
+
+class LeaseLost(Exception):
+    """Raised when a sync took too long and another process took over its calendar."""
+
+
+def _config_fingerprint(category_keywords: dict) -> str:
+    """Changes whenever the category configuration changes (which invalidates the rollups)."""
+    text = repr([(category, list(keywords)) for category, keywords in category_keywords.items()])
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def event_parts(event: dict, tz) -> list:
+    """
+    Splits a timed event into pieces that each fall inside one local hour.
+
+    Args:
+        event (dict): Calendar event resource.
+        tz: pytz timezone the days and hours are counted in.
+
+    Returns:
+        list: [[day "YYYY-MM-DD", week "YYYY-MM-DD" (its Monday), hour_of_week 0-167, hours], ...];
+              empty for cancelled, all-day and malformed events (the stats skip those too).
+    """
+    if event.get("status") == "cancelled":
+        return []
+    start = event.get("start", {}).get("dateTime")
+    end = event.get("end", {}).get("dateTime")
+    if not start or not end:
+        return []
+    try:
+        start_dt = datetime.fromisoformat(start.replace("Z", "+00:00")).astimezone(tz)
+        end_dt = datetime.fromisoformat(end.replace("Z", "+00:00")).astimezone(tz)
+    except ValueError:
+        return []
+
+    parts = []
+    cursor = start_dt
+    while cursor < end_dt:
+        hour_start = cursor.replace(minute=0, second=0, microsecond=0)
+        # Next local hour boundary; normalize keeps the offset right across DST changes.
+        next_hour = tz.normalize(hour_start + timedelta(hours=1))
+        piece_end = min(next_hour, end_dt)
+        local_day = cursor.date()
+        monday = local_day - timedelta(days=local_day.weekday())
+        hour_of_week = local_day.weekday() * 24 + cursor.hour
+        parts.append([local_day.isoformat(), monday.isoformat(), hour_of_week,
+                      (piece_end - cursor).total_seconds() / 3600])
+        cursor = piece_end
+    return parts
+
+
+class RollupStore:
+    """
+    Reads and maintains the stats rollups of one MongoDB database.
+
+    Args:
+        database: A pymongo Database (e.g. Essentials.db.db).
+    """
+
+    def __init__(self, database):
+        self.daily = database["stats_daily"]
+        self.weekly = database["stats_weekly"]
+        self.parts = database["stats_event_parts"]
+        self.sync_state = database["stats_sync_state"]
+        self.pending = database["stats_pending"]
+        self._indexes_ready = False
+
+    def ensure_indexes(self):
+        """Creates the indexes the range queries use (once per process)."""
+        if self._indexes_ready:
+            return
+        self.daily.create_index([("user_id", ASCENDING), ("calendar_id", ASCENDING), ("day", ASCENDING)])
+        self.weekly.create_index([("user_id", ASCENDING), ("calendar_id", ASCENDING), ("week", ASCENDING)])
+        self.parts.create_index([("user_id", ASCENDING), ("calendar_id", ASCENDING)])
+        self.pending.create_index([("user_id", ASCENDING), ("calendar_id", ASCENDING), ("created_at", ASCENDING)])
+        # One state document per calendar: the lease is taken on it.
+        self.sync_state.create_index([("user_id", ASCENDING), ("calendar_id", ASCENDING)], unique=True)
+        self._indexes_ready = True
+
+    # --- Sync lease ---
+
+    def _acquire_lease(self, user_id: str, calendar_id: str, owner: str) -> bool:
+        """Takes the calendar's sync lease if nobody holds it or the holder stopped renewing it."""
+        key = {"user_id": user_id, "calendar_id": calendar_id}
+        try:
+            self.sync_state.update_one(key, {"$setOnInsert": key}, upsert=True)
+        except DuplicateKeyError:
+            pass  # another process created the document at the same moment
+        now = datetime.now()
+        taken = self.sync_state.update_one(
+            {**key, "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]},
+            {"$set": {"lease_owner": owner, "lease_until": now + timedelta(seconds=SYNC_LEASE_SECONDS)}},
+        )
+        return taken.modified_count == 1
+
+    def _renew_lease(self, user_id: str, calendar_id: str, owner: str):
+        """Extends the lease; raises LeaseLost when another process has taken it over."""
+        renewed = self.sync_state.update_one(
+            {"user_id": user_id, "calendar_id": calendar_id, "lease_owner": owner},
+            {"$set": {"lease_until": datetime.now() + timedelta(seconds=SYNC_LEASE_SECONDS)}},
+        )
+        if renewed.matched_count != 1:
+            raise LeaseLost(f"Lost the stats sync lease of {user_id}/{calendar_id}")
+
+    def _release_lease(self, user_id: str, calendar_id: str, owner: str):
+        self.sync_state.update_one({"user_id": user_id, "calendar_id": calendar_id, "lease_owner": owner},
+                                   {"$unset": {"lease_owner": "", "lease_until": ""}})
+
+    # --- Incremental maintenance ---
+
+    def apply_events(self, user_id: str, calendar_id: str, events: list, tz_name: str,
+                     category_keywords: dict = CATEGORY_KEYWORDS) -> int:
+        """
+        Brings the rollups in line with a batch of new, changed or cancelled events.
+        Each event's old contribution is subtracted and its new one added, all in a
+        handful of bulk writes recorded in stats_pending first (see _apply_batch).
+        Callers must hold the calendar's sync lease.
+
+        Returns:
+            int: How many events changed the rollups (unchanged etags are skipped).
+        """
+        if not events:
+            return 0
+        tz = pytz.timezone(tz_name)
+        categorizer = get_categorizer(category_keywords)
+        part_ids = {event["id"]: f"{user_id}|{calendar_id}|{event['id']}" for event in events if event.get("id")}
+        previous = {document["_id"]: document for document in self.parts.find({"_id": {"$in": list(part_ids.values())}})}
+
+        daily_inc = defaultdict(lambda: defaultdict(float))
+        weekly_inc = defaultdict(lambda: defaultdict(float))
+        part_documents = []
+        removed_parts = []
+
+        def add(category, parts, sign):
+            for day, week, hour_of_week, hours in parts:
+                daily_inc[day][f"hours.{category}"] += sign * hours
+                weekly_inc[week][f"hours.{category}"] += sign * hours
+                weekly_inc[week][f"hour_of_week.{category}.{hour_of_week}"] += sign * hours
+
+        changed = 0
+        for event in events:
+            part_id = part_ids.get(event.get("id"))
+            if part_id is None:
+                continue
+            old = previous.get(part_id)
+            if old is not None and old.get("etag") == event.get("etag") and event.get("status") != "cancelled":
+                continue
+            parts = event_parts(event, tz)
+            category = categorizer.categorize_event(event) if parts else None
+            if old is not None:
+                add(old["category"], old["parts"], -1)
+            if parts:
+                add(category, parts, 1)
+                part_documents.append({
+                    "_id": part_id, "user_id": user_id, "calendar_id": calendar_id,
+                    "etag": event.get("etag"), "category": category, "parts": parts,
+                })
+            elif old is not None:
+                removed_parts.append(part_id)
+            else:
+                continue
+            changed += 1
+
+        if changed:
+            # Field names contain dots ("hours.Work"), so the increments are stored as pairs.
+            batch = {
+                "_id": uuid.uuid4().hex, "user_id": user_id, "calendar_id": calendar_id,
+                "daily": [[day, list(increments.items())] for day, increments in daily_inc.items()],
+                "weekly": [[week, list(increments.items())] for week, increments in weekly_inc.items()],
+                "parts": part_documents, "removed_parts": removed_parts, "created_at": datetime.now(),
+            }
+            self.pending.insert_one(batch)
+            self._apply_batch(batch)
+        return changed
+
+    def _apply_batch(self, batch: dict):
+        """
+        Writes a batch recorded in stats_pending, then forgets it. Safe to run again after a
+        crash at any point: part writes are replacements, and each rollup document remembers
+        the batches already added to it.
+        """
+        key = {"user_id": batch["user_id"], "calendar_id": batch["calendar_id"]}
+        part_writes = [ReplaceOne({"_id": document["_id"]}, document, upsert=True) for document in batch["parts"]]
+        part_writes += [DeleteOne({"_id": part_id}) for part_id in batch["removed_parts"]]
+        if part_writes:
+            self.parts.bulk_write(part_writes, ordered=False)
+        now = datetime.now()
+        for collection, field, rows in ((self.daily, "day", batch["daily"]), (self.weekly, "week", batch["weekly"])):
+            if not rows:
+                continue
+            # Create missing documents first; the increments below must not upsert, or a
+            # document that already has this batch would be inserted a second time.
+            collection.bulk_write([UpdateOne({**key, field: value}, {"$setOnInsert": {"applied_batches": []}},
+                                             upsert=True) for value, _ in rows], ordered=False)
+            collection.bulk_write([UpdateOne(
+                {**key, field: value, "applied_batches": {"$ne": batch["_id"]}},
+                {"$inc": dict(increments), "$set": {"updated_at": now},
+                 "$push": {"applied_batches": {"$each": [batch["_id"]], "$slice": -APPLIED_BATCHES_KEPT}}},
+            ) for value, increments in rows], ordered=False)
+        self.pending.delete_one({"_id": batch["_id"]})
+
+    def _finish_pending(self, user_id: str, calendar_id: str):
+        """Applies the batches a sync that died halfway left behind, oldest first."""
+        for batch in self.pending.find({"user_id": user_id, "calendar_id": calendar_id}).sort("created_at", ASCENDING):
+            self._apply_batch(batch)
+
+    def clear(self, user_id: str, calendar_id: str):
+        """Drops every rollup of a calendar and its sync token (before a full rebuild)."""
+        key = {"user_id": user_id, "calendar_id": calendar_id}
+        for collection in (self.daily, self.weekly, self.parts, self.pending):
+            collection.delete_many(key)
+        # The state document also holds the sync lease, so only the sync fields go.
+        self.sync_state.update_one(key, {"$unset": {"sync_token": "", "time_zone": "", "categories": ""}})
+
+    def sync(self, service, user_id: str, calendar_id: str = 'primary',
+             category_keywords: dict = CATEGORY_KEYWORDS) -> int:
+        """
+        Applies every event change since the last sync (everything on the first run),
+        one page at a time, then stores the new sync token.
+        A changed category configuration or an expired sync token (410) rebuilds the calendar.
+        When another process (or thread) is already syncing the calendar this returns 0 right
+        away; the rollups are then as fresh as that sync makes them.
+
+        Args:
+            service: The authenticated Google Calendar API service object.
+            user_id (str): Whose rollups these are.
+            calendar_id (str): The calendar to follow.
+            category_keywords (dict): {category: [keywords]} in priority order.
+
+        Returns:
+            int: Number of events that changed the rollups.
+        """
+        self.ensure_indexes()
+        fingerprint = _config_fingerprint(category_keywords)
+        owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        if not self._acquire_lease(user_id, calendar_id, owner):
+            print(f"Stats of {user_id}/{calendar_id} are being synced elsewhere; skipping")
+            return 0
+        try:
+            state = self.sync_state.find_one({"user_id": user_id, "calendar_id": calendar_id}) or {}
+            # A full sync (no token yet, or one cut off halfway) rebuilds from scratch, as does
+            # a changed category configuration.
+            if not state.get("sync_token") or state.get("categories") != fingerprint:
+                self.clear(user_id, calendar_id)
+                state = {}
+            self._finish_pending(user_id, calendar_id)
+            try:
+                return self._sync_pages(service, user_id, calendar_id, state, fingerprint, category_keywords, owner)
+            except HttpError as err:
+                # 410 Gone: the sync token is no longer valid, start over with a full sync.
+                if err.resp.status != 410:
+                    raise
+                self.clear(user_id, calendar_id)
+                return self._sync_pages(service, user_id, calendar_id, {}, fingerprint, category_keywords, owner)
+        finally:
+            self._release_lease(user_id, calendar_id, owner)
+
+    def _sync_pages(self, service, user_id, calendar_id, state, fingerprint, category_keywords, owner) -> int:
+        changed = 0
+        page_token = None
+        time_zone = state.get("time_zone", "UTC")
+        while True:
+            params = {
+                "calendarId": calendar_id,
+                "singleEvents": True,  # Essential for counting every instance of a recurring event
+                "maxResults": 2500,
+                "fields": SYNC_FIELDS,
+            }
+            if state.get("sync_token"):
+                params["syncToken"] = state["sync_token"]
+            if page_token:
+                params["pageToken"] = page_token
+            response = service.events().list(**params).execute()
+            time_zone = response.get("timeZone", time_zone)
+            # Checked before writing, so a sync that lost its lease never applies a page.
+            self._renew_lease(user_id, calendar_id, owner)
+            changed += self.apply_events(user_id, calendar_id, response.get("items", []), time_zone,
+                                         category_keywords)
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+        self.sync_state.update_one(
+            {"user_id": user_id, "calendar_id": calendar_id, "lease_owner": owner},
+            {"$set": {"sync_token": response.get("nextSyncToken", state.get("sync_token")),
+                      "time_zone": time_zone, "categories": fingerprint, "synced_at": datetime.now()}},
+        )
+        return changed
+
+    # --- Range queries ---
+
+    def category_hours(self, user_id: str, start_day: str, end_day: str, calendar_id: str = 'primary') -> dict:
+        """
+        Hours per category over local days start_day <= day < end_day ("YYYY-MM-DD").
+        """
+        totals = defaultdict(float)
+        query = {"user_id": user_id, "calendar_id": calendar_id, "day": {"$gte": start_day, "$lt": end_day}}
+        for document in self.daily.find(query, {"hours": 1}):
+            for category, hours in document.get("hours", {}).items():
+                totals[category] += hours
+        return self._rounded(totals)
+
+    def weekly_category_hours(self, user_id: str, weeks: int = 12, calendar_id: str = 'primary',
+                              today=None) -> list:
+        """
+        Hours per category for each of the last `weeks` weeks (including the current one).
+
+        Returns:
+            list[dict]: [{"week": "2025-09-01", "hours": {category: h}}, ...], oldest first;
+                        weeks without events have empty "hours".
+        """
+        today = today or datetime.now().date()
+        current = today - timedelta(days=today.weekday())
+        wanted = [(current - timedelta(weeks=offset)).isoformat() for offset in range(weeks - 1, -1, -1)]
+        query = {"user_id": user_id, "calendar_id": calendar_id, "week": {"$gte": wanted[0], "$lte": wanted[-1]}}
+        found = {document["week"]: document.get("hours", {})
+                 for document in self.weekly.find(query, {"week": 1, "hours": 1})}
+        return [{"week": week, "hours": self._rounded(found.get(week, {}))} for week in wanted]
+
+    def hour_of_week_profile(self, user_id: str, start_week: str, end_week: str,
+                             calendar_id: str = 'primary') -> dict:
+        """
+        Hours per category for each hour of the week (0 = Monday 00:00), summed over the
+        weeks start_week <= week < end_week.
+
+        Returns:
+            dict: {category: [168 floats]}
+        """
+        profile = defaultdict(lambda: [0.0] * HOURS_PER_WEEK)
+        query = {"user_id": user_id, "calendar_id": calendar_id, "week": {"$gte": start_week, "$lt": end_week}}
+        for document in self.weekly.find(query, {"hour_of_week": 1}):
+            for category, hours_by_hour in document.get("hour_of_week", {}).items():
+                for hour_of_week, hours in hours_by_hour.items():
+                    profile[category][int(hour_of_week)] += hours
+        return {category: [round(hours, 4) for hours in values] for category, values in profile.items()
+                if any(abs(hours) > 1e-9 for hours in values)}
+
+    @staticmethod
+    def _rounded(totals: dict) -> dict:
+        # Repeated +/- increments leave float noise such as 1e-15 behind.
+        return {category: round(hours, 4) for category, hours in totals.items() if abs(hours) > 1e-9}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_rollup_store() -> RollupStore:
+    """Returns the process-wide RollupStore on the app database."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            from Essentials.db import db
+            _store = RollupStore(db)
+        return _store
@@ -0,0 +1,70 @@
+# Micro-benchmark for event categorization (services/event_stats.py).
+# Compares the compiled Categorizer with the old loop over every category and keyword,
+# on synthetic events, first cold and then with every (id, etag) already memoized
+# (what happens when stats over the same history are requested again). Runs once with the
+# default CATEGORY_KEYWORDS and once with a large user configuration (10 x 20 keywords),
+# where the loop's cost grows with the keyword count and the compiled pattern's barely does.
+#
+# Run from the backend folder:
+#     python benchmarks/bench_categorizer.py
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.event_stats import CATEGORY_KEYWORDS, Categorizer
+
+SIZES = [10_000, 100_000, 500_000]
+WORDS = ["Team", "Meeting", "Lunch", "with", "Sam", "Gym", "Dentist", "Sprint", "planning",
+         "Reading", "club", "Call", "Mom", "Groceries", "Nap", "Client", "review", "Run", "Errands"]
+
+
+def make_events(n: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    return [{"id": f"event{i}", "etag": f'"{i}"',
+             "summary": " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 5)))}
+            for i in range(n)]
+
+
+def make_large_config(seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    config = {f"Category {i}": ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 9)))
+                                for _ in range(20)] for i in range(10)}
+    config["Category 9"] += ["Meeting", "Gym"]
+    return config
+
+
+def loop_categorize(summary: str, category_keywords: dict = CATEGORY_KEYWORDS) -> str:
+    """The categorization calculate_weekly_stats used before the compiled categorizer."""
+    summary = summary.lower()
+    for category, keywords in category_keywords.items():
+        if any(keyword.lower() in summary for keyword in keywords):
+            return category
+    return "Other"
+
+
+def timed(function, events) -> float:
+    started = time.perf_counter()
+    for event in events:
+        function(event)
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    for name, config in [("default categories", CATEGORY_KEYWORDS), ("10 x 20 keywords", make_large_config())]:
+        print(name)
+        print(f"{'events':>8} {'loop ms':>10} {'compiled ms':>12} {'memoized ms':>12}")
+        for n in SIZES:
+            events = make_events(n)
+            categorizer = Categorizer(config, memo_size=n)
+            loop_ms = timed(lambda event: loop_categorize(event["summary"], config), events)
+            cold_ms = timed(categorizer.categorize_event, events)
+            warm_ms = timed(categorizer.categorize_event, events)
+            assert all(categorizer.categorize_event(e) == loop_categorize(e["summary"], config) for e in events[:1000])
+            print(f"{n:>8} {loop_ms:>10.1f} {cold_ms:>12.1f} {warm_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
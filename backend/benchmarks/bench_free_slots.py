@@ -0,0 +1,62 @@
+# Micro-benchmark for the local free-slot engine (services/free_slots.py).
+# Generates synthetic calendars with many (overlapping, unsorted) busy intervals
+# and times how long it takes to answer "3 slots of at least 60 minutes" (what /plan_event
+# asks for) and to enumerate every free slot in the range.
+#
+# Run from the backend folder:
+#     python benchmarks/bench_free_slots.py
+import os
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.free_slots import find_free_slots
+
+SIZES = [1_000, 10_000, 50_000, 100_000]
+REPEATS = 5
+
+
+def make_busy_slots(n: int, start: datetime, days: int, seed: int = 42) -> list:
+    """Builds n random busy intervals (15 min - 3 h) spread over `days` days, in random order."""
+    rng = random.Random(seed)
+    span = days * 24 * 60
+    slots = []
+    for _ in range(n):
+        offset = rng.randrange(span)
+        length = rng.randrange(15, 180)
+        slot_start = start + timedelta(minutes=offset)
+        slot_end = slot_start + timedelta(minutes=length)
+        slots.append({
+            'start': slot_start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            'end': slot_end.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        })
+    return slots
+
+
+def main():
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    print(f"{'busy intervals':>15} {'days':>6} {'3 slots (ms)':>13} {'all slots (ms)':>15} {'slots':>6}")
+    for n in SIZES:
+        # Keep the calendar density realistic: roughly 10 busy intervals per day.
+        days = max(7, n // 10)
+        end = start + timedelta(days=days)
+        busy = make_busy_slots(n, start, days)
+        time_min = start.strftime("%Y-%m-%dT%H:%M:%SZ")
+        time_max = end.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        def first_three():
+            return find_free_slots(time_min, time_max, busy, duration_minutes=60, count=3)
+
+        def every_slot():
+            return find_free_slots(time_min, time_max, busy, duration_minutes=60)
+
+        best_three = min(timeit.repeat(first_three, number=1, repeat=REPEATS))
+        best_all = min(timeit.repeat(every_slot, number=1, repeat=REPEATS))
+        print(f"{n:>15} {days:>6} {best_three * 1000:>13.2f} {best_all * 1000:>15.2f} {len(every_slot()):>6}")
+
+
+if __name__ == "__main__":
+    main()
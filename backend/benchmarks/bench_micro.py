@@ -0,0 +1,195 @@
+# Micro-benchmark suite for the CPU-bound hot paths:
+#     parse_event_line            one "Name on Day: 9:00 AM - 10:00 AM (1 hour)" line per call
+#     parse_recurring_event_line  one "Name Every Day: ..." line per call
+#     parse_event_details_1       one call on an n-line recurring schedule
+#     suggest_time_busy_string    the busy-slot text _suggest_time_prompt builds for n busy slots
+#     categorize_stats            aggregate_stats (categorize + add up durations) over n events
+#
+# Inputs are generated with fixed seeds at several sizes (10 to 100k lines/events). Each case is
+# timed with timeit (garbage collector off while timing): the loop count is calibrated until one
+# run takes at least MIN_RUN_SECONDS, then the run is repeated and the median and minimum are kept.
+# Times are reported per item (us per line/event/slot), so sizes can be compared directly.
+#
+# Run from the backend folder:
+#     python benchmarks/bench_micro.py                           # print the table
+#     python benchmarks/bench_micro.py --save-baseline           # write benchmarks/baseline_micro.json
+#     python benchmarks/bench_micro.py --check                   # exit 1 if a case got slower than the baseline
+#     python benchmarks/bench_micro.py --only parse_event_line --sizes 10,1000
+#
+# The committed baseline was recorded on one development machine; record a new one on the
+# machine you compare on (e.g. on the base commit) before relying on --check.
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The parser's methods under test never call the model or the response cache.
+os.environ.setdefault("GEMINI_CACHE_DISABLED", "1")
+
+from fakes.gemini import FakeGenerativeModel
+from services.event_stats import aggregate_stats
+from services.gemini_parser import GeminiParser
+
+SIZES = [10, 100, 1_000, 10_000, 100_000]
+REPEATS = 5
+MIN_RUN_SECONDS = 0.2
+# --check fails when a case's median is more than this factor above the baseline's; shared
+# machines drift by 20-30% between runs, real regressions (e.g. quadratic growth) by far more.
+REGRESSION_THRESHOLD = 1.5
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_micro.json")
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+NAMES = ["Team meeting", "Gym", "Lunch with Sam", "Study session", "Dentist", "Call mom",
+         "Sprint planning", "Reading club", "Groceries", "Client review", "Morning run"]
+
+
+def make_lines(n: int, keyword: str, seed: int = 42) -> list:
+    """n structured lines like "Gym on Monday: 8:00 AM - 9:30 AM (1.5 hours)"."""
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(n):
+        start = rng.randrange(6, 20)
+        end = start + rng.randint(1, 3)
+        lines.append(f"{rng.choice(NAMES)} {keyword} {rng.choice(DAYS)}: "
+                     f"{(start - 1) % 12 + 1}:{rng.choice(['00', '30'])} {'AM' if start < 12 else 'PM'} - "
+                     f"{(end - 1) % 12 + 1}:00 {'AM' if end < 12 or end == 24 else 'PM'} ({end - start} hours)")
+    return lines
+
+
+def make_busy(n: int, seed: int = 42) -> dict:
+    """A freeBusy answer with n busy slots over the next 30 days."""
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 5, tzinfo=timezone.utc)
+    busy = []
+    for _ in range(n):
+        slot_start = start + timedelta(minutes=rng.randrange(30 * 24 * 60))
+        slot_end = slot_start + timedelta(minutes=rng.randrange(15, 180))
+        busy.append({"start": slot_start.isoformat().replace("+00:00", "Z"),
+                     "end": slot_end.isoformat().replace("+00:00", "Z")})
+    return {"busy": busy}
+
+
+def make_events(n: int, seed: int = 42) -> list:
+    """n timed events without id/etag, so every one is categorized (no memo hits)."""
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 5, tzinfo=timezone.utc)
+    events = []
+    for _ in range(n):
+        event_start = start + timedelta(minutes=rng.randrange(7 * 24 * 60))
+        event_end = event_start + timedelta(minutes=rng.randrange(15, 180))
+        events.append({"summary": rng.choice(NAMES),
+                       "start": {"dateTime": event_start.isoformat()},
+                       "end": {"dateTime": event_end.isoformat()}})
+    return events
+
+
+def build_cases(parser: GeminiParser) -> dict:
+    """name -> setup(n) returning the zero-argument function to time."""
+    return {
+        "parse_event_line": lambda n: (
+            lambda lines=make_lines(n, "on"): [parser.parse_event_line(line) for line in lines]),
+        "parse_recurring_event_line": lambda n: (
+            lambda lines=make_lines(n, "Every"): [parser.parse_recurring_event_line(line) for line in lines]),
+        "parse_event_details_1": lambda n: (
+            lambda text="\n".join(make_lines(n, "Every")): parser.parse_event_details_1(text)),
+        "suggest_time_busy_string": lambda n: (
+            lambda busy=make_busy(n): parser._suggest_time_prompt("Find an hour for the gym", busy)),
+        "categorize_stats": lambda n: (
+            lambda events=make_events(n): aggregate_stats(events)),
+    }
+
+
+def time_case(function, size: int, repeats: int) -> dict:
+    """Median and minimum time per item, in microseconds."""
+    # The parsers print a few lines per event; keep the terminal out of the measurement.
+    with contextlib.redirect_stdout(io.StringIO()) as sink:
+        timer = timeit.Timer(function)
+        number, elapsed = timer.autorange()
+        while elapsed < MIN_RUN_SECONDS:
+            number *= 2
+            elapsed = timer.timeit(number)
+            sink.seek(0)
+            sink.truncate()
+        runs = []
+        for _ in range(repeats):
+            runs.append(timer.timeit(number) / number)
+            sink.seek(0)
+            sink.truncate()
+    return {"median_us": round(statistics.median(runs) / size * 1e6, 4),
+            "min_us": round(min(runs) / size * 1e6, 4),
+            "loops": number, "repeats": repeats}
+
+
+def run(only=None, sizes=SIZES, repeats=REPEATS) -> dict:
+    parser = GeminiParser(model=FakeGenerativeModel())
+    results = {}
+    for name, setup in build_cases(parser).items():
+        if only and name not in only:
+            continue
+        for size in sizes:
+            # A single 100k run takes seconds already; fewer repeats keep the suite short.
+            result = time_case(setup(size), size, repeats if size < 100_000 else max(3, repeats // 2))
+            results.setdefault(name, {})[str(size)] = result
+            print(f"{name:>28} {size:>8} {result['median_us']:>12.3f} {result['min_us']:>12.3f}", flush=True)
+    return results
+
+
+def check(results: dict, baseline: dict, threshold: float) -> list:
+    """(name, size, baseline us, current us) for every case that got slower than threshold allows."""
+    regressions = []
+    for name, by_size in results.items():
+        for size, result in by_size.items():
+            before = baseline.get("results", {}).get(name, {}).get(size)
+            if before and result["median_us"] > before["median_us"] * threshold:
+                regressions.append((name, size, before["median_us"], result["median_us"]))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for parsers, slot strings and statistics.")
+    parser.add_argument("--sizes", help="comma-separated sizes (default: " + ",".join(map(str, SIZES)) + ")")
+    parser.add_argument("--only", help="comma-separated case names")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to --baseline")
+    parser.add_argument("--check", action="store_true", help="compare with --baseline, exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--out", help="also write the results as JSON here")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",")] if args.sizes else SIZES
+    only = set(args.only.split(",")) if args.only else None
+    print(f"{'case':>28} {'size':>8} {'median us/item':>12} {'min us/item':>12}")
+    document = {
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "results": run(only, sizes, args.repeats),
+    }
+    for path in filter(None, [args.out, args.baseline if args.save_baseline else None]):
+        with open(path, "w") as out_file:
+            json.dump(document, out_file, indent=2)
+        print(f"Saved to {path}")
+    if args.check:
+        with open(args.baseline) as baseline_file:
+            regressions = check(document["results"], json.load(baseline_file), args.threshold)
+        for name, size, before, after in regressions:
+            print(f"REGRESSION {name} @ {size}: {before:.3f} -> {after:.3f} us/item ({after / before:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No case slower than {args.threshold:.2f}x the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Startup benchmark: how long a fresh worker takes from `import` to serving its first request.
+# Each run starts a new Python process so import caches don't hide the real cold start.
+#
+# Reported per run:
+#   import   time to import Essentials.app (Flask app, services, lazy clients)
+#   ready    import + first /api/health response through the test client
+#   client   building a Calendar v3 and a Tasks v1 client from the bundled discovery
+#            documents (dummy credentials, no network)
+#
+# Run from the backend folder:
+#     python benchmarks/bench_startup.py [runs]
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD_SCRIPT = r"""
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+t0 = time.perf_counter()
+sys.path.insert(0, ".")
+import Essentials.app as api
+t_import = time.perf_counter()
+response = api.app.test_client().get("/api/health")
+assert response.status_code == 200
+t_ready = time.perf_counter()
+
+from google.oauth2.credentials import Credentials
+from services.google_services import GoogleServicePool
+pool = GoogleServicePool(token_path="unused-token.json")
+pool._credentials = Credentials("dummy-token")
+pool.calendar()
+pool.tasks()
+t_client = time.perf_counter()
+
+print(json.dumps({
+    "import": t_import - t0,
+    "ready": t_ready - t0,
+    "client": t_client - t_ready,
+    "gemini_sdk_loaded": "google.generativeai" in sys.modules,
+}))
+"""
+
+
+def run_once() -> dict:
+    env = dict(os.environ, GEMINI_API_KEY=os.environ.get("GEMINI_API_KEY", "benchmark"))
+    output = subprocess.run([sys.executable, "-c", CHILD_SCRIPT], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    results = [run_once() for _ in range(runs)]
+    print(f"{'metric':>8} {'median (ms)':>12} {'min (ms)':>10}")
+    for metric in ("import", "ready", "client"):
+        values = [result[metric] * 1000 for result in results]
+        print(f"{metric:>8} {statistics.median(values):>12.1f} {min(values):>10.1f}")
+    print(f"Gemini SDK imported before first use: {results[0]['gemini_sdk_loaded']}")
+
+
+if __name__ == "__main__":
+    main()
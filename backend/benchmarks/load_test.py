@@ -0,0 +1,370 @@
+# End-to-end load test for the API (Essentials/app.py or Essentials/async_app.py).
+# Replays a weighted mix of /create_event_nlp, /plan_event and /delete_event requests from
+# `concurrency` closed-loop clients (each sends its next request as soon as the previous one
+# answers) and reports throughput and p50/p95/p99 latency per endpoint.
+# Results are written as JSON, tagged with the git commit, so runs can be compared.
+#
+# By default it starts the app itself against the local fakes (fakes/serve.py), so no Google
+# account or Gemini key is needed; the fake latencies stand in for the real services.
+# The events /delete_event needs are then seeded by fakes/serve.py straight into the fake's
+# state; with --url and --google-url they are inserted through the Calendar API instead.
+# Run from the backend folder:
+#     python benchmarks/load_test.py --app flask --concurrency 32 --duration 30
+#     python benchmarks/load_test.py --app async --concurrency 256 --gemini-latency-ms 800 --out async.json
+#     python benchmarks/load_test.py --url http://127.0.0.1:80 --mix create_event_nlp=1,plan_event=1
+#     python benchmarks/load_test.py --compare before.json after.json
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Relative weights; roughly what the frontend sends: mostly natural-language creates and plans.
+DEFAULT_MIX = {"create_event_nlp": 55, "plan_event": 30, "delete_event": 15}
+PERCENTILES = (50, 95, 99)
+# Events put in the fake calendar up front so /delete_event has real ids to delete.
+SEED_EVENTS = 2000
+
+NLP_INPUTS = [
+    "Dentist appointment Thursday at 3pm",
+    "Team sync on Monday: 10:00 AM - 10:30 AM (30 minutes)",
+    "lunch with Sam friday at noon",
+    "Call mom sometime tomorrow evening",
+    "Gym session Wednesday 6pm for an hour",
+    "Study group next Tuesday 2pm to 4pm",
+    "Pick up groceries after work on Friday",
+    "Doctor visit on Saturday: 9:00 AM - 10:00 AM (1 hour)",
+    "1:1 with my manager Thursday morning",
+    "Haircut sometime this weekend",
+]
+PLAN_INPUTS = [
+    "I need 2 hours to study for my exam",
+    "Find time for a 30 minute call with Alex",
+    "Schedule a 1 hour workout",
+    "Book 45 minutes to review the budget",
+    "Plan a coffee chat",
+]
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def parse_mix(text: str) -> dict:
+    """"create_event_nlp=3,plan_event=1" -> {"create_event_nlp": 3.0, "plan_event": 1.0}"""
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise ValueError(f"Unknown endpoint in mix: {name!r} (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class EventIds:
+    """Ids that /delete_event can use; each is handed out once."""
+
+    def __init__(self, ids=()):
+        self._ids = list(ids)
+        self._lock = threading.Lock()
+
+    def take(self):
+        with self._lock:
+            return self._ids.pop() if self._ids else None
+
+
+def seed_events(google_url: str, count: int) -> list:
+    """
+    Inserts `count` events through a running Calendar API (--url mode) and returns their ids.
+    One request at a time, so keep `count` small against a real account.
+    """
+    parts = urlsplit(google_url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=30)
+    ids = []
+    for i in range(count):
+        event_start = start + timedelta(hours=i)
+        body = json.dumps({"summary": f"Load test event {i}",
+                           "start": {"dateTime": event_start.isoformat(), "timeZone": "America/Chicago"},
+                           "end": {"dateTime": (event_start + timedelta(minutes=30)).isoformat(),
+                                   "timeZone": "America/Chicago"}})
+        for _ in range(5):  # the fake may be injecting errors
+            connection.request("POST", parts.path.rstrip("/") + "/calendar/v3/calendars/primary/events",
+                               body=body, headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            payload = response.read()
+            if response.status == 200:
+                ids.append(json.loads(payload)["id"])
+                break
+    connection.close()
+    return ids
+
+
+def build_request(endpoint: str, rng: random.Random, event_ids: EventIds) -> dict:
+    """The JSON body for one request to endpoint."""
+    if endpoint == "create_event_nlp":
+        return {"input": rng.choice(NLP_INPUTS)}
+    if endpoint == "plan_event":
+        body = {"input": rng.choice(PLAN_INPUTS), "range": rng.randint(1, 7)}
+        if rng.random() < 0.5:
+            body["duration"] = rng.choice([30, 45, 60, 120])
+        return body
+    # Unknown ids still exercise the route (Google answers 404), they just cost less.
+    return {"id": event_ids.take() or f"missing{rng.randrange(10**9)}", "calendar_id": "primary"}
+
+
+class Recorder:
+    """Collects (endpoint, status, latency) samples from every client thread."""
+
+    def __init__(self):
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, endpoint: str, status: int, latency: float):
+        with self._lock:
+            self.samples.setdefault(endpoint, []).append((status, latency))
+
+    def report(self, elapsed: float) -> dict:
+        """Throughput, error count and latency percentiles (ms) per endpoint and overall."""
+        endpoints = {}
+        everything = []
+        for endpoint, samples in sorted(self.samples.items()):
+            endpoints[endpoint] = summarize(samples, elapsed)
+            everything.extend(samples)
+        return {"endpoints": endpoints, "overall": summarize(everything, elapsed)}
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    latencies = sorted(latency * 1000 for _, latency in samples)
+    statuses = {}
+    for status, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    errors = sum(1 for status, _ in samples if not 200 <= status < 300)
+    summary = {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        "statuses": statuses,
+    }
+    for pct in PERCENTILES:
+        summary[f"p{pct}_ms"] = round(percentile(latencies, pct), 2)
+    return summary
+
+
+def client(base_url: str, mix: dict, deadline: float, warmup_until: float, recorder: Recorder,
+           event_ids: EventIds, seed: int, timeout: float):
+    """One closed-loop client: sends a request, waits for the answer, repeats until deadline."""
+    rng = random.Random(seed)
+    parts = urlsplit(base_url)
+    endpoints, weights = list(mix), list(mix.values())
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+    while time.perf_counter() < deadline:
+        endpoint = rng.choices(endpoints, weights)[0]
+        body = json.dumps(build_request(endpoint, rng, event_ids))
+        started = time.perf_counter()
+        try:
+            connection.request("POST", f"{parts.path.rstrip('/')}/{endpoint}", body=body,
+                               headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            # 0 marks a connection error or timeout; start over on a new connection.
+            status = 0
+            connection.close()
+            connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+        finished = time.perf_counter()
+        if started >= warmup_until:
+            recorder.add(endpoint, status, finished - started)
+    connection.close()
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def wait_for_server(base_url: str, timeout: float = 30.0):
+    parts = urlsplit(base_url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=2)
+            connection.request("GET", "/api/health")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not come up within {timeout:.0f}s")
+
+
+def start_server(args, event_count: int) -> tuple:
+    """
+    Starts fakes/serve.py in a child process with `event_count` events in its calendar.
+
+    Returns:
+        tuple: (process, app url, seeded event ids)
+    """
+    port, google_port = free_port(), free_port()
+    ids_fd, ids_path = tempfile.mkstemp(prefix="seeded-events-", suffix=".json")
+    os.close(ids_fd)
+    command = [sys.executable, "-m", "fakes.serve", "--app", args.app, "--port", str(port),
+               "--google-port", str(google_port),
+               "--google-latency-ms", str(args.google_latency_ms),
+               "--google-jitter-ms", str(args.google_jitter_ms),
+               "--google-error-rate", str(args.google_error_rate),
+               "--gemini-latency-ms", str(args.gemini_latency_ms),
+               "--gemini-jitter-ms", str(args.gemini_jitter_ms),
+               "--seed", str(args.seed),
+               "--seed-events", str(event_count), "--seed-ids-out", ids_path]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, stdout=subprocess.DEVNULL,
+                               stderr=None if args.verbose else subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_for_server(base_url)
+        with open(ids_path) as ids_file:
+            event_ids = json.load(ids_file)
+    except (RuntimeError, OSError, ValueError):
+        process.kill()
+        raise
+    finally:
+        os.remove(ids_path)
+    return process, base_url, event_ids
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args) -> dict:
+    mix = parse_mix(args.mix) if args.mix else dict(DEFAULT_MIX)
+    process = None
+    base_url = args.url
+    wanted = args.seed_events if "delete_event" in mix else 0
+    if base_url:
+        seeded = seed_events(args.google_url, wanted) if args.google_url and wanted else []
+    else:
+        process, base_url, seeded = start_server(args, wanted)
+    try:
+        event_ids = EventIds(seeded)
+        recorder = Recorder()
+        started = time.perf_counter()
+        warmup_until = started + args.warmup
+        deadline = warmup_until + args.duration
+        threads = [threading.Thread(target=client, daemon=True,
+                                    args=(base_url, mix, deadline, warmup_until, recorder, event_ids,
+                                          args.seed + i, args.timeout))
+                   for i in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        measured = time.perf_counter() - warmup_until
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "target": args.url or f"fakes.serve --app {args.app}",
+            "concurrency": args.concurrency, "duration_s": args.duration, "warmup_s": args.warmup,
+            "mix": mix, "google_latency_ms": args.google_latency_ms, "google_jitter_ms": args.google_jitter_ms,
+            "google_error_rate": args.google_error_rate, "gemini_latency_ms": args.gemini_latency_ms,
+            "gemini_jitter_ms": args.gemini_jitter_ms, "seed": args.seed,
+        },
+        "measured_s": round(measured, 3),
+        **recorder.report(measured),
+    }
+
+
+def print_report(result: dict):
+    config = result["config"]
+    print(f"{config['target']} @ {result['commit']}: concurrency {config['concurrency']}, "
+          f"{result['measured_s']:.1f}s measured")
+    print(f"{'endpoint':>18} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = list(result["endpoints"].items()) + [("overall", result["overall"])]
+    for endpoint, summary in rows:
+        print(f"{endpoint:>18} {summary['requests']:>9} {summary['errors']:>7} {summary['throughput_rps']:>8.1f} "
+              f"{summary['p50_ms']:>9.1f} {summary['p95_ms']:>9.1f} {summary['p99_ms']:>9.1f}")
+
+
+def compare(before_path: str, after_path: str):
+    """Prints the change in throughput and latency percentiles between two saved runs."""
+    with open(before_path) as before_file, open(after_path) as after_file:
+        before, after = json.load(before_file), json.load(after_file)
+    print(f"{before['commit']} -> {after['commit']}")
+    print(f"{'endpoint':>18} {'metric':>14} {'before':>10} {'after':>10} {'change':>9}")
+    names = sorted(set(before["endpoints"]) & set(after["endpoints"])) + ["overall"]
+    for name in names:
+        old = before["overall"] if name == "overall" else before["endpoints"][name]
+        new = after["overall"] if name == "overall" else after["endpoints"][name]
+        for metric in ["throughput_rps"] + [f"p{pct}_ms" for pct in PERCENTILES] + ["error_rate"]:
+            change = f"{(new[metric] - old[metric]) / old[metric] * 100:+.1f}%" if old[metric] else "n/a"
+            print(f"{name:>18} {metric:>14} {old[metric]:>10} {new[metric]:>10} {change:>9}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the AI Scheduler API.")
+    parser.add_argument("--url", help="test an already running server instead of starting one against the fakes")
+    parser.add_argument("--google-url", help="with --url: Calendar API root to seed events for /delete_event")
+    parser.add_argument("--app", choices=["flask", "async"], default="flask")
+    parser.add_argument("--concurrency", type=int, default=16, help="simultaneous clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds of load before measuring")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument("--mix", help="endpoint=weight,... (default: " +
+                        ",".join(f"{name}={weight}" for name, weight in DEFAULT_MIX.items()) + ")")
+    parser.add_argument("--seed-events", type=int, default=SEED_EVENTS)
+    parser.add_argument("--google-latency-ms", type=float, default=80.0)
+    parser.add_argument("--google-jitter-ms", type=float, default=40.0)
+    parser.add_argument("--google-error-rate", type=float, default=0.0)
+    parser.add_argument("--gemini-latency-ms", type=float, default=600.0)
+    parser.add_argument("--gemini-jitter-ms", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="write the JSON result here (default: print it)")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two saved results")
+    parser.add_argument("--verbose", action="store_true", help="show the server's log")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.compare:
+        compare(*args.compare)
+        return
+    result = run(args)
+    print_report(result)
+    if args.out:
+        with open(args.out, "w") as out_file:
+            json.dump(result, out_file, indent=2)
+        print(f"Saved to {args.out}")
+    else:
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+# Local stand-ins for the external services, for load tests and offline development.
+#     google_server.FakeGoogleServer   Calendar v3 / Tasks v1 over HTTP (batch included)
+#     gemini.FakeGenerativeModel       drop-in for genai.GenerativeModel
+#     serve                            runs app.py / async_app.py against both
@@ -0,0 +1,162 @@
+# Purpose: Stand-in for google.generativeai's GenerativeModel, for offline load tests.
+# Pass it to GeminiParser(model=FakeGenerativeModel(...)). It answers every prompt
+# GeminiParser sends with text in the format the parser expects, after a configurable delay,
+# and supports stream=True (sync and async) like the real SDK.
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+# Characters per streamed chunk; the real API sends a few words at a time.
+STREAM_CHUNK_SIZE = 24
+
+
+class FakeGeminiError(Exception):
+    """Injected failure; .code is the HTTP status, like google.api_core's exceptions."""
+
+    def __init__(self, code: int):
+        super().__init__(f"{code} Injected Gemini error")
+        self.code = code
+
+
+class FakeResponse:
+    """What generate_content returns (and what each streamed chunk is): only .text is used."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _AsyncChunks:
+    """Async iterable of FakeResponse chunks, like the SDK's streamed async response."""
+
+    def __init__(self, model, text: str):
+        self._model = model
+        self._text = text
+
+    async def __aiter__(self):
+        for chunk in self._model._chunks(self._text):
+            await asyncio.sleep(self._model._chunk_delay())
+            yield FakeResponse(chunk)
+
+
+def _user_input(prompt: str) -> str:
+    """The text of the last **User Input:** "..." line of a prompt."""
+    found = re.findall(r'\*\*User Input:\*\*\s*"(.*)"', prompt)
+    return found[-1] if found else ""
+
+
+def _pick_day(text: str) -> str:
+    """The weekday named in the text, else a stable pseudo-random one."""
+    for day in DAYS:
+        if day.lower() in text.lower():
+            return day
+    return DAYS[int(hashlib.md5(text.encode("utf-8")).hexdigest(), 16) % 7]
+
+
+# Input that is already in the "Name on Day: 9:00 AM - 10:00 AM (1 hour)" shape is echoed back.
+STRUCTURED_LINE = re.compile(r".+\b(?:on|Every) \w+day: .+ - .+", re.IGNORECASE)
+
+
+def _event_name(text: str) -> str:
+    text = re.sub(r"\b\d{1,2}(?::\d{2})?\s*(?:am|pm)\b", " ", text, flags=re.IGNORECASE)
+    words = re.findall(r"[A-Za-z][A-Za-z']*", text)
+    skip = {"i", "have", "to", "need", "want", "please", "schedule", "a", "an", "the", "on", "at", "every"}
+    words = [word for word in words if word.lower() not in skip and word.capitalize() not in DAYS]
+    return " ".join(words[:3]).capitalize() or "Event"
+
+
+def default_responder(prompt: str) -> str:
+    """Templated answers for every prompt GeminiParser builds, recognized by its wording."""
+    if "Convert EACH numbered user input" in prompt:
+        body = prompt.split("**User Input:**")[-1]
+        lines = re.findall(r"^\s*(\d+)\.\s*(.+)$", body, re.MULTILINE)
+        every = lambda text: "Every" if re.search(r"\b(every|weekly|each)\b", text, re.IGNORECASE) else "on"
+        return "\n".join(f"{number}. {_event_name(text)} {every(text)} {_pick_day(text)}: 9:00 AM - 10:00 AM (1 hour)"
+                         for number, text in lines)
+    if "Time Format Converter" in prompt:
+        text = _user_input(prompt)
+        if STRUCTURED_LINE.match(text):
+            return text
+        return f"{_event_name(text)} on {_pick_day(text)}: 9:00 AM - 10:00 AM (1 hour)"
+    if "You read scheduling requests" in prompt:
+        text = _user_input(prompt)
+        minutes = re.search(r"(\d+)\s*(?:minutes|mins|min)", text)
+        hours = re.search(r"(\d+)\s*(?:hours|hour|hrs|h)\b", text)
+        duration = int(minutes.group(1)) if minutes else int(hours.group(1)) * 60 if hours else 60
+        return json.dumps({"summary": _event_name(text), "duration_minutes": duration})
+    if "extract scheduling goals" in prompt:
+        text = _user_input(prompt)
+        hours = re.search(r"(\d+(?:\.\d+)?)\s*hours?", text)
+        return json.dumps({"summary": _event_name(text), "weekly_hours": float(hours.group(1)) if hours else 3,
+                           "preferred_days": [day for day in DAYS if day.lower() in text.lower()],
+                           "min_chunk_minutes": 30, "max_chunk_minutes": 120})
+    if "suggest 3 available times" in prompt:
+        name = _event_name(re.search(r"User request: '(.*?)'", prompt).group(1)) if "User request:" in prompt else "Event"
+        return (f"a. Have the {name} event at 9:00am this Monday\n"
+                f"b. Have the {name} event at 2:00pm on Wednesday\n"
+                f"c. Have the {name} event at noon on Friday")
+    return "OK"
+
+
+class FakeGenerativeModel:
+    """
+    Args:
+        latency_ms (float): Time until the whole answer is available.
+        jitter_ms (float): Extra random latency, uniform between 0 and jitter_ms.
+        error_rate (float): Chance (0-1) that a call raises FakeGeminiError(error_status).
+        error_status (int): 429 (quota) or 503 (overloaded), for example.
+        responder (callable): prompt -> text; defaults to default_responder.
+        seed (int): Seed for jitter and errors, for repeatable runs.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 responder=default_responder, seed: int = None, error_status: int = 503):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.responder = responder
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _delay(self) -> float:
+        with self._lock:
+            self.calls += 1
+            if self.error_rate and self._random.random() < self.error_rate:
+                raise FakeGeminiError(self.error_status)
+            jitter = self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+        return (self.latency_ms + jitter) / 1000
+
+    @staticmethod
+    def _chunks(text: str) -> list:
+        return [text[i:i + STREAM_CHUNK_SIZE] for i in range(0, len(text), STREAM_CHUNK_SIZE)] or [""]
+
+    def _chunk_delay(self) -> float:
+        # Streamed chunks arrive a quarter of the full latency apart, so the first one comes early.
+        return self.latency_ms / 1000 / 4
+
+    def generate_content(self, prompt, stream: bool = False):
+        delay = self._delay()
+        text = self.responder(str(prompt))
+        if not stream:
+            time.sleep(delay)
+            return FakeResponse(text)
+
+        def chunks():
+            for chunk in self._chunks(text):
+                time.sleep(self._chunk_delay())
+                yield FakeResponse(chunk)
+        return chunks()
+
+    async def generate_content_async(self, prompt, stream: bool = False):
+        delay = self._delay()
+        text = self.responder(str(prompt))
+        if not stream:
+            await asyncio.sleep(delay)
+            return FakeResponse(text)
+        return _AsyncChunks(self, text)
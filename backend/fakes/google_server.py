@@ -0,0 +1,443 @@
+# Purpose: In-process stand-in for Google Calendar v3 and Google Tasks v1.
+# A small threaded HTTP server that speaks the same REST (and multipart batch) protocol
+# googleapiclient uses, keeps everything in memory and can add latency and errors, so
+# CalendarManager / TaskManager / app.py can be load tested without touching Google.
+#
+# Point the real clients at it with GOOGLE_API_ROOT (see services/google_services.py):
+#     server = FakeGoogleServer(latency_ms=40, jitter_ms=20, error_rate=0.01).start()
+#     os.environ["GOOGLE_API_ROOT"] = server.url
+#
+# Supported: events insert/get/list/patch/delete (syncToken, pageToken, timeMin/timeMax),
+# freebusy.query, settings.get, calendarList.list, tasklists.list,
+# tasks insert/get/list/patch/delete (updatedMin) and batch requests for both APIs.
+# Recurring events are stored as single events (no instance expansion).
+import email.parser
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+from services.free_slots import to_timestamp
+
+DEFAULT_TIME_ZONE = "America/Chicago"
+DEFAULT_PAGE_SIZE = {"events": 250, "tasks": 20}
+MAX_PAGE_SIZE = {"events": 2500, "tasks": 100}
+
+
+class FakeApiError(Exception):
+    """An error response in Google's JSON error format."""
+
+    def __init__(self, status: int, message: str, reason: str = "backendError"):
+        super().__init__(message)
+        self.status = status
+        self.body = {"error": {"code": status, "message": message,
+                               "errors": [{"domain": "global", "reason": reason, "message": message}]}}
+
+
+def _now_rfc3339() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _format_utc(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _event_range(event: dict):
+    """(start, end) timestamps of a timed or all-day event, or None."""
+    start, end = event.get("start", {}), event.get("end", {})
+    try:
+        if start.get("dateTime") and end.get("dateTime"):
+            return to_timestamp(start["dateTime"]), to_timestamp(end["dateTime"])
+        if start.get("date") and end.get("date"):
+            return to_timestamp(start["date"] + "T00:00:00Z"), to_timestamp(end["date"] + "T00:00:00Z")
+    except ValueError:
+        return None
+    return None
+
+
+def _page(items: list, query: dict, kind: str):
+    """Slices items for pageToken/maxResults; returns (page, next_page_token or None)."""
+    offset = int(query.get("pageToken") or 0)
+    size = min(int(query.get("maxResults") or DEFAULT_PAGE_SIZE[kind]), MAX_PAGE_SIZE[kind])
+    page = items[offset:offset + size]
+    return page, (str(offset + size) if offset + size < len(items) else None)
+
+
+class FakeGoogleState:
+    """
+    The in-memory calendars and task lists behind the server.
+    add_event / add_task can be used directly to seed data before a run.
+    """
+
+    def __init__(self, time_zone: str = DEFAULT_TIME_ZONE):
+        self.time_zone = time_zone
+        self.lock = threading.Lock()
+        self.events = {}        # calendar id -> {event id: event}
+        self.tasks = {}         # task list id -> {task id: task}
+        self.sequence = itertools.count(1)
+        self.last_sequence = 0
+        self.calls = Counter()  # operation name -> count
+
+    def _touch(self, resource: dict) -> dict:
+        self.last_sequence = next(self.sequence)
+        resource["_seq"] = self.last_sequence
+        resource["etag"] = f'"{self.last_sequence}"'
+        resource["updated"] = _now_rfc3339()
+        return resource
+
+    @staticmethod
+    def public(resource: dict) -> dict:
+        return {key: value for key, value in resource.items() if not key.startswith("_")}
+
+    @staticmethod
+    def _calendar(calendar_id: str) -> str:
+        return "primary" if calendar_id in ("primary", "me") else calendar_id
+
+    # --- Calendar ---
+
+    def add_event(self, calendar_id: str, body: dict) -> dict:
+        with self.lock:
+            event = dict(body)
+            event.setdefault("id", uuid.uuid4().hex)
+            if event["id"] in self.events.get(self._calendar(calendar_id), {}):
+                # Like Calendar, a client-chosen id can only be inserted once.
+                raise FakeApiError(409, "The requested identifier already exists.", "duplicate")
+            event.setdefault("status", "confirmed")
+            event["kind"] = "calendar#event"
+            event["htmlLink"] = f"https://calendar.fake/event?eid={event['id']}"
+            event["created"] = _now_rfc3339()
+            self.events.setdefault(self._calendar(calendar_id), {})[event["id"]] = self._touch(event)
+            return self.public(event)
+
+    def get_event(self, calendar_id: str, event_id: str) -> dict:
+        with self.lock:
+            event = self.events.get(self._calendar(calendar_id), {}).get(event_id)
+            if event is None:
+                raise FakeApiError(404, "Not Found", "notFound")
+            return self.public(event)
+
+    def patch_event(self, calendar_id: str, event_id: str, body: dict) -> dict:
+        with self.lock:
+            event = self.events.get(self._calendar(calendar_id), {}).get(event_id)
+            if event is None or event.get("status") == "cancelled":
+                raise FakeApiError(404, "Not Found", "notFound")
+            event.update({key: value for key, value in body.items() if key != "id"})
+            return self.public(self._touch(event))
+
+    def delete_event(self, calendar_id: str, event_id: str):
+        with self.lock:
+            event = self.events.get(self._calendar(calendar_id), {}).get(event_id)
+            if event is None:
+                raise FakeApiError(404, "Not Found", "notFound")
+            if event.get("status") == "cancelled":
+                raise FakeApiError(410, "Resource has been deleted", "deleted")
+            # Kept as a tombstone so sync tokens report the deletion.
+            event["status"] = "cancelled"
+            self._touch(event)
+
+    def list_events(self, calendar_id: str, query: dict) -> dict:
+        with self.lock:
+            events = list(self.events.get(self._calendar(calendar_id), {}).values())
+            sync_token = query.get("syncToken")
+            if sync_token:
+                match = re.fullmatch(r"sync-(\d+)", sync_token)
+                if not match or int(match.group(1)) > self.last_sequence:
+                    raise FakeApiError(410, "Sync token is no longer valid, a full sync is required.", "fullSyncRequired")
+                since = int(match.group(1))
+                events = [event for event in events if event["_seq"] > since]
+            else:
+                if query.get("showDeleted") != "true":
+                    events = [event for event in events if event.get("status") != "cancelled"]
+                low = to_timestamp(query["timeMin"]) if query.get("timeMin") else None
+                high = to_timestamp(query["timeMax"]) if query.get("timeMax") else None
+                if low is not None or high is not None:
+                    def overlaps(event):
+                        span = _event_range(event)
+                        return span is not None and (high is None or span[0] < high) and (low is None or span[1] > low)
+                    events = [event for event in events if overlaps(event)]
+            if query.get("orderBy") == "startTime":
+                events.sort(key=lambda event: (_event_range(event) or (0, 0))[0])
+            else:
+                events.sort(key=lambda event: event["_seq"])
+            page, next_page = _page(events, query, "events")
+            response = {"kind": "calendar#events", "timeZone": self.time_zone,
+                        "items": [self.public(event) for event in page]}
+            if next_page:
+                response["nextPageToken"] = next_page
+            else:
+                response["nextSyncToken"] = f"sync-{self.last_sequence}"
+            return response
+
+    def free_busy(self, body: dict) -> dict:
+        low, high = to_timestamp(body["timeMin"]), to_timestamp(body["timeMax"])
+        calendars = {}
+        with self.lock:
+            for item in body.get("items", []):
+                busy = []
+                for event in self.events.get(self._calendar(item["id"]), {}).values():
+                    if event.get("status") == "cancelled" or event.get("transparency") == "transparent":
+                        continue
+                    span = _event_range(event)
+                    if span and span[0] < high and span[1] > low:
+                        busy.append((max(span[0], low), min(span[1], high)))
+                busy.sort()
+                calendars[item["id"]] = {"busy": [{"start": _format_utc(start), "end": _format_utc(end)}
+                                                  for start, end in busy]}
+        return {"kind": "calendar#freeBusy", "timeMin": body["timeMin"], "timeMax": body["timeMax"],
+                "calendars": calendars}
+
+    # --- Tasks ---
+
+    @staticmethod
+    def _tasklist(tasklist: str) -> str:
+        return "@default" if tasklist in ("@default", "default") else tasklist
+
+    def add_task(self, tasklist: str, body: dict) -> dict:
+        with self.lock:
+            task = dict(body)
+            task.setdefault("id", uuid.uuid4().hex[:22])
+            task.setdefault("status", "needsAction")
+            task["kind"] = "tasks#task"
+            self.tasks.setdefault(self._tasklist(tasklist), {})[task["id"]] = self._touch(task)
+            return self.public(task)
+
+    def get_task(self, tasklist: str, task_id: str) -> dict:
+        with self.lock:
+            task = self.tasks.get(self._tasklist(tasklist), {}).get(task_id)
+            if task is None:
+                raise FakeApiError(404, "Not Found", "notFound")
+            return self.public(task)
+
+    def patch_task(self, tasklist: str, task_id: str, body: dict) -> dict:
+        with self.lock:
+            task = self.tasks.get(self._tasklist(tasklist), {}).get(task_id)
+            if task is None or task.get("deleted"):
+                raise FakeApiError(404, "Not Found", "notFound")
+            task.update({key: value for key, value in body.items() if key != "id"})
+            if body.get("status") == "completed":
+                task.setdefault("completed", _now_rfc3339())
+            return self.public(self._touch(task))
+
+    def delete_task(self, tasklist: str, task_id: str):
+        with self.lock:
+            task = self.tasks.get(self._tasklist(tasklist), {}).get(task_id)
+            if task is None or task.get("deleted"):
+                raise FakeApiError(404, "Not Found", "notFound")
+            task["deleted"] = True
+            self._touch(task)
+
+    def list_tasks(self, tasklist: str, query: dict) -> dict:
+        with self.lock:
+            tasks = sorted(self.tasks.get(self._tasklist(tasklist), {}).values(), key=lambda task: task["_seq"])
+            if query.get("showDeleted") != "true":
+                tasks = [task for task in tasks if not task.get("deleted")]
+            if query.get("showCompleted") == "false":
+                tasks = [task for task in tasks if task.get("status") != "completed"]
+            if query.get("updatedMin"):
+                updated_min = to_timestamp(query["updatedMin"])
+                tasks = [task for task in tasks if to_timestamp(task["updated"]) >= updated_min]
+            page, next_page = _page(tasks, query, "tasks")
+            response = {"kind": "tasks#tasks", "etag": f'"{self.last_sequence}"',
+                        "items": [self.public(task) for task in page]}
+            if next_page:
+                response["nextPageToken"] = next_page
+            return response
+
+
+class FakeGoogleServer:
+    """
+    Threaded HTTP server serving FakeGoogleState.
+
+    Args:
+        host (str): Interface to bind.
+        port (int): Port to bind (0 picks a free one).
+        latency_ms (float): Added to every HTTP request (a batch counts once).
+        jitter_ms (float): Extra random latency, uniform between 0 and jitter_ms.
+        error_rate (float): Chance (0-1) that an operation fails with error_status;
+                            inside a batch, every part rolls separately.
+        error_status (int): 503 (backendError) or 429 (rateLimitExceeded), for example.
+        seed (int): Seed for latency and error randomness, for repeatable runs.
+        time_zone (str): The calendars' timeZone.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 503, seed: int = None,
+                 time_zone: str = DEFAULT_TIME_ZONE):
+        self.state = FakeGoogleState(time_zone)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        """Serves on a background thread; returns self."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-google", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # --- Behaviour ---
+
+    def _delay(self):
+        with self._random_lock:
+            delay = self.latency_ms + (self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def _maybe_fail(self):
+        if self.error_rate <= 0:
+            return
+        with self._random_lock:
+            failed = self._random.random() < self.error_rate
+        if failed:
+            reason = "rateLimitExceeded" if self.error_status == 429 else "backendError"
+            raise FakeApiError(self.error_status, f"Injected {self.error_status}", reason)
+
+    def dispatch(self, method: str, target: str, body: bytes):
+        """Runs one API operation; returns (status, json body or None)."""
+        parts = urlsplit(target)
+        path = unquote(parts.path).lstrip("/")
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        payload = json.loads(body) if body else {}
+        state = self.state
+        try:
+            for operation, verb, pattern, handler in ROUTES:
+                match = re.fullmatch(pattern, path)
+                if match and verb == method:
+                    state.calls[operation] += 1
+                    self._maybe_fail()
+                    result = handler(state, *match.groups(), query=query, body=payload)
+                    return (204, None) if result is None else (200, result)
+            raise FakeApiError(404, f"No fake for {method} /{path}", "notFound")
+        except FakeApiError as error:
+            return error.status, error.body
+
+    def dispatch_batch(self, content_type: str, body: bytes) -> tuple:
+        """Runs every part of a multipart/mixed batch; returns (content_type, body)."""
+        self.state.calls["batch"] += 1
+        message = email.parser.Parser().parsestr(f"Content-Type: {content_type}\r\n\r\n" + body.decode("utf-8"))
+        boundary = "batch_" + uuid.uuid4().hex
+        chunks = []
+        for part in message.get_payload():
+            request_text = part.get_payload()
+            head, _, request_body = request_text.partition("\r\n\r\n") if "\r\n\r\n" in request_text \
+                else request_text.partition("\n\n")
+            request_line = head.splitlines()[0]
+            method, target, _ = request_line.split(" ", 2)
+            status, result = self.dispatch(method, target, request_body.strip().encode("utf-8"))
+            reason = {200: "OK", 204: "No Content"}.get(status, "Error")
+            response = f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json; charset=UTF-8\r\n\r\n"
+            if result is not None:
+                response += json.dumps(result)
+            # Long Content-IDs arrive folded over two lines; echo them back on one.
+            content_id = re.sub(r"\r?\n[ \t]+", " ", part.get("Content-ID", "<>"))
+            chunks.append(f"--{boundary}\r\nContent-Type: application/http\r\n"
+                          f"Content-ID: <response-{content_id[1:-1]}>\r\n\r\n{response}\r\n")
+        chunks.append(f"--{boundary}--\r\n")
+        return f"multipart/mixed; boundary={boundary}", "".join(chunks).encode("utf-8")
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like Google's front ends
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                server._delay()
+                path = urlsplit(self.path).path.lstrip("/")
+                if self.command == "POST" and path in ("batch", "batch/calendar/v3", "batch/tasks/v1"):
+                    content_type, payload = server.dispatch_batch(self.headers.get("Content-Type", ""), body)
+                    status = 200
+                else:
+                    status, result = server.dispatch(self.command, self.path, body)
+                    content_type = "application/json; charset=UTF-8"
+                    payload = json.dumps(result).encode("utf-8") if result is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _handle
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def _settings(state, setting, query, body):
+    if setting != "timezone":
+        raise FakeApiError(404, "Not Found", "notFound")
+    return {"kind": "calendar#setting", "id": "timezone", "value": state.time_zone}
+
+
+def _calendar_list(state, query, body):
+    calendar_ids = sorted(set(state.events) | {"primary"})
+    return {"kind": "calendar#calendarList",
+            "items": [{"id": calendar_id, "summary": calendar_id, "timeZone": state.time_zone,
+                       "primary": calendar_id == "primary"} for calendar_id in calendar_ids]}
+
+
+def _task_lists(state, query, body):
+    list_ids = sorted(set(state.tasks) | {"@default"})
+    return {"kind": "tasks#taskLists",
+            "items": [{"id": list_id, "title": "My Tasks" if list_id == "@default" else list_id}
+                      for list_id in list_ids]}
+
+
+# (operation name, HTTP method, path pattern, handler(state, *path_groups, query, body))
+ROUTES = [
+    ("events.list", "GET", r"calendar/v3/calendars/([^/]+)/events",
+     lambda state, calendar_id, query, body: state.list_events(calendar_id, query)),
+    ("events.insert", "POST", r"calendar/v3/calendars/([^/]+)/events",
+     lambda state, calendar_id, query, body: state.add_event(calendar_id, body)),
+    ("events.get", "GET", r"calendar/v3/calendars/([^/]+)/events/([^/]+)",
+     lambda state, calendar_id, event_id, query, body: state.get_event(calendar_id, event_id)),
+    ("events.patch", "PATCH", r"calendar/v3/calendars/([^/]+)/events/([^/]+)",
+     lambda state, calendar_id, event_id, query, body: state.patch_event(calendar_id, event_id, body)),
+    ("events.delete", "DELETE", r"calendar/v3/calendars/([^/]+)/events/([^/]+)",
+     lambda state, calendar_id, event_id, query, body: state.delete_event(calendar_id, event_id)),
+    ("freebusy.query", "POST", r"calendar/v3/freeBusy",
+     lambda state, query, body: state.free_busy(body)),
+    ("settings.get", "GET", r"calendar/v3/users/me/settings/([^/]+)", _settings),
+    ("calendarList.list", "GET", r"calendar/v3/users/me/calendarList", _calendar_list),
+    ("tasklists.list", "GET", r"tasks/v1/users/@me/lists", _task_lists),
+    ("tasks.list", "GET", r"tasks/v1/lists/([^/]+)/tasks",
+     lambda state, tasklist, query, body: state.list_tasks(tasklist, query)),
+    ("tasks.insert", "POST", r"tasks/v1/lists/([^/]+)/tasks",
+     lambda state, tasklist, query, body: state.add_task(tasklist, body)),
+    ("tasks.get", "GET", r"tasks/v1/lists/([^/]+)/tasks/([^/]+)",
+     lambda state, tasklist, task_id, query, body: state.get_task(tasklist, task_id)),
+    ("tasks.patch", "PATCH", r"tasks/v1/lists/([^/]+)/tasks/([^/]+)",
+     lambda state, tasklist, task_id, query, body: state.patch_task(tasklist, task_id, body)),
+    ("tasks.delete", "DELETE", r"tasks/v1/lists/([^/]+)/tasks/([^/]+)",
+     lambda state, tasklist, task_id, query, body: state.delete_task(tasklist, task_id)),
+]
@@ -0,0 +1,129 @@
+# Purpose: Runs the API against the local fakes, with no Google account or Gemini key.
+# Run from the backend folder:
+#     python -m fakes.serve --app flask --port 8000 --google-latency-ms 80 --gemini-latency-ms 600
+#     python -m fakes.serve --app async --port 8000 --google-error-rate 0.02
+# Calendar/Tasks calls go to a FakeGoogleServer (through GOOGLE_API_ROOT) and Gemini calls to a
+# FakeGenerativeModel, so load tests measure the server itself plus the latency chosen here.
+# Queued jobs go to a throwaway database (unless JOB_QUEUE_PATH is set), never the real one.
+#     python -m fakes.serve --seed-events 2000 --seed-ids-out ids.json
+# puts 2000 events straight into the fake calendar before serving and writes their ids out.
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from fakes.gemini import FakeGenerativeModel
+from fakes.google_server import FakeGoogleServer
+from services.google_services import GOOGLE_API_ROOT_ENV
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the AI Scheduler API against fake Google and Gemini backends.")
+    parser.add_argument("--app", choices=["flask", "async"], default="flask",
+                        help="Essentials/app.py (threaded Flask) or Essentials/async_app.py (Quart on hypercorn)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--google-port", type=int, default=0, help="port of the fake Google server (0 = any free one)")
+    parser.add_argument("--google-latency-ms", type=float, default=0.0)
+    parser.add_argument("--google-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--google-error-rate", type=float, default=0.0)
+    parser.add_argument("--google-error-status", type=int, default=503)
+    parser.add_argument("--gemini-latency-ms", type=float, default=0.0)
+    parser.add_argument("--gemini-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--seed-events", type=int, default=0, help="events to put in the fake calendar up front")
+    parser.add_argument("--seed-ids-out", help="write the seeded event ids here (JSON list)")
+    return parser.parse_args(argv)
+
+
+def seed_events(state, count: int) -> list:
+    """
+    Puts `count` half-hour events, an hour apart and a month from now, straight into the fake
+    calendar (no HTTP round trips). Returns their ids.
+    """
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=30)
+    ids = []
+    for i in range(count):
+        event_start = start + timedelta(hours=i)
+        ids.append(state.add_event("primary", {
+            "summary": f"Load test event {i}",
+            "start": {"dateTime": event_start.isoformat(), "timeZone": "America/Chicago"},
+            "end": {"dateTime": (event_start + timedelta(minutes=30)).isoformat(), "timeZone": "America/Chicago"},
+        })["id"])
+    return ids
+
+
+def load_app(name: str, model):
+    """
+    Imports the app module with the fakes wired in.
+
+    Args:
+        name (str): "flask" or "async".
+        model: The GenerativeModel stand-in handed to the app's GeminiParser.
+
+    Returns:
+        module: Essentials.app or Essentials.async_app.
+    """
+    from services.gemini_parser import GeminiParser
+    from services.lazy import LazyInstance
+    if name == "async":
+        from Essentials import async_app as module
+    else:
+        from Essentials import app as module
+    module.gem = LazyInstance(GeminiParser, model=model)
+    return module
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    google = FakeGoogleServer(port=args.google_port, latency_ms=args.google_latency_ms,
+                              jitter_ms=args.google_jitter_ms, error_rate=args.google_error_rate,
+                              error_status=args.google_error_status, seed=args.seed).start()
+    event_ids = seed_events(google.state, args.seed_events)
+    if args.seed_ids_out:
+        with open(args.seed_ids_out, "w") as ids_file:
+            json.dump(event_ids, ids_file)
+    # Must be set before the app builds its first Google client.
+    os.environ[GOOGLE_API_ROOT_ENV] = google.url
+    # Fake answers must never land in the on-disk Gemini cache the real server reads.
+    os.environ["GEMINI_CACHE_PATH"] = ""
+    # Nor may fake jobs end up in (or be picked up from) the real job queue.
+    job_dir = None
+    if not os.getenv("JOB_QUEUE_PATH"):
+        job_dir = tempfile.mkdtemp(prefix="fake-jobs-")
+        os.environ["JOB_QUEUE_PATH"] = os.path.join(job_dir, "jobs.sqlite3")
+    # The fakes have no quota; unless set explicitly, don't let the per-user client-side limits
+    # (services/rate_limiter.py) cap a load test that stands in for many users.
+    for api in ("CALENDAR", "TASKS", "GEMINI"):
+        os.environ.setdefault(f"RATE_LIMIT_{api}_PER_SECOND", "100000")
+        os.environ.setdefault(f"RATE_LIMIT_{api}_BURST", "100000")
+    model = FakeGenerativeModel(latency_ms=args.gemini_latency_ms, jitter_ms=args.gemini_jitter_ms,
+                                error_rate=args.gemini_error_rate, seed=args.seed)
+    module = load_app(args.app, model)
+    print(f"[FAKES] Google API at {google.url}, serving {args.app} app on http://{args.host}:{args.port}/")
+    try:
+        if args.app == "async":
+            import asyncio
+            from hypercorn.asyncio import serve
+            from hypercorn.config import Config
+            config = Config()
+            config.bind = [f"{args.host}:{args.port}"]
+            config.accesslog = None
+            asyncio.run(serve(module.app, config))
+        else:
+            module.app.run(host=args.host, port=args.port, threaded=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        google.stop()
+        if job_dir is not None:
+            shutil.rmtree(job_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
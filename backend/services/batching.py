@@ -0,0 +1,166 @@
+# Purpose: Batched execution of Google API calls.
+# Wraps googleapiclient's BatchHttpRequest so many small calls (tasks().get, events().delete,
+# events().insert, ...) travel together, up to 50 per HTTP round trip, instead of one by one.
+# Every call keeps its own callback and its own result or error.
+import time
+from googleapiclient.errors import HttpError
+from services.metrics import timed, GOOGLE_LATENCY, GOOGLE_REQUESTS
+from services.rate_limiter import (call_with_retry, backoff_delay, get_bucket, is_rate_limited,
+                                   is_idempotent_request, MAX_RETRIES)
+
+# Google recommends at most 50 calls per batch for Calendar and Tasks.
+MAX_BATCH_SIZE = 50
+
+
+class BatchItemError(Exception):
+    """
+    Error of a single call inside a batch.
+
+    Attributes:
+        request_id (str): The id the call was added with.
+        status (int | None): HTTP status code (None for non-HTTP failures).
+        reason (str): Short description of the failure.
+    """
+
+    def __init__(self, request_id, status, reason, cause=None):
+        super().__init__(f"{request_id}: {status} {reason}")
+        self.request_id = request_id
+        self.status = status
+        self.reason = reason
+        self.cause = cause
+
+    @property
+    def not_found(self) -> bool:
+        """404 or 410: the task/event is already gone."""
+        return self.status in (404, 410)
+
+    @property
+    def rate_limited(self) -> bool:
+        """429 or a rate-limit 403: the call was turned away without running."""
+        return self.status == 429 or (self.cause is not None and is_rate_limited(self.cause))
+
+    @property
+    def retryable(self) -> bool:
+        """Rate limits and server errors are worth another try (see BatchExecutor for inserts)."""
+        return self.rate_limited or (self.status is not None and self.status >= 500)
+
+
+def map_error(request_id, exception) -> BatchItemError:
+    """Turns the exception googleapiclient hands to a batch callback into a BatchItemError."""
+    if isinstance(exception, HttpError):
+        reason = exception._get_reason() if hasattr(exception, "_get_reason") else str(exception)
+        return BatchItemError(request_id, exception.resp.status, reason, exception)
+    return BatchItemError(request_id, None, str(exception), exception)
+
+
+class BatchExecutor:
+    """
+    Collects API requests and executes them in batches of up to MAX_BATCH_SIZE.
+
+    Usage:
+        batch = BatchExecutor(tasks_service)
+        for task_id in task_ids:
+            batch.add(tasks_service.tasks().get(tasklist=list_id, task=task_id), request_id=task_id)
+        results = batch.execute()   # {task_id: (response, BatchItemError | None)}
+
+    Args:
+        service: The googleapiclient Resource the requests were built from. All requests in
+                 one executor must belong to the same API (batch endpoints are per API).
+        batch_size (int): Calls per HTTP round trip.
+    """
+
+    def __init__(self, service, batch_size: int = MAX_BATCH_SIZE):
+        self.service = service
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self._pending = []  # (request_id, request, callback)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, request, request_id=None, callback=None):
+        """
+        Queues a request.
+
+        Args:
+            request: An HttpRequest, e.g. service.events().delete(calendarId=..., eventId=...).
+            request_id: Key for this call in the results (defaults to its position).
+            callback (callable): Optional callback(request_id, response, error) called as soon
+                                 as this call's result is known; error is a BatchItemError or None.
+        """
+        if request_id is None:
+            request_id = str(len(self._pending))
+        self._pending.append((str(request_id), request, callback))
+        return request_id
+
+    def execute(self) -> dict:
+        """
+        Sends every queued request and returns {request_id: (response, error)}.
+        Batches go through the API's rate limiter (one token per call inside) and calls that
+        fail with a rate-limit or server error are sent again in a later batch, with backoff.
+        A failed HTTP round trip marks every call of that batch as failed; other batches still run.
+        Calls that must not run twice (inserts without a client-chosen id) are only sent again
+        after a rate-limit error, since a server error does not tell whether they ran.
+        """
+        results = {}
+        pending, self._pending = self._pending, []
+        for offset in range(0, len(pending), self.batch_size):
+            chunk = pending[offset:offset + self.batch_size]
+            self._send_with_retries(chunk, results)
+            # Callbacks only see each call's final outcome.
+            for request_id, _, callback in chunk:
+                if callback is not None:
+                    callback(request_id, *results[request_id])
+        return results
+
+    def _send_with_retries(self, chunk, results):
+        api = chunk[0][1].methodId.split(".")[0]
+        quota_user = getattr(chunk[0][1], "quota_user", "default")
+        attempt = 0
+        while True:
+            def on_response(request_id, response, exception):
+                error = map_error(request_id, exception) if exception is not None else None
+                results[request_id] = (response, error)
+
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for request_id, request, _ in chunk:
+                batch.add(request, request_id=request_id)
+            try:
+                call_with_retry(lambda: _send(batch), api, quota_user, tokens=len(chunk),
+                                idempotent=all(is_idempotent_request(request) for _, request, _ in chunk))
+            except Exception as e:
+                for request_id, _, _ in chunk:
+                    if request_id not in results:
+                        on_response(request_id, None, e)
+            retry = [item for item in chunk if _should_retry(item[1], results[item[0]][1])]
+            if not retry or attempt >= MAX_RETRIES:
+                return
+            delay = max(backoff_delay(attempt, results[item[0]][1].cause) for item in retry)
+            if any(results[item[0]][1].status in (403, 429) for item in retry):
+                get_bucket(api, quota_user).pause(delay)
+            print(f"[RATE_LIMIT] {len(retry)} batched {api} calls failed, retry {attempt + 1} in {delay:.2f}s")
+            time.sleep(delay)
+            chunk = retry
+            attempt += 1
+
+
+def _should_retry(request, error) -> bool:
+    if error is None or not error.retryable:
+        return False
+    return error.rate_limited or is_idempotent_request(request)
+
+
+@timed(GOOGLE_LATENCY, GOOGLE_REQUESTS, labels=("batch",))
+def _send(batch):
+    """One batch HTTP round trip (the calls inside it are not timed separately)."""
+    batch.execute()
+
+
+def execute_in_batches(service, requests, batch_size: int = MAX_BATCH_SIZE) -> dict:
+    """
+    Shortcut for executing {request_id: request} in batches.
+    Returns {request_id: (response, BatchItemError | None)}.
+    """
+    executor = BatchExecutor(service, batch_size)
+    for request_id, request in requests.items():
+        executor.add(request, request_id=request_id)
+    return executor.execute()
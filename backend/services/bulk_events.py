@@ -0,0 +1,111 @@
+# Purpose: Bookkeeping for creating many events from free text in one go (/create_events_batch).
+# Inputs the rule-based parser understands are turned into events directly, all the other
+# inputs are sent to Gemini together in ONE prompt, and every resulting event is inserted
+# through one batched Calendar request. This class keeps track of which event came from
+# which input so the endpoint can report a result per input.
+from services.fast_parser import parse_event_text, FAST_PATH_MIN_CONFIDENCE
+
+# Keeps a single request (and its Gemini prompt) to a reasonable size.
+MAX_BATCH_INPUTS = 200
+
+
+def split_inputs(data: dict) -> list:
+    """
+    Reads the inputs of a /create_events_batch body: either "inputs" (a list of strings)
+    or "input" (a pasted multi-line schedule, one event per line).
+    """
+    if isinstance(data.get("inputs"), list):
+        inputs = [str(text) for text in data["inputs"]]
+    else:
+        inputs = str(data.get("input", "")).splitlines()
+    inputs = [text.strip() for text in inputs if text.strip()]
+    if len(inputs) > MAX_BATCH_INPUTS:
+        raise ValueError(f"At most {MAX_BATCH_INPUTS} inputs per request, got {len(inputs)}")
+    return inputs
+
+
+class BulkEventRequest:
+    """
+    Usage:
+        bulk = BulkEventRequest(inputs)
+        bulk.apply_structured_lines(gem.parse_event_details_batch(bulk.pending_inputs), gem)
+        results = bulk.results(cal.add_events_batch(bulk.event_bodies()))
+
+    Args:
+        inputs (list[str]): Free-text event descriptions.
+    """
+
+    def __init__(self, inputs: list):
+        self.items = []
+        for index, text in enumerate(inputs):
+            event, confidence = parse_event_text(text)
+            confident = event is not None and confidence >= FAST_PATH_MIN_CONFIDENCE
+            self.items.append({
+                "index": index,
+                "input": text,
+                "parser": "rules" if confident else "gemini",
+                "lines": [],
+                "events": [event] if confident else [],
+            })
+        self._pending = [item for item in self.items if not item["events"]]
+
+    @property
+    def pending_inputs(self) -> list:
+        """The inputs the rules could not parse, in the order Gemini should see them."""
+        return [item["input"] for item in self._pending]
+
+    def apply_structured_lines(self, lines_per_input: list, parser):
+        """
+        Adds the events of the Gemini answer.
+
+        Args:
+            lines_per_input (list[list[str]]): parse_event_details_batch's result for pending_inputs.
+            parser (GeminiParser): Used for its parse_event_lines.
+        """
+        for item, lines in zip(self._pending, lines_per_input):
+            item["lines"] = lines
+            item["events"] = [event for event in parser.parse_event_lines(lines) if event]
+
+    def event_bodies(self) -> list:
+        """Every event to insert, in input order."""
+        return [event for item in self.items for event in item["events"]]
+
+    def results(self, insert_results: list) -> list:
+        """
+        Per-input results.
+
+        Args:
+            insert_results (list[tuple]): CalendarManager.add_events_batch's (event, error)
+                                          pairs, one per event_bodies() entry.
+
+        Returns:
+            list[dict]: {"index", "input", "parser", "status", "events", "errors"} per input;
+                        status is "created", "partial", "failed" or "unparsed".
+        """
+        results = []
+        position = 0
+        for item in self.items:
+            created, errors = [], []
+            for event in item["events"]:
+                response, error = insert_results[position]
+                position += 1
+                if error is None and response is not None:
+                    created.append({"id": response.get("id"), "htmlLink": response.get("htmlLink"),
+                                    "summary": event.get("summary"), "start": event.get("start")})
+                else:
+                    errors.append(str(error) if error is not None else "No response")
+            if not item["events"]:
+                status = "unparsed"
+            elif not errors:
+                status = "created"
+            else:
+                status = "partial" if created else "failed"
+            results.append({
+                "index": item["index"],
+                "input": item["input"],
+                "parser": item["parser"],
+                "status": status,
+                "events": created,
+                "errors": errors,
+            })
+        return results
@@ -0,0 +1,183 @@
+# Purpose: Local, incrementally synced busy-interval cache for one calendar.
+# The first call lists the events from a day ago onwards once (older ones never matter for
+# finding free time); after that only the changes since the last nextSyncToken are fetched
+# with events().list(syncToken=...), and Google keeps applying the first call's window. Free/busy questions are
+# answered from memory in the same shape freebusy().query returns:
+#     {'busy': [{'start': '2025-09-02T13:00:00Z', 'end': '2025-09-02T14:00:00Z'}, ...]}
+import threading
+import time
+from datetime import datetime, timezone
+import pytz
+from googleapiclient.errors import HttpError
+from services.free_slots import merge_intervals, to_timestamp
+from services.metrics import record_cache
+
+# Seconds between two delta syncs. Inside this window queries never touch the network.
+DEFAULT_SYNC_INTERVAL = 60
+# How far back the full sync lists events. A query starting earlier than that widens the
+# window and triggers a new full sync.
+DEFAULT_HISTORY_SECONDS = 24 * 60 * 60
+
+
+def _format_utc(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class CalendarBusyCache:
+    """
+    Keeps the busy intervals of one calendar in memory and in step with Google Calendar.
+
+    Args:
+        service_getter (callable): Returns an authorized Calendar service (so pooled,
+                                   per-thread services can be used).
+        calendar_id (str): The calendar to mirror.
+        sync_interval (float): Minimum seconds between delta syncs.
+        history_seconds (float): How far before now the full sync starts listing events.
+    """
+
+    def __init__(self, service_getter, calendar_id: str = 'primary', sync_interval: float = DEFAULT_SYNC_INTERVAL,
+                 history_seconds: float = DEFAULT_HISTORY_SECONDS):
+        self._service_getter = service_getter
+        self.calendar_id = calendar_id
+        self.sync_interval = sync_interval
+        self.history_seconds = history_seconds
+        self._window_start = None  # timeMin of the last full sync
+        self._earliest_query = None  # earliest range start asked for before that window
+        self._events = {}          # event id -> (start_ts, end_ts)
+        self._merged = None        # sorted, merged intervals, rebuilt lazily
+        self._sync_token = None
+        self._time_zone = 'UTC'
+        self._last_sync = 0.0
+        self._lock = threading.Lock()
+        self.api_calls = 0
+
+    def get_busy(self, time_min: str, time_max: str) -> dict:
+        """
+        Returns the busy intervals overlapping [time_min, time_max], clipped to the range,
+        in the freebusy().query format.
+        """
+        range_start = to_timestamp(time_min)
+        range_end = to_timestamp(time_max)
+        with self._lock:
+            if self._window_start is not None and range_start < self._window_start:
+                # Older than anything the full sync listed: list again from further back.
+                self._earliest_query = range_start
+                self._events.clear()
+                self._merged = None
+                self._sync_token = None
+            stale = self._sync_token is None or time.monotonic() - self._last_sync >= self.sync_interval
+            # A hit is a query answered from memory, without a sync round trip.
+            record_cache("busy_intervals", not stale)
+            if stale:
+                self._sync()
+            if self._merged is None:
+                self._merged = merge_intervals(self._events.values())
+            merged = self._merged
+
+        # Merged intervals are disjoint, so both starts and ends are sorted.
+        first = self._first_ending_after(merged, range_start)
+        busy = []
+        for start, end in merged[first:]:
+            if start >= range_end:
+                break
+            busy.append({'start': _format_utc(max(start, range_start)), 'end': _format_utc(min(end, range_end))})
+        return {'busy': busy}
+
+    def invalidate(self):
+        """Forces a delta sync on the next query (e.g. right after this app inserted an event)."""
+        with self._lock:
+            self._last_sync = 0.0
+
+    def reset(self):
+        """Drops everything; the next query does a full sync."""
+        with self._lock:
+            self._events.clear()
+            self._merged = None
+            self._sync_token = None
+
+    @staticmethod
+    def _first_ending_after(merged: list, timestamp: float) -> int:
+        """Binary search for the first interval whose end is after timestamp."""
+        low, high = 0, len(merged)
+        while low < high:
+            mid = (low + high) // 2
+            if merged[mid][1] <= timestamp:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def _sync(self):
+        """Full sync when there is no token (or it expired), delta sync otherwise."""
+        try:
+            self._list_pages(self._sync_token)
+        except HttpError as err:
+            # 410 Gone: the sync token is no longer valid, start over with a full sync.
+            if err.resp.status != 410:
+                raise
+            self._events.clear()
+            self._sync_token = None
+            self._list_pages(None)
+        self._merged = None
+        self._last_sync = time.monotonic()
+
+    def _list_pages(self, sync_token):
+        service = self._service_getter()
+        page_token = None
+        while True:
+            params = {
+                'calendarId': self.calendar_id,
+                'singleEvents': True,  # recurring events come back as individual instances
+                'maxResults': 2500,
+                'fields': 'items(id,status,start,end,transparency,attendees(self,responseStatus)),'
+                          'nextPageToken,nextSyncToken,timeZone',
+            }
+            if sync_token:
+                # Not combinable with timeMin; the token keeps the full sync's window.
+                params['syncToken'] = sync_token
+            else:
+                if page_token is None:
+                    self._window_start = time.time() - self.history_seconds
+                    if self._earliest_query is not None:
+                        self._window_start = min(self._window_start, self._earliest_query)
+                params['timeMin'] = _format_utc(self._window_start)
+            if page_token:
+                params['pageToken'] = page_token
+            response = service.events().list(**params).execute()
+            self.api_calls += 1
+
+            self._time_zone = response.get('timeZone', self._time_zone)
+            for event in response.get('items', []):
+                self._apply(event)
+
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                self._sync_token = response.get('nextSyncToken', self._sync_token)
+                return
+
+    def _apply(self, event: dict):
+        """Adds, updates or removes one event, mirroring what freebusy counts as busy."""
+        event_id = event.get('id')
+        interval = self._busy_interval(event)
+        if interval is None:
+            self._events.pop(event_id, None)
+        else:
+            self._events[event_id] = interval
+
+    def _busy_interval(self, event: dict):
+        if event.get('status') == 'cancelled' or event.get('transparency') == 'transparent':
+            return None
+        for attendee in event.get('attendees', []):
+            if attendee.get('self') and attendee.get('responseStatus') == 'declined':
+                return None
+
+        start, end = event.get('start', {}), event.get('end', {})
+        if start.get('dateTime') and end.get('dateTime'):
+            return to_timestamp(start['dateTime']), to_timestamp(end['dateTime'])
+        if start.get('date') and end.get('date'):
+            # All-day events span whole days in the calendar's own timezone.
+            tz = pytz.timezone(self._time_zone)
+            start_day = datetime.fromisoformat(start['date'])
+            end_day = datetime.fromisoformat(end['date'])
+            return tz.localize(start_day).timestamp(), tz.localize(end_day).timestamp()
+        return None
@@ -4,40 +4,71 @@ import datetime as dt
 import os
 from datetime import timezone, timedelta
 from datetime import datetime
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import pytz
 import re
+import threading
+import uuid
+from services.free_slots import find_free_slots, DEFAULT_TIMEZONE, DEFAULT_WORK_START, DEFAULT_WORK_END
+from services.busy_cache import CalendarBusyCache, DEFAULT_SYNC_INTERVAL
+from services.batching import BatchExecutor
+from services.google_services import get_service_pool, SCOPES
+from services.event_stats import calculate_stats, CATEGORY_KEYWORDS
+from services.singleflight import SingleFlight
 
 
 
-# If modifying these scopes, delete the file token.json.z
-# IMPORTANT: Make sure these scopes match what you configured in the Google Cloud Console
-SCOPES = ["https://www.googleapis.com/auth/calendar", 'https://www.googleapis.com/auth/tasks'] # Added freebusy scope
+def new_event_id() -> str:
+    """
+    A client-chosen Calendar event id (base32hex, 32 characters). Inserting an event with an
+    id a second time fails with 409 instead of creating a duplicate, so a retried insert is safe.
+    """
+    return uuid.uuid4().hex
+
+
+# If modifying the scopes (see services/google_services.py), delete the file token.json.
 class CalendarManager:
     def __init__(self):
-        self.service= self.get_calendar_service()
+        # Nothing network-bound happens here: credentials and the Calendar client are
+        # loaded on the first call that needs them (see the service property).
+        # Local busy-interval caches kept current with sync tokens, one per calendar.
+        # Set CALENDAR_BUSY_CACHE=0 to always ask freebusy().query instead.
+        self.use_busy_cache = os.getenv("CALENDAR_BUSY_CACHE", "1") != "0"
+        self.busy_sync_interval = float(os.getenv("CALENDAR_SYNC_INTERVAL", DEFAULT_SYNC_INTERVAL))
+        self.busy_caches = {}
+        self._busy_caches_lock = threading.Lock()
+        self._free_busy_flight = SingleFlight("free_busy")
+
+    @property
+    def service(self):
+        """
+        The Calendar client of the current thread. Clients come from a shared pool, so
+        Flask threads never share an httplib2 connection, while credentials and the
+        discovery document are loaded only once.
+        """
+        return get_service_pool().calendar()
+
     def get_calendar_service(self):
-        creds = None
-        # Check if token.json already exists
-        if os.path.exists("backend/token.json"):
-            creds = Credentials.from_authorized_user_file("backend/token.json", SCOPES)
-        
-        # If no valid credentials or expired, initiate the OAuth flow
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request()) # Refresh token if expired
-            else:
-                # This is the part that triggers the browser for initial authorization
-                flow = InstalledAppFlow.from_client_secrets_file("C:/Users/Temidayo Adeaga/Documents/Work/AI planer/venv/backend/services/credentials.json", SCOPES)
-                creds = flow.run_local_server(port=0) # This opens the browser
-            # Save the new/refreshed credentials to token.json
-            with open("token.json", "w") as token:
-                token.write(creds.to_json())
-        return build("calendar", "v3", credentials=creds)
+        """
+        Returns an authorized Calendar client. Credentials are loaded from token.json
+        (running the OAuth browser flow the first time) by services.google_services.
+        """
+        return get_service_pool().calendar()
+
+    def get_busy_cache(self, calendar_id='primary') -> CalendarBusyCache:
+        """Returns the busy-interval cache of a calendar, creating it on first use."""
+        # Under a lock, so concurrent first requests share one cache (and one full sync).
+        with self._busy_caches_lock:
+            if calendar_id not in self.busy_caches:
+                # The cache fetches the client per call, so syncs use the current thread's connection.
+                self.busy_caches[calendar_id] = CalendarBusyCache(lambda: self.service, calendar_id,
+                                                                  self.busy_sync_interval)
+            return self.busy_caches[calendar_id]
+
+    def _invalidate_busy_cache(self, calendar_id):
+        cache = self.busy_caches.get(calendar_id)
+        if cache is not None:
+            cache.invalidate()
 
     # ... rest of your calendar_manager.py functions
     # You might also want functions to list events for testing purposes
@@ -62,6 +93,8 @@ class CalendarManager:
     def add_event(self,event_body):
         """
         Adds an event to the specified Google Calendar.
+        When event_body carries an id (see new_event_id) and that event already exists, the
+        insert already happened earlier (a retried job) and the existing event is returned.
         Returns:
             dict: The created event resource if successful, None otherwise.
         """
@@ -69,33 +102,96 @@ class CalendarManager:
         try:
             created_event = self.service.events().insert(body= event_body, calendarId='primary').execute()
             print(f"Event created: {created_event.get('htmlLink')}")
+            self._invalidate_busy_cache('primary')
             return created_event
 
         except HttpError as error:
+            if error.resp.status == 409 and event_body.get('id'):
+                print(f"Event {event_body['id']} already exists; not inserting it again")
+                return self.service.events().get(calendarId='primary', eventId=event_body['id']).execute()
             print(f"An error occurred: {error}")
             return None
         except Exception as e:
             print(f"An unexpected error occurred: {e}")
             return None
         
-    def get_free_busy_slots(self, time_min: str, time_max: str) -> dict:
+    def add_events_batch(self, event_bodies: list, calendar_id: str = 'primary') -> list:
+        """
+        Inserts many events using batched requests (up to 50 per HTTP round trip).
+
+        Args:
+            event_bodies (list[dict]): Event resources, same format as add_event.
+            calendar_id (str): The calendar to insert into.
+
+        Returns:
+            list[tuple]: One (created_event, error) pair per body, in the same order.
+                         error is a services.batching.BatchItemError or None.
+        """
+        batch = BatchExecutor(self.service)
+        for index, event_body in enumerate(event_bodies):
+            batch.add(self.service.events().insert(calendarId=calendar_id, body=event_body),
+                      request_id=index)
+        results = batch.execute()
+        if results:
+            self._invalidate_busy_cache(calendar_id)
+        return [results.get(str(index), (None, None)) for index in range(len(event_bodies))]
+
+    def delete_events_batch(self, event_links: list) -> dict:
+        """
+        Deletes many events using batched requests.
+
+        Args:
+            event_links (list): [[event_id, calendar_id], ...] (the format stored in the link store).
+
+        Returns:
+            dict: {event_id: True if deleted or already gone, False otherwise}
+        """
+        batch = BatchExecutor(self.service)
+        for event_id, calendar_id in event_links:
+            batch.add(self.service.events().delete(calendarId=calendar_id, eventId=event_id),
+                      request_id=event_id)
+        deleted = {}
+        for event_id, (_, error) in batch.execute().items():
+            if error is not None and not error.not_found:
+                print(f"Error deleting event {event_id}: {error}")
+            deleted[event_id] = error is None or error.not_found
+        for calendar_id in {calendar_id for _, calendar_id in event_links}:
+            self._invalidate_busy_cache(calendar_id)
+        return deleted
+
+    def get_free_busy_slots(self, time_min: str, time_max: str, calendar_id: str = 'primary') -> dict:
         """
         Queries the user's calendar for busy times within a given range.
 
+        Answers come from the local busy cache (synced incrementally with sync tokens);
+        freebusy().query is only used when the cache is disabled or its sync fails.
+
         Args:
             time_min: The start time of the query range (ISO 8601 string).
             time_max: The end time of the query range (ISO 8601 string).
+            calendar_id: The calendar to check (default 'primary').
 
         Returns:
-            A dictionary of free/busy data.
+            A dictionary of free/busy data (shared with concurrent identical calls: read only).
         """
+        # Concurrent identical queries (same calendar and range) share one upstream call.
+        return self._free_busy_flight.do((calendar_id, time_min, time_max),
+                                         lambda: self._query_free_busy(time_min, time_max, calendar_id))
+
+    def _query_free_busy(self, time_min: str, time_max: str, calendar_id: str) -> dict:
+        if self.use_busy_cache:
+            try:
+                return self.get_busy_cache(calendar_id).get_busy(time_min, time_max)
+            except Exception as e:
+                print(f"Busy cache unavailable, falling back to freebusy query: {e}")
+
         try:
             # Prepare the request body for the free/busy query
             body = {
                 "timeMin": time_min,
                 "timeMax": time_max,
                 "items": [
-                    {"id": "primary"}  # Query the user's primary calendar
+                    {"id": calendar_id}  # Query the user's primary calendar by default
                 ]
             }
             
@@ -103,15 +199,17 @@ class CalendarManager:
             response = self.service.freebusy().query(body=body).execute()
             
             # The 'calendars' key contains the free/busy data for each queried calendar
-            return response.get('calendars', {}).get('primary', {})
+            return response.get('calendars', {}).get(calendar_id, {})
         
         except Exception as e:
             print(f"An error occurred while querying free/busy data: {e}")
             return {}
         
-    def get_available_slots(self, time_min: str, time_max: str) -> list:
+    def get_available_slots(self, time_min: str, time_max: str, **slot_options) -> list:
         """
         Orchestrates the process of getting busy data and calculating free slots.
+        Extra keyword arguments (duration_minutes, count, work_start, ...) are passed
+        through to calculate_free_slots.
         """
         # Step 1: Call the API to get busy data.
         busy_data = self.get_free_busy_slots(time_min, time_max)
@@ -120,9 +218,35 @@ class CalendarManager:
         busy_slots = busy_data.get('busy', [])
         
         # Step 2: Pass the list of busy slots to the calculation method.
-        free_slots = self.calculate_free_slots(time_min, time_max, busy_slots)
+        free_slots = self.calculate_free_slots(time_min, time_max, busy_slots, **slot_options)
         
         return free_slots
+
+    def calculate_free_slots(self, time_min: str, time_max: str, busy_slots: list,
+                             duration_minutes: int = 60, count: int = None,
+                             tz_name: str = DEFAULT_TIMEZONE,
+                             work_start=DEFAULT_WORK_START, work_end=DEFAULT_WORK_END,
+                             weekdays=None) -> list:
+        """
+        Computes the free slots between time_min and time_max locally (no API or Gemini call).
+
+        Args:
+            time_min: The start time of the query range (ISO 8601 string).
+            time_max: The end time of the query range (ISO 8601 string).
+            busy_slots: The 'busy' list returned by get_free_busy_slots.
+            duration_minutes: Minimum length of a free slot.
+            count: Maximum number of slots to return (None for all of them).
+            tz_name: Timezone for the working hours and the returned times.
+            work_start / work_end: Working hours as datetime.time objects.
+            weekdays: Allowed weekday numbers (Monday is 0), or None for every day.
+
+        Returns:
+            list[dict]: [{'start': ..., 'end': ..., 'minutes': ...}, ...] in chronological order.
+        """
+        return find_free_slots(time_min, time_max, busy_slots,
+                               duration_minutes=duration_minutes, count=count,
+                               tz_name=tz_name, work_start=work_start, work_end=work_end,
+                               weekdays=weekdays)
     
     def delete_event(self, event_id, calendar_id, one_time):
         """
@@ -145,6 +269,7 @@ class CalendarManager:
                     eventId=event_id
                 ).execute()
                 print(f"Successfully deleted single event instance: {event_id} from {calendar_id}.")
+                self._invalidate_busy_cache(calendar_id)
                 return True
             except HttpError as err:
                 # Handle 404 Not Found, which often occurs if the instance was already deleted
@@ -316,81 +441,23 @@ class CalendarManager:
         user_timezone = timezone_setting.get("value")
         return user_timezone
     
-    def calculate_weekly_stats(self, start_date_iso, end_date_iso, calendar_id='primary'):
+    def calculate_weekly_stats(self, start_date_iso, end_date_iso, calendar_id='primary', category_keywords=None):
         """
         Analyzes all events for a week and aggregates time spent per category.
+        Reads every page of events, so any range (months, years) works; see services/event_stats.py.
 
         Args:
-            calendar_service: The authenticated Google Calendar API service object.
             start_date_iso (str): Start date/time in ISO format (e.g., '2025-11-01T00:00:00Z').
             end_date_iso (str): End date/time in ISO format.
             calendar_id (str): The calendar ID to analyze.
+            category_keywords (dict): Optional {category: [keywords]} in priority order,
+                                      defaults to CATEGORY_KEYWORDS.
 
         Returns:
             dict: Total time spent in hours for each category.
         """
-        CATEGORY_KEYWORDS = {
-        'Sleep': ['Sleep', 'Nap', 'Rest', 'Asleep'],
-        'Work': ['Work', 'Meeting', 'Client', 'Project', 'Sprint', 'Standup'],
-        'Leisure': ['Gym', 'Workout', 'Hobby', 'Reading', 'Movie', 'Personal Project', 'Run'],
-        # Any event not matching the above will fall into the 'Other' category.
-        }
-
-
-        total_time_spent = {cat: timedelta(0) for cat in CATEGORY_KEYWORDS}
-        total_time_spent['Other'] = timedelta(0)
-        
-        try:
-            events_result = self.service.events().list(
-                calendarId=calendar_id, 
-                timeMin=start_date_iso,
-                timeMax=end_date_iso,
-                singleEvents=True, # Essential for counting every instance of a recurring event
-                orderBy='startTime'
-            ).execute()
-            
-            events = events_result.get('items', [])
-            
-        except HttpError as err:
-            print(f"Error fetching events for stats: {err}")
-            return {k: 0 for k in total_time_spent}
-
-        for event in events:
-            summary = event.get('summary', '').lower()
-            start = event['start'].get('dateTime')
-            end = event['end'].get('dateTime')
-            
-            # Skip all-day events and events without clear start/end times
-            if not start or not end:
-                continue
-
-            try:
-                # Parse times with robust handling for timezones (crucial for duration)
-                start_dt = datetime.fromisoformat(start)
-                end_dt = datetime.fromisoformat(end)
-                duration = end_dt - start_dt
-            except ValueError:
-                # Skip if time format is unexpected
-                continue
-
-            # 2. Categorize the event
-            category_found = False
-            for category, keywords in CATEGORY_KEYWORDS.items():
-                if any(keyword.lower() in summary for keyword in keywords):
-                    total_time_spent[category] += duration
-                    category_found = True
-                    break
-            
-            if not category_found:
-                total_time_spent['Other'] += duration
-
-        # 3. Aggregate and convert results to hours (float)
-        stats_in_hours = {
-            category: duration.total_seconds() / 3600 
-            for category, duration in total_time_spent.items()
-        }
-
-        return stats_in_hours
+        return calculate_stats(self.service, start_date_iso, end_date_iso, calendar_id,
+                               category_keywords or CATEGORY_KEYWORDS)
     
 
 # Example usage (for testing)
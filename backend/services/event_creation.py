@@ -0,0 +1,107 @@
+# Purpose: Turns one free-text event description into a Google Calendar event.
+# Shared by the Flask app (Essentials/app.py), the async app (Essentials/async_app.py) and
+# their queued /create_event_nlp jobs, which differ only in how Gemini and Calendar are called:
+# the apps pass those calls in as hooks, blocking ones here and awaitables in the async variant.
+#
+#     gemini_parse(text) -> (structured line, event dict)   used when the rules are unsure
+#     add_event(event dict) -> created event or None        e.g. CalendarManager.add_event
+from services.fast_parser import parse_event_text, FAST_PATH_MIN_CONFIDENCE
+
+
+def _parse_with_rules(text):
+    """(text, event_details, "rules") when the rule-based parser is confident, else None."""
+    event_details, confidence = parse_event_text(text)
+    if event_details is not None and confidence >= FAST_PATH_MIN_CONFIDENCE:
+        return text, event_details, "rules"
+    return None
+
+
+def _created(user_input, event_details, parser, created_event):
+    return {'input': user_input, 'parser': parser, 'event_details': event_details, 'event': created_event}
+
+
+def _with_id(event_details, event_id):
+    if event_details and event_id:
+        event_details["id"] = event_id
+    return event_details
+
+
+def create_event_from_text(text, gemini_parse, add_event, event_id=None):
+    """
+    Parses one event description and inserts it into the primary calendar.
+    Well-formed inputs are parsed by rules; Gemini only sees the ones they are unsure about.
+
+    Args:
+        text (str): The event description.
+        gemini_parse (callable): text -> (structured line, event dict).
+        add_event (callable): event dict -> created event, or None if the insert failed.
+        event_id (str): Optional client-chosen event id (services.calender_manager.new_event_id);
+                        inserting the same id again returns the existing event.
+
+    Returns:
+        dict: input (the structured line), parser ("rules" / "gemini"), event_details and
+              the created event (None if the Calendar insert failed).
+    """
+    parsed = _parse_with_rules(text)
+    if parsed is None:
+        user_input, event_details = gemini_parse(text)
+        parsed = user_input, event_details, "gemini"
+    user_input, event_details, parser = parsed
+    created_event = add_event(_with_id(event_details, event_id))
+    return _created(user_input, event_details, parser, created_event)
+
+
+async def create_event_from_text_async(text, gemini_parse, add_event, event_id=None):
+    """create_event_from_text with awaitable gemini_parse and add_event hooks."""
+    parsed = _parse_with_rules(text)
+    if parsed is None:
+        user_input, event_details = await gemini_parse(text)
+        parsed = user_input, event_details, "gemini"
+    user_input, event_details, parser = parsed
+    created_event = await add_event(_with_id(event_details, event_id))
+    return _created(user_input, event_details, parser, created_event)
+
+
+def creation_response(created):
+    """
+    The /create_event_nlp answer for a create_event_from_text(_async) result.
+
+    Returns:
+        tuple: (JSON-serializable body, HTTP status): 201 when the event was created,
+               502 when Google Calendar did not create it.
+    """
+    if created["event"] is None:
+        return {
+            'status': 'error',
+            'message': 'Google Calendar did not create the event',
+            'input': created["input"],
+            'parser': created["parser"],
+            'event_details': created["event_details"]
+        }, 502
+    return {
+        'status': 'success',
+        'message': 'Event created successfully',
+        'input': created["input"],
+        'parser': created["parser"],
+        'event_details': created["event_details"],
+        'event_id': created["event"].get("id"),
+        'html_link': created["event"].get("htmlLink")
+    }, 201
+
+
+def job_result(created):
+    """
+    The result of a queued /create_event_nlp job.
+
+    Raises:
+        RuntimeError: Google Calendar did not create the event (fails the job).
+    """
+    if created["event"] is None:
+        raise RuntimeError("Google Calendar did not create the event")
+    return {
+        'input': created["input"],
+        'parser': created["parser"],
+        'event_details': created["event_details"],
+        'event_id': created["event"].get("id"),
+        'html_link': created["event"].get("htmlLink")
+    }
@@ -0,0 +1,220 @@
+# Purpose: Time-spent statistics over any range of a calendar (a week, a month, years).
+# Events are read page by page (following nextPageToken) and added to per-category totals as
+# they arrive, so memory use does not grow with the number of events and nothing is
+# silently dropped after the first page.
+import re
+import threading
+from datetime import datetime, timedelta
+from googleapiclient.errors import HttpError
+
+# --- Configuration for Event Categorization ---
+# NOTE: Customize these lists based on common event titles in your calendar.
+CATEGORY_KEYWORDS = {
+    'Sleep': ['Sleep', 'Nap', 'Rest', 'Asleep'],
+    'Work': ['Work', 'Meeting', 'Client', 'Project', 'Sprint', 'Standup'],
+    'Leisure': ['Gym', 'Workout', 'Hobby', 'Reading', 'Movie', 'Personal Project', 'Run'],
+    # Any event not matching the above will fall into the 'Other' category.
+}
+OTHER_CATEGORY = 'Other'
+
+# Only what the stats need; keeps every page small. id and etag key the category memo.
+STATS_FIELDS = "items(id,etag,summary,start,end),nextPageToken"
+# Largest page events().list allows.
+PAGE_SIZE = 2500
+# Remembered (event id, etag) -> category pairs per categorizer.
+MEMO_SIZE = 100_000
+
+
+def iter_events(service, time_min: str, time_max: str, calendar_id: str = 'primary',
+                fields: str = STATS_FIELDS, page_size: int = PAGE_SIZE):
+    """
+    Yields every event instance between time_min and time_max, one page at a time.
+
+    Args:
+        service: The authenticated Google Calendar API service object.
+        time_min (str): Start of the range (RFC3339).
+        time_max (str): End of the range (RFC3339).
+        calendar_id (str): The calendar to read.
+        fields (str): Partial response selector; must include nextPageToken.
+        page_size (int): Events per page (at most 2500).
+    """
+    page_token = None
+    while True:
+        page = service.events().list(
+            calendarId=calendar_id,
+            timeMin=time_min,
+            timeMax=time_max,
+            singleEvents=True,  # Essential for counting every instance of a recurring event
+            maxResults=page_size,
+            pageToken=page_token,
+            fields=fields
+        ).execute()
+        yield from page.get('items', [])
+        page_token = page.get('nextPageToken')
+        if not page_token:
+            return
+
+
+def event_duration(event: dict):
+    """Returns the duration of a timed event, or None for all-day/malformed events."""
+    start = event.get('start', {}).get('dateTime')
+    end = event.get('end', {}).get('dateTime')
+    # Skip all-day events and events without clear start/end times
+    if not start or not end:
+        return None
+    try:
+        return datetime.fromisoformat(end) - datetime.fromisoformat(start)
+    except ValueError:
+        # Skip if time format is unexpected
+        return None
+
+
+def _trie_regex(words) -> str:
+    """
+    One regex alternation for many words, factored by common prefixes
+    ("meet|meeting|movie" -> "m(?:eet(?:ing)?|ovie)"). The re module tries alternatives one by
+    one, so sharing prefixes keeps matching fast as the keyword list grows. Where a word is a
+    prefix of another, the longer one is preferred.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        terminal = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            return (body if len(branches) > 1 else "(?:" + body + ")") + "?"
+        return body
+
+    return build(trie)
+
+
+class Categorizer:
+    """
+    Assigns events to categories with one compiled regular expression over all keywords.
+
+    Semantics are the same as checking the categories in order and taking the first one that
+    has a keyword contained in the summary (case-insensitive). Every keyword is ranked by its
+    first category, one findall over a prefix-factored pattern (see _trie_regex) collects the
+    keywords present, and the best rank wins.
+    Keywords that contain an equal-or-better keyword ("workout" contains "work") can never
+    decide the result and are dropped. A few keywords can hide a better one that starts
+    inside their match ("run" + "nap" in "runap"); only when one of those is found, the
+    summary is scanned again with a zero-width lookahead that sees overlapping matches.
+
+    Results are memoized per (event id, etag), so an unchanged event is classified only once.
+
+    Args:
+        category_keywords (dict): {category: [keyword, ...]} in priority order.
+        memo_size (int): How many (id, etag) results to keep.
+    """
+
+    def __init__(self, category_keywords: dict = CATEGORY_KEYWORDS, memo_size: int = MEMO_SIZE):
+        self.categories = list(category_keywords) + [OTHER_CATEGORY]
+        rank = {}
+        for index, keywords in enumerate(category_keywords.values()):
+            for keyword in keywords:
+                if keyword:
+                    rank.setdefault(keyword.lower(), index)
+        self.rank = {
+            keyword: index for keyword, index in rank.items()
+            if not any(other != keyword and other in keyword and rank[other] <= index for other in rank)
+        }
+        self.overlapping = {
+            worse for worse, worse_rank in self.rank.items()
+            if any(better_rank < worse_rank and better.startswith(worse[offset:])
+                   for better, better_rank in self.rank.items() for offset in range(1, len(worse)))
+        }
+        alternation = _trie_regex(self.rank)
+        self.pattern = re.compile(alternation) if self.rank else None
+        self.overlap_pattern = re.compile(f"(?=({alternation}))") if self.overlapping else None
+        self.memo_size = memo_size
+        # Plain dict (insertion ordered, oldest evicted first); single get/set are thread-safe.
+        self._memo = {}
+
+    def categorize(self, summary: str) -> str:
+        """The category of a summary, 'Other' when no keyword is contained in it."""
+        if self.pattern is None or not summary:
+            return OTHER_CATEGORY
+        summary = summary.lower()
+        found = self.pattern.findall(summary)
+        if not found:
+            return OTHER_CATEGORY
+        if self.overlap_pattern is not None and not self.overlapping.isdisjoint(found):
+            found = self.overlap_pattern.findall(summary)
+        return self.categories[min(map(self.rank.__getitem__, found))]
+
+    def categorize_event(self, event: dict) -> str:
+        """categorize(event['summary']), memoized by the event's id and etag when present."""
+        key = (event.get('id'), event.get('etag'))
+        if key[0] is None or key[1] is None:
+            return self.categorize(event.get('summary', ''))
+        category = self._memo.get(key)
+        if category is None:
+            category = self._memo[key] = self.categorize(event.get('summary', ''))
+            if len(self._memo) > self.memo_size:
+                try:
+                    del self._memo[next(iter(self._memo))]
+                except (KeyError, RuntimeError, StopIteration):
+                    pass  # another thread evicted or changed the memo at the same time
+        return category
+
+
+_categorizers = {}
+_categorizers_lock = threading.Lock()
+
+
+def get_categorizer(category_keywords: dict = CATEGORY_KEYWORDS) -> Categorizer:
+    """
+    Returns the shared Categorizer for a category configuration, compiling it on first use.
+    Custom (per-user) configurations are compiled once and keep their own memo.
+    """
+    key = tuple((category, tuple(keywords)) for category, keywords in category_keywords.items())
+    with _categorizers_lock:
+        categorizer = _categorizers.get(key)
+        if categorizer is None:
+            categorizer = _categorizers[key] = Categorizer(category_keywords)
+        return categorizer
+
+
+def categorize(summary: str, category_keywords: dict = CATEGORY_KEYWORDS) -> str:
+    """First category with a keyword contained in the summary (case-insensitive), else 'Other'."""
+    return get_categorizer(category_keywords).categorize(summary)
+
+
+def aggregate_stats(events, category_keywords: dict = CATEGORY_KEYWORDS) -> dict:
+    """
+    Adds up the time spent per category while consuming events (any iterable, e.g. iter_events).
+
+    Returns:
+        dict: Total time spent in hours for each category, including 'Other'.
+    """
+    categorizer = get_categorizer(category_keywords)
+    total_time_spent = {category: timedelta(0) for category in category_keywords}
+    total_time_spent[OTHER_CATEGORY] = timedelta(0)
+    for event in events:
+        duration = event_duration(event)
+        if duration is None:
+            continue
+        total_time_spent[categorizer.categorize_event(event)] += duration
+    return {category: duration.total_seconds() / 3600 for category, duration in total_time_spent.items()}
+
+
+def calculate_stats(service, time_min: str, time_max: str, calendar_id: str = 'primary',
+                    category_keywords: dict = CATEGORY_KEYWORDS) -> dict:
+    """
+    Time spent per category (in hours) between time_min and time_max.
+    On an API error every category is reported as 0, never as a partial count.
+    """
+    try:
+        return aggregate_stats(iter_events(service, time_min, time_max, calendar_id), category_keywords)
+    except HttpError as err:
+        print(f"Error fetching events for stats: {err}")
+        return {category: 0 for category in [*category_keywords, OTHER_CATEGORY]}
@@ -0,0 +1,283 @@
+# Purpose: Rule-based pre-parser for event text.
+# Most create-event requests are already (semi-)structured: "Gym tomorrow 7am-8am",
+# "Dentist on Friday at 14:30 for 45 minutes", "Work out on Tuesday: 7:30 AM - 8:30 AM (1 hour)".
+# Those are turned into the Google Calendar event dict directly, in microseconds, and only
+# inputs the rules are unsure about are sent to Gemini (GeminiParser.parse_event_details).
+#
+# parse_event_text returns (event_dict, confidence). Callers should fall back to Gemini
+# when the event is None or the confidence is below FAST_PATH_MIN_CONFIDENCE.
+import os
+import re
+from datetime import datetime, date, time, timedelta
+import pytz
+
+DEFAULT_TIMEZONE = 'America/Chicago'
+DEFAULT_DURATION_MINUTES = 60
+FAST_PATH_MIN_CONFIDENCE = float(os.getenv("FAST_PATH_MIN_CONFIDENCE", 0.75))
+
+DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+DAY_ALIASES = {
+    "mon": 0, "tue": 1, "tues": 1, "wed": 2, "thu": 3, "thur": 3, "thurs": 3,
+    "fri": 4, "sat": 5, "sun": 6,
+}
+DAY_ALIASES.update({name: index for index, name in enumerate(DAYS)})
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "sept": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+# Recurring requests go through the recurring planner, not this parser.
+RECURRING_RE = re.compile(r"\b(every|daily|weekly|weekdays|weekends|each)\b")
+
+_TIME = r"(?:\d{1,2}(?::\d{2})?\s*(?:am|pm)|\d{1,2}:\d{2}|noon|midnight)"
+_LOOSE_TIME = r"(?:\d{1,2}(?::\d{2})?\s*(?:am|pm)?|noon|midnight)"
+TIME_RANGE_RE = re.compile(
+    rf"\b(?:from\s+|between\s+)?({_LOOSE_TIME})\s*(?:-|–|to|until|till|and)\s*({_TIME})(?![\w:])"
+)
+SINGLE_TIME_RE = re.compile(rf"\b(?:at\s+|@\s*)?({_TIME})(?![\w:])")
+DURATION_RE = re.compile(
+    r"(?:\bfor\s+|\()\s*(?:(an?|\d+(?:\.\d+)?)\s*(?:hours?|hrs?|h)\b)?\s*(?:and\s+)?"
+    r"(?:(\d+)\s*(?:minutes?|mins?|m)\b)?\s*\)?"
+)
+DAY_NAMES = "|".join(sorted(DAY_ALIASES, key=len, reverse=True))
+MONTH_NAMES = "|".join(sorted(MONTHS, key=len, reverse=True))
+DATE_PATTERNS = [
+    ("iso", re.compile(r"\b(?:on\s+)?(\d{4})-(\d{1,2})-(\d{1,2})\b")),
+    ("month_day", re.compile(
+        rf"\b(?:on\s+)?(?:(?:{DAY_NAMES}),?\s+)?({MONTH_NAMES})[a-z]*\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?(?:,?\s+(\d{{4}}))?\b")),
+    ("day_month", re.compile(
+        rf"\b(?:on\s+)?(?:(?:{DAY_NAMES}),?\s+)?(?:the\s+)?(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?({MONTH_NAMES})[a-z]*\.?(?:,?\s+(\d{{4}}))?\b")),
+    ("slash", re.compile(r"\b(?:on\s+)?(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\b")),
+    ("day_after_tomorrow", re.compile(r"\b(?:the\s+)?day after (?:tomorrow|tmrw)\b")),
+    ("tomorrow", re.compile(r"\b(?:tomorrow|tmrw|tmr)\b")),
+    ("today", re.compile(r"\b(?:today|tonight|this (?:morning|afternoon|evening))\b")),
+    ("in_days", re.compile(r"\bin (\d+) days?\b")),
+    ("weekday", re.compile(rf"\b(?:on\s+)?(?:(next|this|coming)\s+)?({DAY_NAMES})\b:?")),
+]
+# Date parts that can be left in the summary when a date was only partly understood
+# ("Monday the 15th", "Friday in March"): ordinals, bare numbers and month names.
+LEFTOVER_DATE_RE = re.compile(
+    r"(?i)\b(?:\d+(?:st|nd|rd|th)?|january|february|march|april|may|june|july|august|september|"
+    r"october|november|december|jan|feb|mar|apr|jun|jul|aug|sept?|oct|nov|dec)\b"
+)
+# Clock times left in the summary ("then dinner at 8pm", "sleep at 11", "lunch at noon") mean the
+# input held a second time, i.e. more than one event, which only Gemini splits correctly.
+LEFTOVER_TIME_RE = re.compile(r"(?i)\b\d{1,2}(?::\d{2})?\s*(?:am|pm)\b|\b(?:noon|midnight)\b|\bat\s+\d")
+# Words that only glue the sentence together and should not end up in the summary.
+FILLER_RE = re.compile(
+    r"(?i)^(?:(?:please|i\s+have\s+to|i\s+have|i\s+need\s+to|i\s+want\s+to|remind\s+me\s+to|"
+    r"schedule|add|book|create|set\s+up|plan|an?|the)\s+)+|"
+    r"(?:\s+(?:on|at|from|for|to|by|in|this|next|the|and|,|-))+$"
+)
+
+
+def _parse_clock(token: str, meridiem_hint: str = None):
+    """Turns '7', '7:30', '7pm', '19:30', 'noon' into a time. Returns None if invalid."""
+    token = token.strip()
+    if token == "noon":
+        return time(12, 0)
+    if token == "midnight":
+        return time(0, 0)
+    match = re.fullmatch(r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?", token)
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    meridiem = match.group(3) or meridiem_hint
+    if minute > 59:
+        return None
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    elif hour > 23:
+        return None
+    return time(hour, minute)
+
+
+def _year_for(month: int, day: int, today: date) -> int:
+    """Dates without a year mean the next time that date comes around."""
+    try:
+        return today.year if date(today.year, month, day) >= today else today.year + 1
+    except ValueError:
+        return today.year
+
+
+def _resolve_date(kind: str, match, today: date):
+    """Returns (date, explicit_weekday) for a DATE_PATTERNS match, or (None, None)."""
+    try:
+        if kind == "iso":
+            return date(int(match.group(1)), int(match.group(2)), int(match.group(3))), None
+        if kind in ("month_day", "day_month"):
+            month_token, day_token = (match.group(1), match.group(2)) if kind == "month_day" \
+                else (match.group(2), match.group(1))
+            month = MONTHS[month_token[:4] if month_token[:4] in MONTHS else month_token[:3]]
+            day = int(day_token)
+            year = int(match.group(3)) if match.group(3) else _year_for(month, day, today)
+            return date(year, month, day), None
+        if kind == "slash":
+            month, day = int(match.group(1)), int(match.group(2))
+            year = match.group(3)
+            year = (int(year) + 2000 if len(year) == 2 else int(year)) if year else _year_for(month, day, today)
+            return date(year, month, day), None
+    except ValueError:
+        return None, None
+    if kind == "day_after_tomorrow":
+        return today + timedelta(days=2), None
+    if kind == "tomorrow":
+        return today + timedelta(days=1), None
+    if kind == "today":
+        return today, None
+    if kind == "in_days":
+        return today + timedelta(days=int(match.group(1))), None
+    if kind == "weekday":
+        target = DAY_ALIASES[match.group(2)]
+        days_ahead = (target - today.weekday()) % 7
+        if match.group(1) == "next" and days_ahead == 0:
+            days_ahead = 7
+        return today + timedelta(days=days_ahead), target
+    return None, None
+
+
+def _format_rfc3339(value: datetime) -> str:
+    # Same format parse_event_line produces: 2025-12-08T20:00:00-06:00
+    text = value.strftime('%Y-%m-%dT%H:%M:%S%z')
+    return text[:-2] + ':' + text[-2:]
+
+
+def parse_event_text(user_input: str, now: datetime = None, tz_name: str = DEFAULT_TIMEZONE):
+    """
+    Parses common event phrasings without calling Gemini.
+
+    Understands relative dates (today, tomorrow, in 3 days, next Friday), calendar dates
+    (2025-09-02, 9/2, Sept 2nd), 12h and 24h times, time ranges and durations
+    ("for 90 minutes", "(1 hour)").
+
+    Args:
+        user_input (str): Free text such as "Gym tomorrow 7-8am".
+        now (datetime): Reference time (aware); defaults to the current time in tz_name.
+        tz_name (str): Timezone of the event.
+
+    Returns:
+        tuple: (event_dict, confidence). event_dict has the same shape as
+               GeminiParser.parse_event_line's result, or is None when the input is not
+               understood. confidence is between 0 and 1.
+    """
+    tz = pytz.timezone(tz_name)
+    now = now.astimezone(tz) if now is not None else datetime.now(tz)
+    # Matching happens on a lowercase copy; matched parts are blanked out of both copies
+    # (same length), so what remains of `original` is the summary with its casing intact.
+    original = " " + re.sub(r"\s+", " ", user_input.strip()) + " "
+    original = re.sub(r"\b([ap])\.m\.?", r"\1m", original, flags=re.IGNORECASE)
+    text = original.lower()
+
+    def consume(match):
+        nonlocal text, original
+        blank = " " * (match.end() - match.start())
+        text = text[:match.start()] + blank + text[match.end():]
+        original = original[:match.start()] + blank + original[match.end():]
+
+    if not user_input.strip() or RECURRING_RE.search(text):
+        return None, 0.0
+
+    # 1. Times: a range first, then a single start time.
+    start_time = end_time = None
+    match = TIME_RANGE_RE.search(text)
+    if match:
+        end_time = _parse_clock(match.group(2))
+        hint = re.search(r"(am|pm)$", match.group(2))
+        start_time = _parse_clock(match.group(1))
+        if start_time is not None and not re.search(r"am|pm|:|noon|midnight", match.group(1)) and hint:
+            # "7-8pm": the first time borrows the meridiem of the second.
+            start_time = _parse_clock(match.group(1), hint.group(1))
+            if end_time is not None and start_time > end_time and hint.group(1) == "pm":
+                start_time = _parse_clock(match.group(1), "am")
+        if start_time is None or end_time is None:
+            return None, 0.0
+        consume(match)
+    else:
+        match = SINGLE_TIME_RE.search(text)
+        if not match:
+            return None, 0.0
+        start_time = _parse_clock(match.group(1))
+        if start_time is None:
+            return None, 0.0
+        consume(match)
+
+    # 2. Duration, used when there is no end time.
+    duration = None
+    for match in DURATION_RE.finditer(text):
+        hours_token, minutes_token = match.group(1), match.group(2)
+        if hours_token is None and minutes_token is None:
+            continue
+        hours = 1.0 if hours_token in ("a", "an") else float(hours_token or 0)
+        duration = timedelta(hours=hours, minutes=int(minutes_token or 0))
+        consume(match)
+        break
+
+    # 3. Date.
+    event_date = None
+    for kind, pattern in DATE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            event_date, _ = _resolve_date(kind, match, now.date())
+            if event_date is None:
+                return None, 0.0
+            consume(match)
+            date_given = True
+            weekday_only = kind == "weekday"
+            break
+    else:
+        date_given = False
+        weekday_only = False
+        event_date = now.date()
+
+    start_naive = datetime.combine(event_date, start_time)
+    if (not date_given or (weekday_only and event_date == now.date())) and tz.localize(start_naive) < now:
+        # Like parse_event_line: a time that already passed today means the next occurrence.
+        start_naive += timedelta(days=7 if weekday_only else 1)
+
+    if end_time is not None:
+        end_naive = datetime.combine(start_naive.date(), end_time)
+        # Handle case where end time is on the next day (e.g., 10 PM - 2 AM)
+        if end_naive <= start_naive:
+            end_naive += timedelta(days=1)
+    else:
+        end_naive = start_naive + (duration or timedelta(minutes=DEFAULT_DURATION_MINUTES))
+
+    # 4. Whatever is left is the event name.
+    summary = re.sub(r"[:;,.!?()\s]+", " ", original).strip()
+    summary = FILLER_RE.sub("", summary).strip(" -,")
+
+    # 5. Confidence: how much of the input was accounted for.
+    if not summary:
+        return None, 0.0
+    confidence = 0.95
+    if end_time is None and duration is None:
+        confidence -= 0.15
+    if not date_given:
+        confidence -= 0.25
+    if LEFTOVER_DATE_RE.search(summary):
+        # Leftover numbers, ordinals or month names usually mean a date or time we did not understand.
+        confidence -= 0.3
+    if LEFTOVER_TIME_RE.search(summary):
+        confidence -= 0.3
+    if len(summary.split()) > 8:
+        confidence -= 0.2
+
+    summary = summary[0].upper() + summary[1:]
+    start_datetime = tz.localize(start_naive)
+    end_datetime = tz.localize(end_naive)
+    day_of_week_str = DAYS[start_naive.weekday()].capitalize()
+    event_dict = {
+        "summary": summary,
+        "description": f"{summary} on {day_of_week_str}",
+        "start": {
+            "dateTime": _format_rfc3339(start_datetime),
+            "timeZone": tz_name
+        },
+        "end": {
+            "dateTime": _format_rfc3339(end_datetime),
+            "timeZone": tz_name
+        }
+    }
+    return event_dict, round(max(confidence, 0.0), 2)
@@ -0,0 +1,199 @@
+# Purpose: Local free-slot engine used by CalendarManager.
+# It turns the 'busy' list returned by the free/busy API into free gaps and answers
+# "give me N free slots of at least D minutes inside working hours" without calling Gemini.
+#
+# All interval math is done on POSIX timestamps (floats) so sorting and merging stay
+# cheap even for calendars with tens of thousands of busy intervals:
+#   sort busy intervals          O(n log n)
+#   merge overlapping intervals  O(n)
+#   walk gaps x working windows  O(n + days)
+from datetime import datetime, time, timedelta, timezone
+import pytz
+
+DEFAULT_TIMEZONE = 'America/Chicago'
+DEFAULT_WORK_START = time(9, 0)
+DEFAULT_WORK_END = time(17, 0)
+
+
+def to_timestamp(value) -> float:
+    """
+    Converts an RFC 3339 string (e.g. '2025-09-02T08:00:00Z' or '2025-09-02T08:00:00-05:00')
+    or a timezone-aware datetime into a POSIX timestamp.
+    Naive values are assumed to be UTC, which is what the free/busy API returns.
+    """
+    if isinstance(value, datetime):
+        dt_value = value
+    else:
+        value = value.strip()
+        if value.endswith('Z') or value.endswith('z'):
+            value = value[:-1] + '+00:00'
+        dt_value = datetime.fromisoformat(value)
+    if dt_value.tzinfo is None:
+        dt_value = dt_value.replace(tzinfo=timezone.utc)
+    return dt_value.timestamp()
+
+
+def merge_intervals(intervals: list) -> list:
+    """
+    Sorts and merges overlapping or touching intervals.
+
+    Args:
+        intervals (list): (start, end) timestamp pairs in any order.
+
+    Returns:
+        list: Non-overlapping (start, end) pairs sorted by start.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def busy_to_intervals(busy_slots: list) -> list:
+    """Converts free/busy API entries ({'start': ..., 'end': ...}) into timestamp pairs."""
+    return [(to_timestamp(slot['start']), to_timestamp(slot['end'])) for slot in busy_slots]
+
+
+def compute_free_gaps(window_start: float, window_end: float, merged_busy: list):
+    """
+    Yields the free (start, end) gaps inside [window_start, window_end]
+    given busy intervals that are already sorted and merged.
+    """
+    cursor = window_start
+    for start, end in merged_busy:
+        if end <= cursor:
+            continue
+        if start >= window_end:
+            break
+        if start > cursor:
+            yield (cursor, start)
+        cursor = max(cursor, end)
+        if cursor >= window_end:
+            return
+    if cursor < window_end:
+        yield (cursor, window_end)
+
+
+def working_windows(window_start: float, window_end: float, tz_name: str = DEFAULT_TIMEZONE,
+                    work_start: time = DEFAULT_WORK_START, work_end: time = DEFAULT_WORK_END,
+                    weekdays=None):
+    """
+    Yields the daily working-hour windows (as timestamp pairs) that overlap the query range.
+
+    Args:
+        tz_name (str): The timezone the working hours are expressed in.
+        work_start (time): Start of the working day.
+        work_end (time): End of the working day. If it is not after work_start the
+                         window runs past midnight (e.g. 22:00 - 02:00).
+        weekdays (iterable | None): Allowed weekday numbers (Monday is 0). None allows every day.
+    """
+    tz = pytz.timezone(tz_name)
+    allowed = set(weekdays) if weekdays is not None else None
+    first_day = datetime.fromtimestamp(window_start, tz).date() - timedelta(days=1)
+    last_day = datetime.fromtimestamp(window_end, tz).date()
+    overnight = work_end <= work_start
+
+    day = first_day
+    while day <= last_day:
+        if allowed is None or day.weekday() in allowed:
+            start = tz.localize(datetime.combine(day, work_start)).timestamp()
+            end_day = day + timedelta(days=1) if overnight else day
+            end = tz.localize(datetime.combine(end_day, work_end)).timestamp()
+            start, end = max(start, window_start), min(end, window_end)
+            if start < end:
+                yield (start, end)
+        day += timedelta(days=1)
+
+
+def intersect_intervals(first, second):
+    """
+    Two-pointer intersection of two sorted, non-overlapping interval sequences.
+    Works on lazy iterators so callers that only need a few slots stop early.
+    """
+    first, second = iter(first), iter(second)
+    a = next(first, None)
+    b = next(second, None)
+    while a is not None and b is not None:
+        start = max(a[0], b[0])
+        end = min(a[1], b[1])
+        if start < end:
+            yield (start, end)
+        if a[1] < b[1]:
+            a = next(first, None)
+        else:
+            b = next(second, None)
+
+
+def find_free_slots(time_min, time_max, busy_slots: list, duration_minutes: int = 60,
+                    count: int = None, tz_name: str = DEFAULT_TIMEZONE,
+                    work_start: time = DEFAULT_WORK_START, work_end: time = DEFAULT_WORK_END,
+                    weekdays=None) -> list:
+    """
+    Finds free slots of at least `duration_minutes` inside working hours.
+
+    Args:
+        time_min: Start of the query range (RFC 3339 string or aware datetime).
+        time_max: End of the query range (RFC 3339 string or aware datetime).
+        busy_slots (list): The 'busy' list from CalendarManager.get_free_busy_slots,
+                           e.g. [{'start': '2025-09-02T13:00:00Z', 'end': '2025-09-02T14:00:00Z'}].
+        duration_minutes (int): Minimum length of a slot.
+        count (int | None): Maximum number of slots to return. None returns every slot.
+        tz_name (str): Timezone used for working hours and for the returned times.
+        work_start (time): Start of the working day. Pass time(0) and time(0) for the whole day.
+        work_end (time): End of the working day.
+        weekdays (iterable | None): Allowed weekday numbers (Monday is 0).
+
+    Returns:
+        list[dict]: Free windows in chronological order, e.g.
+                    [{'start': '2025-09-02T09:00:00-05:00', 'end': '2025-09-02T13:00:00-05:00',
+                      'minutes': 240}]
+    """
+    window_start = to_timestamp(time_min)
+    window_end = to_timestamp(time_max)
+    if window_end <= window_start:
+        return []
+
+    merged = merge_intervals(busy_to_intervals(busy_slots))
+    gaps = compute_free_gaps(window_start, window_end, merged)
+    if work_start != work_end or weekdays is not None:
+        # Equal start/end means whole days, which only matters when weekdays are restricted.
+        gaps = intersect_intervals(gaps, working_windows(window_start, window_end, tz_name,
+                                                         work_start, work_end, weekdays))
+
+    min_length = duration_minutes * 60
+    tz = pytz.timezone(tz_name)
+    slots = []
+    for start, end in gaps:
+        if end - start < min_length:
+            continue
+        slots.append({
+            'start': datetime.fromtimestamp(start, tz).isoformat(),
+            'end': datetime.fromtimestamp(end, tz).isoformat(),
+            'minutes': int((end - start) // 60),
+        })
+        if count is not None and len(slots) >= count:
+            break
+    return slots
+
+
+def format_slot_suggestions(slots: list, duration_minutes: int = 60) -> str:
+    """
+    Formats slots the same way suggest_time's Gemini answer is laid out
+    ('a. ...', 'b. ...'), proposing the first `duration_minutes` of each slot.
+    """
+    lines = []
+    for index, slot in enumerate(slots):
+        start = datetime.fromisoformat(slot['start'])
+        end = start + timedelta(minutes=duration_minutes)
+        letter = chr(ord('a') + index) if index < 26 else str(index + 1)
+        lines.append(
+            f"{letter}. {start.strftime('%A %d %B, %Y')}: "
+            f"{start.strftime('%I:%M %p').lstrip('0')} - {end.strftime('%I:%M %p').lstrip('0')}"
+        )
+    return "\n".join(lines)
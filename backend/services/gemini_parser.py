@@ -1,20 +1,71 @@
 #Purpose: This module is responsible for all interactions with the Gemini AI API. 
 # Its primary job is to take raw, natural language text input from the user and convert it into structured data
 # (like a JSON object) that describes a calendar event.
+import asyncio
 import os
 import json
 import re
 from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
-import google.generativeai as genai
 import datetime as dt
 import pytz
+from services.recurring_planner import plan_recurring_schedule, DEFAULT_MIN_CHUNK_MINUTES, DEFAULT_MAX_CHUNK_MINUTES
+from services.response_cache import cache_from_env, make_key
+from services.streaming import split_lines, split_lines_async
+from services.metrics import timed, GEMINI_LATENCY, GEMINI_REQUESTS, GEMINI_IN_FLIGHT
+from services.rate_limiter import call_with_retry, call_with_retry_async, get_bucket
+
+# Weekly events made from "Every <day>" lines repeat for this many weeks, counted from their
+# first occurrence (RECURRING_EVENT_WEEKS; 0 means no end date).
+RECURRING_EVENT_WEEKS = int(os.getenv("RECURRING_EVENT_WEEKS", 26))
+
+
+def weekly_rrule(rrule_day, first_start, weeks=RECURRING_EVENT_WEEKS):
+    """
+    Builds the RRULE of a weekly event.
+
+    Args:
+        rrule_day (str): Two-letter RFC 5545 weekday, e.g. "MO".
+        first_start (datetime): Timezone-aware start of the first occurrence.
+        weeks (int): How many weeks the event repeats; 0 or less leaves out UNTIL.
+
+    Returns:
+        str: e.g. "RRULE:FREQ=WEEKLY;BYDAY=MO;UNTIL=20260420T045959Z".
+    """
+    rule = f"RRULE:FREQ=WEEKLY;BYDAY={rrule_day}"
+    if weeks <= 0:
+        return rule
+    # UNTIL has to be in UTC once the event has a timezone; it is inclusive, so one second
+    # before the start of week N keeps exactly `weeks` occurrences.
+    until = first_start.astimezone(timezone.utc) + timedelta(weeks=weeks) - timedelta(seconds=1)
+    return f"{rule};UNTIL={until.strftime('%Y%m%dT%H%M%SZ')}"
 
 
 #Key Functionality:
 class GeminiParser:
+    # Bump a version whenever its prompt text changes so cached answers for the old prompt are ignored.
+    PROMPT_VERSIONS = {
+        "parse_event_details": 1,
+        "suggest_time": 1,
+        "recurring_goal": 1,
+        "suggest_recurring_event": 1,
+        "planning_intent": 1,
+        "parse_event_details_batch": 1,
+    }
+
     #Loading the Gemini API key from .env.
-    def __init__(self):
+    def __init__(self, model=None):
+        """
+        Args:
+            model: Optional object with generate_content / generate_content_async (e.g.
+                   fakes.gemini.FakeGenerativeModel for offline load tests). When given,
+                   no API key is needed and the Gemini SDK is not loaded.
+        """
+        #Response cache (memory LRU + SQLite), None when disabled
+        self.cache = cache_from_env()
+        if model is not None:
+            self.model = model
+            return
         #look for .env file and load its variables
         load_dotenv()
         #retrieve API key
@@ -22,18 +73,78 @@ class GeminiParser:
         #if API key not found
         if not api_key:
             raise ValueError("\"GEMINI_API_KEY\" is not found in .env file")
+        #The Gemini SDK is slow to import, so it is only loaded when a parser is created
+        import google.generativeai as genai
         #present the API key to the google library to validate and allow you to usethe library
         genai.configure(api_key=api_key)
         #Initializing the GEmini model.
         self.model= genai.GenerativeModel('gemini-2.0-flash')
-    
-    def parse_event_details(self,user_input):
-        """This is the pace for your logic for interacting with the AI model
-         returns the json string """
-        now = dt.datetime.now()
-        current_date_str = now.strftime("%Y-%m-%d %H:%M:%S")
 
-        prompt = f"""
+    def _cache_key(self, kind, user_input, reference_date="", extra=None):
+        """Returns (key, cached_text); both None when caching is disabled."""
+        if self.cache is None:
+            return None, None
+        key = make_key(kind, user_input, self.PROMPT_VERSIONS[kind], reference_date, extra)
+        return key, self.cache.get(key)
+
+    async def _cache_key_async(self, kind, user_input, reference_date="", extra=None):
+        """_cache_key for coroutines: the SQLite lookup (and its lock) runs on a worker thread."""
+        if self.cache is None:
+            return None, None
+        return await asyncio.to_thread(self._cache_key, kind, user_input, reference_date, extra)
+
+    async def _cache_set_async(self, key, text):
+        """cache.set for coroutines, off the event loop."""
+        await asyncio.to_thread(self.cache.set, key, text)
+
+    def _generate_cached(self, kind, user_input, prompt, reference_date="", extra=None):
+        """
+        Returns the text of model.generate_content(prompt), answering from the
+        response cache when the same input was seen for the same prompt version and date.
+        Errors are not cached.
+        """
+        key, cached = self._cache_key(kind, user_input, reference_date, extra)
+        if cached is not None:
+            return cached
+        text = self._generate(kind, prompt)
+        if key is not None:
+            self.cache.set(key, text)
+        return text
+
+    async def _generate_cached_async(self, kind, user_input, prompt, reference_date="", extra=None):
+        """
+        Same as _generate_cached but awaits generate_content_async instead of blocking;
+        the cache's SQLite reads and writes run on a worker thread.
+        """
+        key, cached = await self._cache_key_async(kind, user_input, reference_date, extra)
+        if cached is not None:
+            return cached
+        text = await self._generate_async(kind, prompt)
+        if key is not None:
+            await self._cache_set_async(key, text)
+        return text
+
+    def _generate(self, kind, prompt):
+        """
+        The text of model.generate_content(prompt), under the Gemini rate limit and retried
+        on 429/5xx (services/rate_limiter.py). kind labels the call in /metrics.
+        """
+        return call_with_retry(lambda: self._generate_once(kind, prompt), "gemini")
+
+    async def _generate_async(self, kind, prompt):
+        return await call_with_retry_async(lambda: self._generate_once_async(kind, prompt), "gemini")
+
+    @timed(GEMINI_LATENCY, GEMINI_REQUESTS, GEMINI_IN_FLIGHT, labels=lambda self, kind, prompt: (kind,))
+    def _generate_once(self, kind, prompt):
+        return self.model.generate_content(prompt).text
+
+    @timed(GEMINI_LATENCY, GEMINI_REQUESTS, GEMINI_IN_FLIGHT, labels=lambda self, kind, prompt: (kind,))
+    async def _generate_once_async(self, kind, prompt):
+        response = await self.model.generate_content_async(prompt)
+        return response.text
+
+    def _parse_event_details_prompt(self, user_input):
+        return f"""
         **Role:** You are a Time Format Converter and Event Structuring Assistant.
         **Goal:** Your sole task is to take the user's input describing a task, event, and its time, and convert it into the precise output format: "**[Event Name] on [Day of Week]: [Start Time] - [End Time] ([Duration])**".
         **Constraints & Rules:**
@@ -48,16 +159,156 @@ class GeminiParser:
 **Your Output:** "Work out on Tuesday: 7:30 AM - 8:30 AM (1 hour)"
 **User Input:** "{user_input}"
 """
+
+    def parse_event_details(self,user_input):
+        """This is the pace for your logic for interacting with the AI model
+         returns the json string """
+        now = dt.datetime.now()
+        prompt = self._parse_event_details_prompt(user_input)
         try:
-            response = self.model.generate_content(prompt).text
+            response = self._generate_cached("parse_event_details", user_input, prompt,
+                                             reference_date=now.strftime("%Y-%m-%d"))
             #response should bee a json file
             # cleaned_response_text = response.text.strip("` \n")
             # cleaned_response_text = cleaned_response_text.replace("json\n", "", 1)
             return response
         except Exception as e:
             return f"Error interacting wih Gemini. Error: {e}"
+
+    async def parse_event_details_async(self, user_input):
+        """Non-blocking parse_event_details for the async server."""
+        now = dt.datetime.now()
+        prompt = self._parse_event_details_prompt(user_input)
+        try:
+            return await self._generate_cached_async("parse_event_details", user_input, prompt,
+                                                     reference_date=now.strftime("%Y-%m-%d"))
+        except Exception as e:
+            return f"Error interacting wih Gemini. Error: {e}"
+
+    def _parse_event_details_batch_prompt(self, user_inputs):
+        numbered = "\n".join(f"{index}. {text}" for index, text in enumerate(user_inputs, start=1))
+        return f"""
+        **Role:** You are a Time Format Converter and Event Structuring Assistant.
+        **Goal:** Convert EACH numbered user input below into one line, keeping its number.
+        **Constraints & Rules:**
+1.  One-off events use: `[Number]. [Event Name] on [Day of Week]: [Start Time] - [End Time] ([Duration])`.
+2.  Events that repeat every week use: `[Number]. [Event Name] Every [Day of Week]: [Start Time] - [End Time] ([Duration])`.
+    An input that repeats on several days gets one line per day, all with the same number.
+3.  Use 12-hour clock (AM/PM). Write `[Number]. UNKNOWN` when an input has no usable day or time.
+4.  Output only these lines, nothing else.
+
+**Example Input and Output:**
+
+**User Input:**
+1. I have to work out in the morning, starting Tuesday at 7:30 and finishing at 8:30.
+2. Calculus lectures Mondays and Wednesdays 10 to 11:15am
+**Your Output:**
+1. Work out on Tuesday: 7:30 AM - 8:30 AM (1 hour)
+2. Calculus lecture Every Monday: 10:00 AM - 11:15 AM (1 hour 15 minutes)
+2. Calculus lecture Every Wednesday: 10:00 AM - 11:15 AM (1 hour 15 minutes)
+
+**User Input:**
+{numbered}
+"""
+
+    @staticmethod
+    def _read_numbered_lines(response, count):
+        """Groups "N. text" lines of a batch answer by input: returns count lists of lines."""
+        grouped = [[] for _ in range(count)]
+        for line in response.strip("` \n").splitlines():
+            match = re.match(r"^\s*(\d+)[.)]\s*(.+?)\s*$", line)
+            if not match:
+                continue
+            index = int(match.group(1)) - 1
+            if 0 <= index < count and match.group(2).upper() != "UNKNOWN":
+                grouped[index].append(match.group(2))
+        return grouped
+
+    def parse_event_details_batch(self, user_inputs):
+        """
+        parse_event_details for many inputs with a single Gemini call.
+
+        Args:
+            user_inputs (list[str]): Free-text event descriptions.
+
+        Returns:
+            list[list[str]]: For each input, its structured lines
+                             ("Work out on Tuesday: 7:30 AM - 8:30 AM (1 hour)" or
+                             "... Every Monday: ..."); an empty list when it could not be parsed.
+        """
+        if not user_inputs:
+            return []
+        now = dt.datetime.now()
+        prompt = self._parse_event_details_batch_prompt(user_inputs)
+        try:
+            response = self._generate_cached("parse_event_details_batch", "\n".join(user_inputs), prompt,
+                                             reference_date=now.strftime("%Y-%m-%d"))
+        except Exception as e:
+            print(f"Error interacting wih Gemini. Error: {e}")
+            return [[] for _ in user_inputs]
+        return self._read_numbered_lines(response, len(user_inputs))
+
+    async def parse_event_details_batch_async(self, user_inputs):
+        """Non-blocking parse_event_details_batch for the async server."""
+        if not user_inputs:
+            return []
+        now = dt.datetime.now()
+        prompt = self._parse_event_details_batch_prompt(user_inputs)
+        try:
+            response = await self._generate_cached_async("parse_event_details_batch", "\n".join(user_inputs),
+                                                         prompt, reference_date=now.strftime("%Y-%m-%d"))
+        except Exception as e:
+            print(f"Error interacting wih Gemini. Error: {e}")
+            return [[] for _ in user_inputs]
+        return self._read_numbered_lines(response, len(user_inputs))
+
+    def _planning_intent_prompt(self, user_input):
+        return f"""
+        **Role:** You read scheduling requests.
+        **Goal:** Return ONLY a JSON object with the keys "summary" (short event name) and
+        "duration_minutes" (how long the event lasts, 60 if the user does not say).
+        Do not give any extra information.
+
+**User Input:** "{user_input}"
+"""
+
+    def _read_planning_intent(self, response):
+        cleaned_response_text = response.strip("` \n")
+        if cleaned_response_text.startswith("json"):
+            cleaned_response_text = cleaned_response_text[len("json"):]
+        intent = json.loads(cleaned_response_text)
+        return {
+            "summary": str(intent.get("summary") or "Event").strip(),
+            "duration_minutes": int(intent.get("duration_minutes") or 60),
+        }
+
+    def parse_planning_intent(self, user_input):
+        """
+        Reads what the user wants to plan, e.g. "find me 90 minutes for the dentist".
+
+        Returns:
+            dict | None: {"summary": "Dentist", "duration_minutes": 90}, or None on failure.
+        """
+        try:
+            response = self._generate_cached("planning_intent", user_input,
+                                             self._planning_intent_prompt(user_input))
+            return self._read_planning_intent(response)
+        except Exception as e:
+            print(f"Error reading planning intent: {e}")
+            return None
+
+    async def parse_planning_intent_async(self, user_input):
+        """Non-blocking parse_planning_intent for the async server."""
+        try:
+            response = await self._generate_cached_async("planning_intent", user_input,
+                                                         self._planning_intent_prompt(user_input))
+            return self._read_planning_intent(response)
+        except Exception as e:
+            print(f"Error reading planning intent: {e}")
+            return None
         
     def avaiable_models(self):
+        import google.generativeai as genai
         print("List of avilable models")
         lst = []
         try:
@@ -74,10 +325,7 @@ class GeminiParser:
             print(f"Error listing models: {e}")
             return []
         
-    def suggest_time(self, user_prompt, free_busy_data):
-        """
-        Generates scheduling suggestions based on user input and calendar availability.
-        """
+    def _suggest_time_prompt(self, user_prompt, free_busy_data):
         # Convert the free_busy_data into a string that's easy for the AI to understand.
         busy_slots_str = "I am busy during these times (UTC): "
         if free_busy_data and free_busy_data['busy']:
@@ -87,7 +335,7 @@ class GeminiParser:
             busy_slots_str += "I have no known busy times."
 
         # Craft the new prompt for Gemini.
-        prompt = (
+        return (
             f"The user wants to schedule an event. User request: '{user_prompt}'. "
             f"Here are my current busy times: {busy_slots_str} "
             "Please suggest 3 available times for the user's event."
@@ -97,16 +345,168 @@ class GeminiParser:
             
         )
 
+    def suggest_time(self, user_prompt, free_busy_data):
+        """
+        Generates scheduling suggestions based on user input and calendar availability.
+        """
+        prompt = self._suggest_time_prompt(user_prompt, free_busy_data)
+        try:
+            # The busy slots are part of the prompt, so they are part of the cache key too.
+            return self._generate_cached("suggest_time", user_prompt, prompt,
+                                         reference_date=dt.date.today().isoformat(),
+                                         extra=(free_busy_data or {}).get('busy'))
+        except Exception as e:
+            print(f"Error generating suggestions: {e}")
+            return None
+
+    async def suggest_time_async(self, user_prompt, free_busy_data):
+        """Non-blocking suggest_time for the async server."""
+        prompt = self._suggest_time_prompt(user_prompt, free_busy_data)
         try:
-            response = self.model.generate_content(prompt)
-            # Assuming the response is a JSON string, you'll need to parse it.
-            # Use a library like 'json' or 'json5' for robust parsing.
-            return response.text
+            return await self._generate_cached_async("suggest_time", user_prompt, prompt,
+                                                     reference_date=dt.date.today().isoformat(),
+                                                     extra=(free_busy_data or {}).get('busy'))
         except Exception as e:
             print(f"Error generating suggestions: {e}")
             return None
         
-    def suggest_recurring_event(self, user_prompt, free_busy_data):
+    def stream_suggest_time(self, user_prompt, free_busy_data):
+        """
+        Streaming suggest_time: yields each suggestion line ("a. ...", "b. ...") as soon as
+        Gemini has finished writing it, instead of waiting for the whole answer.
+        The full answer is cached like suggest_time's, so a repeated request replays it.
+        Unlike suggest_time, errors are raised (after the lines already yielded), so the
+        caller can tell a failed stream from one with no suggestions.
+        """
+        prompt = self._suggest_time_prompt(user_prompt, free_busy_data)
+        key, cached = self._cache_key("suggest_time", user_prompt, dt.date.today().isoformat(),
+                                      (free_busy_data or {}).get('busy'))
+        if cached is not None:
+            yield from split_lines([cached])
+            return
+        received = []
+
+        def chunks():
+            # Timed until the last chunk (or until the client goes away).
+            # A stream can't be replayed once lines went out, so it is rate limited but not retried.
+            get_bucket("gemini").acquire()
+            with GEMINI_LATENCY.labels("suggest_time_stream").time():
+                for chunk in self.model.generate_content(prompt, stream=True):
+                    received.append(chunk.text)
+                    yield chunk.text
+
+        try:
+            yield from split_lines(chunks())
+        except Exception as e:
+            # Re-raised so the streaming route can send its "error" event.
+            print(f"Error generating suggestions: {e}")
+            raise
+        if key is not None and received:
+            self.cache.set(key, "".join(received))
+
+    async def stream_suggest_time_async(self, user_prompt, free_busy_data):
+        """Async generator version of stream_suggest_time for the async server."""
+        prompt = self._suggest_time_prompt(user_prompt, free_busy_data)
+        key, cached = await self._cache_key_async("suggest_time", user_prompt, dt.date.today().isoformat(),
+                                                  (free_busy_data or {}).get('busy'))
+        if cached is not None:
+            for line in split_lines([cached]):
+                yield line
+            return
+        received = []
+
+        async def chunks():
+            await get_bucket("gemini").acquire_async()
+            with GEMINI_LATENCY.labels("suggest_time_stream").time():
+                response = await self.model.generate_content_async(prompt, stream=True)
+                async for chunk in response:
+                    received.append(chunk.text)
+                    yield chunk.text
+
+        try:
+            async for line in split_lines_async(chunks()):
+                yield line
+        except Exception as e:
+            # Re-raised so the streaming route can send its "error" event.
+            print(f"Error generating suggestions: {e}")
+            raise
+        if key is not None and received:
+            await self._cache_set_async(key, "".join(received))
+
+    def extract_recurring_goal(self, user_prompt):
+        """
+        Asks Gemini only for the goal behind a recurring request, e.g.
+        "I want to spend 4 hours a week making lemonade. My Tuesdays and Thursdays are free enough."
+
+        Returns:
+            dict | None: {"summary": "Lemonade making", "weekly_hours": 4,
+                          "preferred_days": ["Tuesday", "Thursday"],
+                          "min_chunk_minutes": 15, "max_chunk_minutes": 420}
+                         or None if the answer could not be understood.
+        """
+        prompt = f"""
+        **Role:** You extract scheduling goals from a user's request.
+        **Goal:** Return ONLY a JSON object with these keys:
+        "summary" (short event name), "weekly_hours" (number of hours per week),
+        "preferred_days" (list of full English day names the user prefers, empty if none),
+        "min_chunk_minutes" (shortest session the user accepts, default {DEFAULT_MIN_CHUNK_MINUTES}),
+        "max_chunk_minutes" (longest session the user accepts, default {DEFAULT_MAX_CHUNK_MINUTES}).
+        Do not give any extra information.
+
+**User Input:** "{user_prompt}"
+"""
+        try:
+            # The goal does not depend on the current date, so no reference date in the key.
+            response = self._generate_cached("recurring_goal", user_prompt, prompt)
+            cleaned_response_text = response.strip("` \n")
+            if cleaned_response_text.startswith("json"):
+                cleaned_response_text = cleaned_response_text[len("json"):]
+            goal = json.loads(cleaned_response_text)
+            goal["weekly_hours"] = float(goal["weekly_hours"])
+            goal["summary"] = str(goal.get("summary") or "Event").strip()
+            goal["preferred_days"] = list(goal.get("preferred_days") or [])
+            goal["min_chunk_minutes"] = int(goal.get("min_chunk_minutes") or DEFAULT_MIN_CHUNK_MINUTES)
+            goal["max_chunk_minutes"] = int(goal.get("max_chunk_minutes") or DEFAULT_MAX_CHUNK_MINUTES)
+            return goal
+        except Exception as e:
+            print(f"Error extracting recurring goal: {e}")
+            return None
+
+    def suggest_recurring_event(self, user_prompt, free_busy_data, time_min=None, time_max=None):
+        """
+        Suggests weekly slots for a recurring event.
+
+        Gemini is only used to read the goal (event name, hours per week, preferred days);
+        the chunks are packed locally around the busy times by services.recurring_planner.
+
+        Args:
+            user_prompt (str): The user's request.
+            free_busy_data (dict): Output of CalendarManager.get_free_busy_slots.
+            time_min / time_max (str): The range free_busy_data was fetched for
+                                       (defaults to the next 7 days).
+
+        Returns:
+            str: Lines like "Gaming event Every Monday: 8:00 PM - 10:00 PM (2 hours)", or None.
+        """
+        goal = self.extract_recurring_goal(user_prompt)
+        if goal is None:
+            return self._suggest_recurring_event_llm(user_prompt, free_busy_data)
+
+        if time_min is None or time_max is None:
+            now = datetime.now(timezone.utc)
+            time_min = now.strftime("%Y-%m-%dT%H:%M:%SZ")
+            time_max = (now + timedelta(days=7)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        busy_slots = (free_busy_data or {}).get('busy', [])
+        suggestions = plan_recurring_schedule(
+            goal["summary"], goal["weekly_hours"], time_min, time_max, busy_slots,
+            preferred_days=goal["preferred_days"],
+            min_chunk=goal["min_chunk_minutes"], max_chunk=goal["max_chunk_minutes"],
+        )
+        return suggestions or None
+
+    def _suggest_recurring_event_llm(self, user_prompt, free_busy_data):
+        """Previous LLM-only planner, kept as a fallback when the goal cannot be extracted."""
          # Convert the free_busy_data into a string that's easy for the AI to understand.
         busy_slots_str = "I am busy during these times (UTC): "
         if free_busy_data and free_busy_data['busy']:
@@ -152,10 +552,9 @@ class GeminiParser:
         # , which is UTC-5". 
         # return the users busy times in natural language """
         try:
-            response = self.model.generate_content(prompt)
-            # Assuming the response is a JSON string, you'll need to parse it.
-            # Use a library like 'json' or 'json5' for robust parsing.
-            return response.text
+            return self._generate_cached("suggest_recurring_event", user_prompt, prompt,
+                                         reference_date=dt.date.today().isoformat(),
+                                         extra=(free_busy_data or {}).get('busy'))
         except Exception as e:
             print(f"Error generating suggestions: {e}")
             return None
@@ -180,8 +579,6 @@ class GeminiParser:
             "Sunday": "SU"
         }
 
-        rrule_until = "20251231T235959Z"
-
         lines = user_input.strip().split('\n')
 
         pattern = re.compile(
@@ -231,9 +628,9 @@ class GeminiParser:
                 print(f"Error parsing time: {e}")
                 continue
             
-            # Create datetime objects with Chicago timezone
-            start_datetime = datetime.combine(next_occurrence, start_time_obj, tzinfo=tz)
-            end_datetime = datetime.combine(next_occurrence, end_time_obj, tzinfo=tz)
+            # Create datetime objects with Chicago timezone (localize, so the offset is -06:00/-05:00, not LMT)
+            start_datetime = tz.localize(datetime.combine(next_occurrence, start_time_obj))
+            end_datetime = tz.localize(datetime.combine(next_occurrence, end_time_obj))
             
             # Format in RFC3339 format (required by Google Calendar)
             # Format: 2025-12-08T20:00:00-06:00
@@ -245,7 +642,7 @@ class GeminiParser:
             iso_start_time = iso_start_time[:-2] + ':' + iso_start_time[-2:]
             iso_end_time = iso_end_time[:-2] + ':' + iso_end_time[-2:]
             
-            recurrence_rule = f"RRULE:FREQ=WEEKLY;BYDAY={rrule_day};UNTIL={rrule_until}"
+            recurrence_rule = weekly_rrule(rrule_day, start_datetime)
             
             event_dict = {
                 "summary": summary,
@@ -270,6 +667,27 @@ class GeminiParser:
             events.append(event_dict)
 
         return events
+    def parse_event_lines(self, lines):
+        """
+        Turns structured lines into Google Calendar event dicts in one pass:
+        "... Every Monday: ..." lines become weekly events (parse_event_details_1),
+        "... on Monday: ..." lines single events (parse_event_line).
+
+        Args:
+            lines (list[str]): Structured lines as produced by parse_event_details(_batch).
+
+        Returns:
+            list[dict | None]: One event dict per line, None where the line did not parse.
+        """
+        events = []
+        for line in lines:
+            if re.search(r"\bEvery\s+\w+:", line, re.IGNORECASE):
+                parsed = self.parse_event_details_1(line)
+                events.append(parsed[0] if parsed else None)
+            else:
+                events.append(self.parse_event_line(line) or None)
+        return events
+
     def parse_recurring_event_line(self,user_input):
         """
         Parses a structured event string and converts it into a list of
@@ -280,7 +698,7 @@ class GeminiParser:
                             e.g., "Gaming event Every Monday: 8:00 PM - 10:00 PM (2 hours)".
 
         Returns:
-            list[dict]: A list of dictionaries formatted for Google Calendar API.
+            dict: The weekly event formatted for Google Calendar API, or None.
         """
         events = []
         
@@ -290,8 +708,6 @@ class GeminiParser:
             "Sunday": "SU"
         }
 
-        rrule_until = "20251231T235959Z"
-
         line = user_input.strip()
         pattern = re.compile(
             r"^(.*)Every (\w+):\s*(\d{1,2}:\d{2}\s*[AP]M)\s*-\s*(\d{1,2}:\d{2}\s*[AP]M).*$",
@@ -333,9 +749,9 @@ class GeminiParser:
             print(f"Error parsing time: {e}")
             return
         
-        # Create datetime objects with Chicago timezone
-        start_datetime = datetime.combine(next_occurrence, start_time_obj, tzinfo=tz)
-        end_datetime = datetime.combine(next_occurrence, end_time_obj, tzinfo=tz)
+        # Create datetime objects with Chicago timezone (localize, so the offset is -06:00/-05:00, not LMT)
+        start_datetime = tz.localize(datetime.combine(next_occurrence, start_time_obj))
+        end_datetime = tz.localize(datetime.combine(next_occurrence, end_time_obj))
         
         # Format in RFC3339 format (required by Google Calendar)
         # Format: 2025-12-08T20:00:00-06:00
@@ -347,7 +763,7 @@ class GeminiParser:
         iso_start_time = iso_start_time[:-2] + ':' + iso_start_time[-2:]
         iso_end_time = iso_end_time[:-2] + ':' + iso_end_time[-2:]
         
-        recurrence_rule = f"RRULE:FREQ=WEEKLY;BYDAY={rrule_day};UNTIL={rrule_until}"
+        recurrence_rule = weekly_rrule(rrule_day, start_datetime)
         
         event_dict = {
             "summary": summary,
@@ -362,6 +778,7 @@ class GeminiParser:
             },
             "recurrence": [recurrence_rule]
         }
+        return event_dict
     def parse_event_line(self, user_input):
         """
         Parses a structured event string and converts it into a list of
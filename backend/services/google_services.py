@@ -0,0 +1,225 @@
+# Purpose: Shared, thread-safe access to Google API clients (Calendar v3, Tasks v1).
+#
+# googleapiclient Resources sit on top of httplib2, which is not thread-safe, so one Resource
+# must never be shared between Flask threads (or the async server's I/O threads).
+# The pool keeps:
+#   - one set of credentials per token file, refreshed once under a lock and shared,
+#   - one parsed discovery document per API (the static copy bundled with googleapiclient),
+#     shared by every client,
+#   - one authorized httplib2 session (+ Resource) per thread, which keeps its
+#     connections alive so calls from the same thread reuse the TLS connection.
+# The Flask development server (and other thread-per-request servers) start a new thread for
+# every request, so when a thread ends its clients go back to the pool and the next new thread
+# takes them over, connections included. A client is still only ever used by one live thread.
+import json
+import os
+import threading
+import weakref
+from datetime import datetime, timedelta
+import httplib2
+from services.metrics import timed, GOOGLE_LATENCY, GOOGLE_REQUESTS
+from services.rate_limiter import call_with_retry, is_idempotent_request
+# google.auth's requests transport, the OAuth flow and the discovery builder are imported
+# inside the functions that need them; together they dominate the import time of app.py.
+
+SCOPES = ["https://www.googleapis.com/auth/calendar", 'https://www.googleapis.com/auth/tasks']
+DEFAULT_TOKEN_PATH = "backend/token.json"
+DEFAULT_CLIENT_SECRETS = "C:/Users/Temidayo Adeaga/Documents/Work/AI planer/venv/backend/services/credentials.json"
+HTTP_TIMEOUT_SECONDS = 60
+DISCOVERY_URI = "https://www.googleapis.com/discovery/v1/apis/{api}/{version}/rest"
+# Sends every Calendar/Tasks call (batches included) to another server, e.g. the local
+# stand-in in fakes/google_server.py: GOOGLE_API_ROOT=http://127.0.0.1:8089/
+# Such servers don't check tokens, so no OAuth credentials are loaded in that mode.
+GOOGLE_API_ROOT_ENV = "GOOGLE_API_ROOT"
+# Refresh a little before the access token actually expires.
+REFRESH_MARGIN = timedelta(minutes=5)
+
+
+def load_credentials(token_path: str = DEFAULT_TOKEN_PATH, client_secrets: str = DEFAULT_CLIENT_SECRETS,
+                     scopes: list = SCOPES, allow_browser_flow: bool = True):
+    """
+    Loads the user's OAuth credentials from token_path, refreshing or running the
+    browser flow when needed, and saves the result back to token_path.
+    """
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    creds = None
+    # Check if token.json already exists
+    if os.path.exists(token_path):
+        creds = Credentials.from_authorized_user_file(token_path, scopes)
+
+    # If no valid credentials or expired, initiate the OAuth flow
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            creds.refresh(Request()) # Refresh token if expired
+        elif allow_browser_flow:
+            # This is the part that triggers the browser for initial authorization
+            from google_auth_oauthlib.flow import InstalledAppFlow
+            flow = InstalledAppFlow.from_client_secrets_file(client_secrets, scopes)
+            creds = flow.run_local_server(port=0) # This opens the browser
+        else:
+            raise FileNotFoundError(f"No usable token at {token_path}")
+        # Save the new/refreshed credentials
+        with open(token_path, "w") as token:
+            token.write(creds.to_json())
+    return creds
+
+
+_request_classes = {}
+_request_classes_lock = threading.Lock()
+
+
+def instrumented_request_class(quota_user: str = "default"):
+    """
+    googleapiclient's HttpRequest with execute() going through the client-side rate limiter
+    of its API (services/rate_limiter.py: token bucket, retries with backoff on 429, and on 5xx
+    unless the call is a non-idempotent insert) and
+    timed per attempt and API method (calendar.freebusy.query, tasks.tasks.get, ...).
+    One class per quota user; built on first use, like the rest of googleapiclient.
+    """
+    with _request_classes_lock:
+        request_class = _request_classes.get(quota_user)
+        if request_class is None:
+            from googleapiclient.http import HttpRequest
+
+            class InstrumentedHttpRequest(HttpRequest):
+                def execute(self, *args, **kwargs):
+                    return call_with_retry(lambda: self._execute_once(*args, **kwargs),
+                                           self.methodId.split(".")[0], self.quota_user,
+                                           idempotent=is_idempotent_request(self))
+
+                @timed(GOOGLE_LATENCY, GOOGLE_REQUESTS, labels=lambda self, *args, **kwargs: (self.methodId,))
+                def _execute_once(self, *args, **kwargs):
+                    return HttpRequest.execute(self, *args, **kwargs)
+
+            InstrumentedHttpRequest.quota_user = quota_user
+            request_class = _request_classes[quota_user] = InstrumentedHttpRequest
+        return request_class
+
+
+class GoogleServicePool:
+    """
+    Hands out per-thread Google API Resources that share credentials and discovery documents.
+
+    Args:
+        token_path (str): The token.json holding the user's authorized credentials.
+        client_secrets (str): OAuth client file used when the browser flow is needed.
+        api_root (str): Optional root URL replacing https://www.googleapis.com/ and
+                        https://tasks.googleapis.com/ (defaults to $GOOGLE_API_ROOT).
+    """
+
+    def __init__(self, token_path: str = DEFAULT_TOKEN_PATH, client_secrets: str = DEFAULT_CLIENT_SECRETS,
+                 api_root: str = None):
+        self.token_path = token_path
+        self.client_secrets = client_secrets
+        self.api_root = api_root or os.getenv(GOOGLE_API_ROOT_ENV)
+        if self.api_root and not self.api_root.endswith("/"):
+            self.api_root += "/"
+        self._credentials = None
+        self._credentials_lock = threading.Lock()
+        self._documents = {}
+        self._documents_lock = threading.Lock()
+        self._local = threading.local()
+        # Clients of threads that have ended, waiting for a new thread to take them over.
+        self._idle = []
+        self._idle_lock = threading.Lock()
+
+    @property
+    def credentials(self):
+        """The shared credentials, loaded on first use and refreshed once for everyone."""
+        with self._credentials_lock:
+            if self._credentials is None and self.api_root:
+                from google.auth.credentials import AnonymousCredentials
+                self._credentials = AnonymousCredentials()
+            elif self._credentials is None:
+                self._credentials = load_credentials(self.token_path, self.client_secrets)
+            elif self._needs_refresh(self._credentials):
+                from google.auth.transport.requests import Request
+                self._credentials.refresh(Request())
+                with open(self.token_path, "w") as token:
+                    token.write(self._credentials.to_json())
+            return self._credentials
+
+    @staticmethod
+    def _needs_refresh(creds) -> bool:
+        if not creds.valid:
+            return True
+        if creds.expiry is None:
+            return False
+        return datetime.utcnow() + REFRESH_MARGIN >= creds.expiry
+
+    def discovery_document(self, api: str, version: str) -> dict:
+        """
+        Parses the discovery document of an API once per process.
+        The static copies bundled with googleapiclient (calendar v3, tasks v1, ...) are used
+        first so startup needs no network; other APIs are fetched over HTTP.
+        """
+        key = (api, version)
+        with self._documents_lock:
+            if key not in self._documents:
+                from googleapiclient.discovery_cache import get_static_doc
+                content = get_static_doc(api, version)
+                if content is None:
+                    response, content = httplib2.Http(timeout=HTTP_TIMEOUT_SECONDS).request(
+                        DISCOVERY_URI.format(api=api, version=version))
+                    if response.status != 200:
+                        raise RuntimeError(f"Could not fetch discovery document for {api} {version}: {response.status}")
+                document = json.loads(content)
+                if self.api_root:
+                    # rootUrl drives both the method URLs and the batch endpoint.
+                    document.pop("mtlsRootUrl", None)
+                    document["rootUrl"] = self.api_root
+                    document["baseUrl"] = self.api_root + document.get("servicePath", "")
+                self._documents[key] = document
+            return self._documents[key]
+
+    def get(self, api: str, version: str):
+        """
+        Returns this thread's Resource for api/version, building it on first use.
+        The call also makes sure the shared credentials are fresh.
+        """
+        creds = self.credentials
+        services = self._thread_services()
+        key = (api, version)
+        service = services.get(key)
+        if service is None:
+            from google_auth_httplib2 import AuthorizedHttp
+            from googleapiclient.discovery import build_from_document
+            http = AuthorizedHttp(creds, http=httplib2.Http(timeout=HTTP_TIMEOUT_SECONDS))
+            service = build_from_document(self.discovery_document(api, version), http=http,
+                                          requestBuilder=instrumented_request_class(self.token_path))
+            services[key] = service
+        return service
+
+    def _thread_services(self) -> dict:
+        """This thread's {(api, version): Resource}, taken over from an ended thread when possible."""
+        services = getattr(self._local, "services", None)
+        if services is None:
+            with self._idle_lock:
+                services = self._idle.pop() if self._idle else {}
+            self._local.services = services
+            # Hand the clients back once the thread is gone (its Thread object is collected).
+            weakref.finalize(threading.current_thread(), self._release, services)
+        return services
+
+    def _release(self, services: dict):
+        with self._idle_lock:
+            self._idle.append(services)
+
+    def calendar(self):
+        return self.get("calendar", "v3")
+
+    def tasks(self):
+        return self.get("tasks", "v1")
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_service_pool(token_path: str = DEFAULT_TOKEN_PATH, client_secrets: str = DEFAULT_CLIENT_SECRETS) -> GoogleServicePool:
+    """Returns the process-wide pool for a token file."""
+    with _pools_lock:
+        if token_path not in _pools:
+            _pools[token_path] = GoogleServicePool(token_path, client_secrets)
+        return _pools[token_path]
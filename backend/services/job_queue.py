@@ -0,0 +1,253 @@
+# Purpose: Durable background jobs for slow requests (Gemini parse + Calendar insert).
+# A route enqueues a job and answers 202 with its id right away; a bounded pool of worker
+# threads runs the job and the client polls /jobs/<id> for the status and result.
+#
+# Jobs live in a SQLite table (WAL mode), so queued work survives a restart. Several processes
+# may share one database file. A worker claims a job inside an IMMEDIATE transaction and holds
+# a lease on it, which a heartbeat thread renews while the job runs. A job whose lease expired
+# (its process died) is claimed again by any worker; a job that is still being worked on is
+# never taken from its owner.
+#
+# Settings (environment variables):
+#     JOB_QUEUE_PATH          database file (default services/jobs.sqlite3)
+#     JOB_WORKERS             worker threads (default 4; 0 only enqueues, for web processes
+#                             that leave the work to another process sharing the file)
+#     JOB_QUEUE_MAX_PENDING   queued jobs accepted before enqueue refuses (default 1000)
+#     JOB_MAX_ATTEMPTS        runs per job, counting restarts mid-run (default 3)
+#     JOB_RETENTION_SECONDS   how long finished jobs stay readable (default 1 day)
+#     JOB_LEASE_SECONDS       how long a running job stays claimed without a heartbeat (default 30)
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+DEFAULT_QUEUE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs.sqlite3")
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_PENDING = 1000
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETENTION_SECONDS = 24 * 60 * 60
+DEFAULT_LEASE_SECONDS = 30.0
+# Workers also look for jobs enqueued by other processes this often.
+POLL_SECONDS = 1.0
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+class QueueFull(Exception):
+    """Raised by enqueue when JOB_QUEUE_MAX_PENDING jobs are already waiting."""
+
+
+class JobQueue:
+    """
+    Args:
+        db_path (str): SQLite file holding the jobs.
+        workers (int): Number of worker threads.
+        max_pending (int): Queued jobs accepted before enqueue raises QueueFull.
+        max_attempts (int): A job interrupted this many times is marked failed.
+        retention_seconds (float): Finished jobs older than this are deleted.
+        lease_seconds (float): A running job is claimable again once its owner has not renewed
+                               the lease for this long. Heartbeats go out every third of it.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_QUEUE_PATH, workers: int = DEFAULT_WORKERS,
+                 max_pending: int = DEFAULT_MAX_PENDING, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 retention_seconds: float = DEFAULT_RETENTION_SECONDS,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self.lease_seconds = lease_seconds
+        # Identifies this queue's workers in the owner column of the jobs they run.
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handlers = {}
+        self._threads = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._stopping = False
+        self._stopped = threading.Event()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL,"
+            " status TEXT NOT NULL, result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL, updated_at REAL NOT NULL, owner TEXT, lease_until REAL)"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        for column, column_type in (("owner", "TEXT"), ("lease_until", "REAL")):
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    def register(self, kind: str, handler):
+        """handler(payload: dict) -> JSON-serializable result; raising marks the job failed."""
+        self._handlers[kind] = handler
+
+    def start(self):
+        """
+        Starts the workers and the lease heartbeat (once). Jobs left running by a process that
+        died are picked up by the workers when their lease expires.
+        """
+        with self._lock:
+            if self._threads or self.workers <= 0:
+                return self
+            for number in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{number}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            heartbeat = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+            heartbeat.start()
+            self._threads.append(heartbeat)
+        return self
+
+    def stop(self, timeout: float = None):
+        """Lets the workers finish their current job and exit."""
+        self._stopping = True
+        self._stopped.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def enqueue(self, kind: str, payload: dict) -> str:
+        """
+        Stores a job and wakes a worker.
+
+        Returns:
+            str: The job id.
+
+        Raises:
+            QueueFull: Too many jobs are waiting already.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind {kind!r}")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            pending = self._db.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+            if pending >= self.max_pending:
+                raise QueueFull(f"{pending} jobs are already waiting")
+            self._db.execute(
+                "INSERT INTO jobs (id, kind, payload, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), QUEUED, now, now),
+            )
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id: str):
+        """The job as a dict (id, kind, status, result, error, attempts, timestamps), or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, kind, status, result, error, attempts, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0], "kind": row[1], "status": row[2],
+            "result": json.loads(row[3]) if row[3] is not None else None,
+            "error": row[4], "attempts": row[5], "created_at": row[6], "updated_at": row[7],
+        }
+
+    def _claim(self):
+        """
+        Takes the oldest job that is queued, or running under an expired lease, marks it as
+        running under this queue's lease and returns (id, kind, payload, attempts), or None.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._db.execute(
+                    "SELECT id, kind, payload, attempts FROM jobs"
+                    " WHERE status = ? OR (status = ? AND (lease_until IS NULL OR lease_until < ?))"
+                    " ORDER BY created_at LIMIT 1",
+                    (QUEUED, RUNNING, now),
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, owner = ?, lease_until = ?,"
+                        " updated_at = ? WHERE id = ?",
+                        (RUNNING, self.owner, now + self.lease_seconds, now, row[0]),
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2]), row[3] + 1
+
+    def _finish(self, job_id: str, status: str, result=None, error: str = None):
+        """Records the outcome, unless the lease was lost and another worker owns the job now."""
+        now = time.time()
+        with self._lock:
+            updated = self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, lease_until = NULL, updated_at = ?"
+                " WHERE id = ? AND owner = ? AND status = ?",
+                (status, json.dumps(result, default=str) if result is not None else None, error, now,
+                 job_id, self.owner, RUNNING),
+            ).rowcount
+            if not updated:
+                print(f"[JOB_QUEUE] Lost the lease on job {job_id}; its outcome was not recorded")
+            self._db.execute("DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                             (SUCCEEDED, FAILED, now - self.retention_seconds))
+
+    def _heartbeat(self):
+        """Renews the leases of the jobs this queue is running until it stops."""
+        while not self._stopping:
+            try:
+                with self._lock:
+                    self._db.execute("UPDATE jobs SET lease_until = ? WHERE owner = ? AND status = ?",
+                                     (time.time() + self.lease_seconds, self.owner, RUNNING))
+            except sqlite3.Error as e:
+                print(f"[JOB_QUEUE] Could not renew job leases: {e}")
+            self._stopped.wait(self.lease_seconds / 3)
+
+    def _work(self):
+        while not self._stopping:
+            try:
+                job = self._claim()
+            except sqlite3.Error as e:
+                print(f"[JOB_QUEUE] Could not claim a job: {e}")
+                job = None
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(POLL_SECONDS)
+                continue
+            job_id, kind, payload, attempts = job
+            if attempts > self.max_attempts:
+                self._finish(job_id, FAILED, error=f"Gave up after {self.max_attempts} interrupted attempts")
+                continue
+            try:
+                result = self._handlers[kind](payload)
+            except Exception as e:
+                print(f"[JOB_QUEUE] Job {job_id} ({kind}) failed: {e}")
+                self._finish(job_id, FAILED, error=str(e))
+            else:
+                self._finish(job_id, SUCCEEDED, result=result)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """The process-wide queue, configured from the environment (workers are not started here)."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(
+                db_path=os.getenv("JOB_QUEUE_PATH", DEFAULT_QUEUE_PATH),
+                workers=int(os.getenv("JOB_WORKERS", DEFAULT_WORKERS)),
+                max_pending=int(os.getenv("JOB_QUEUE_MAX_PENDING", DEFAULT_MAX_PENDING)),
+                max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)),
+                retention_seconds=float(os.getenv("JOB_RETENTION_SECONDS", DEFAULT_RETENTION_SECONDS)),
+                lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", DEFAULT_LEASE_SECONDS)),
+            )
+        return _queue
@@ -0,0 +1,35 @@
+# Purpose: Deferred construction of expensive module-level objects.
+# app.py used to build CalendarManager and GeminiParser at import time, which imported the
+# Gemini SDK and could even open the OAuth browser flow before the server was listening.
+# LazyInstance keeps the familiar `cal.add_event(...)` call sites but only builds the
+# object on first use.
+import threading
+
+
+class LazyInstance:
+    """
+    Proxy that calls factory() the first time an attribute is used and forwards
+    every attribute access to the result. Construction happens once, even when
+    several request threads hit it at the same time.
+    """
+
+    def __init__(self, factory, *args, **kwargs):
+        self._factory = factory
+        self._args = args
+        self._kwargs = kwargs
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get_instance(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory(*self._args, **self._kwargs)
+        return self._instance
+
+    @property
+    def is_built(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        return getattr(self.get_instance(), name)
@@ -0,0 +1,124 @@
+# Purpose: Durable store for TaskManager's task <-> event links and sync checkpoints.
+# linked_tasks used to be one JSON file rewritten in full after every change, which gets slow
+# once a user has tens of thousands of links and loses everything if the process dies halfway
+# through a write. Here every change is a small SQLite transaction in WAL mode: adding or
+# removing a link touches one row, a crash leaves the last committed state, and links can be
+# looked up by task id (primary key) or by event id (index) without loading them all.
+#
+# An existing linked_tasks.json is imported the first time the store is opened.
+#
+# This is TaskManager's only record of its links: creation, synchronization and delete_task
+# all read and write here. The product_mappings collection in Essentials/db.py is not consulted.
+import json
+import os
+import sqlite3
+import threading
+
+
+class LinkStore:
+    """
+    Args:
+        db_path (str): SQLite file holding the links.
+        legacy_json_path (str): Optional linked_tasks.json to import when the store is empty.
+    """
+
+    def __init__(self, db_path: str, legacy_json_path: str = None):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Commits reach the disk before put/remove return, so an acknowledged link is never lost.
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS links ("
+            " task_id TEXT PRIMARY KEY, event_id TEXT NOT NULL,"
+            " calendar_id TEXT NOT NULL, task_list_id TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS links_event_id ON links (event_id)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS sync_state (task_list_id TEXT PRIMARY KEY, updated_min TEXT NOT NULL)")
+        if legacy_json_path:
+            self._import_json(legacy_json_path)
+
+    def _import_json(self, path: str):
+        """Copies {task_id: {event_id, calendar_id, task_list_id}} from the old JSON file, once."""
+        if not os.path.exists(path) or self.count():
+            return
+        try:
+            with open(path, 'r') as f:
+                links = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not import links from {path}: {e}")
+            return
+        self.put_many(links)
+        print(f"Imported {len(links)} links from {path} into {self.db_path}.")
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM links").fetchone()[0]
+
+    def load_all(self) -> dict:
+        """Every link as {task_id: {event_id, calendar_id, task_list_id}}."""
+        with self._lock:
+            rows = self._db.execute("SELECT task_id, event_id, calendar_id, task_list_id FROM links").fetchall()
+        return {task_id: {'event_id': event_id, 'calendar_id': calendar_id, 'task_list_id': task_list_id}
+                for task_id, event_id, calendar_id, task_list_id in rows}
+
+    def get(self, task_id: str):
+        """The link of one task, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT event_id, calendar_id, task_list_id FROM links WHERE task_id = ?",
+                                   (task_id,)).fetchone()
+        if row is None:
+            return None
+        return {'event_id': row[0], 'calendar_id': row[1], 'task_list_id': row[2]}
+
+    def find_task_by_event(self, event_id: str):
+        """The id of the task linked to an event, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT task_id FROM links WHERE event_id = ?", (event_id,)).fetchone()
+        return row[0] if row else None
+
+    def put_many(self, links: dict):
+        """Adds or replaces {task_id: link_info} links in one transaction."""
+        rows = [(task_id, info['event_id'], info['calendar_id'], info['task_list_id'])
+                for task_id, info in links.items()]
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany("INSERT OR REPLACE INTO links (task_id, event_id, calendar_id, task_list_id)"
+                                     " VALUES (?, ?, ?, ?)", rows)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def remove_many(self, task_ids):
+        """Deletes the links of these tasks (unknown ids are ignored) in one transaction."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany("DELETE FROM links WHERE task_id = ?", [(task_id,) for task_id in task_ids])
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def load_sync_state(self) -> dict:
+        """{task_list_id: updatedMin high-water mark} of the last synchronization."""
+        with self._lock:
+            return dict(self._db.execute("SELECT task_list_id, updated_min FROM sync_state").fetchall())
+
+    def save_sync_state(self, marks: dict):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany("INSERT OR REPLACE INTO sync_state (task_list_id, updated_min) VALUES (?, ?)",
+                                     list(marks.items()))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        with self._lock:
+            self._db.close()
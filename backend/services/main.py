@@ -148,7 +148,8 @@ def plan_recurring_event(user_input, gemini_parser, calender_manager):
         free_busy_data = calender_manager.get_free_busy_slots(now_utc, week_from_now_utc)
         
         # 3. Call the new GeminiParser method.
-        suggestions_str = gemini_parser.suggest_recurring_event(user_input, free_busy_data)
+        suggestions_str = gemini_parser.suggest_recurring_event(user_input, free_busy_data,
+                                                                now_utc, week_from_now_utc)
         
         if suggestions_str:
             # suggestions_data = json.loads(suggestions_json_str)
@@ -183,7 +184,8 @@ def main():
 
     free = cal.get_free_busy_slots(now_utc, week_from_now_utc)
 
-    print(gem.suggest_recurring_event("I want to spend 4 hours a week making lemonade. My Tuesdays and Thursdays are free enough.", free))
+    print(gem.suggest_recurring_event("I want to spend 4 hours a week making lemonade. My Tuesdays and Thursdays are free enough.", free,
+                                      now_utc, week_from_now_utc))
 
 
 
@@ -0,0 +1,357 @@
+# Purpose: Process-wide metrics in the Prometheus text format, served at /metrics by both apps.
+#
+# Dependency-free counters, gauges and histograms (thread-safe), plus decorators that time
+# the calls worth watching:
+#     http_requests_total / http_request_duration_seconds / http_requests_in_flight   per route
+#     gemini_requests_total / gemini_request_duration_seconds                        per prompt kind
+#     google_api_requests_total / google_api_request_duration_seconds                per API method
+#     mongo_operations_total / mongo_operation_duration_seconds                      per db.py function
+#     cache_requests_total / cache_hit_ratio                                         per cache
+# Every metric lives in this module's REGISTRY; render() writes them all.
+import functools
+import inspect
+import math
+import threading
+import time
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds; spans cache hits (~1 ms) to slow Gemini answers (tens of seconds).
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REGISTRY = []
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Shared parts of the metric types: name, help text, label names and one child per label set."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def labels(self, *values, **named):
+        """The child for one combination of label values (created on first use)."""
+        if named:
+            values = tuple(named[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self):
+        """(suffix, label values, extra labels, value) for every series."""
+        raise NotImplementedError
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, values, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, values, extra)} {_format_value(value)}")
+        return lines
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = float(value)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            yield "_total" if not self.name.endswith("_total") else "", values, (), child.value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), function=None):
+        """function, when given, returns {label values tuple: value} at render time."""
+        super().__init__(name, documentation, labelnames)
+        self._function = function
+
+    def _new_child(self):
+        return _Value()
+
+    def samples(self):
+        items = self._function().items() if self._function else \
+            ((values, child.value) for values, child in list(self._children.items()))
+        for values, value in items:
+            yield "", values, (), value
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.sum += value
+            self.count += 1
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[index] += 1
+                    break
+
+    def time(self):
+        return _Timer(self.observe)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield "_bucket", values, (("le", _format_value(bound)),), cumulative
+            yield "_sum", values, (), total
+            yield "_count", values, (), count
+
+
+class _Timer:
+    """Context manager that passes the elapsed seconds to a callback."""
+
+    def __init__(self, callback):
+        self._callback = callback
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._callback(time.perf_counter() - self._start)
+
+
+# --- The application's metrics ---
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests handled, by route and status.",
+                        ("route", "method", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "Time spent in the view function.",
+                         ("route", "method"))
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests being handled right now.", ("route",))
+GEMINI_REQUESTS = Counter("gemini_requests_total", "Gemini generate_content calls.", ("kind", "outcome"))
+GEMINI_LATENCY = Histogram("gemini_request_duration_seconds", "Gemini generate_content latency.", ("kind",))
+GEMINI_IN_FLIGHT = Gauge("gemini_requests_in_flight", "Gemini calls waiting for an answer.", ("kind",))
+GOOGLE_REQUESTS = Counter("google_api_requests_total", "Google API calls, by method id and outcome.",
+                          ("method", "outcome"))
+GOOGLE_LATENCY = Histogram("google_api_request_duration_seconds", "Google API call latency.", ("method",))
+MONGO_OPERATIONS = Counter("mongo_operations_total", "Link store operations.", ("operation", "outcome"))
+MONGO_LATENCY = Histogram("mongo_operation_duration_seconds", "Link store operation latency.", ("operation",))
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups, by cache and result (hit/miss).",
+                         ("cache", "result"))
+
+
+def _hit_ratios() -> dict:
+    lookups = {}
+    for (cache, result), child in list(CACHE_REQUESTS._children.items()):
+        hits, total = lookups.get(cache, (0.0, 0.0))
+        lookups[cache] = (hits + (child.value if result == "hit" else 0.0), total + child.value)
+    return {(cache,): hits / total for cache, (hits, total) in lookups.items() if total}
+
+
+CACHE_HIT_RATIO = Gauge("cache_hit_ratio", "Hits / lookups since start, by cache.", ("cache",),
+                        function=_hit_ratios)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Decorators ---
+def timed(histogram: Histogram, counter: Counter = None, in_flight: Gauge = None, labels=None):
+    """
+    Decorator that observes the duration of every call of a function (sync or async).
+
+    Args:
+        histogram (Histogram): Receives the duration in seconds.
+        counter (Counter): Optional; incremented with an extra outcome label ("ok" / "error").
+        in_flight (Gauge): Optional; raised while a call is running.
+        labels (callable | tuple): Label values, or a function of the call's arguments
+                                   returning them.
+    """
+    def label_values(args, kwargs):
+        if callable(labels):
+            return tuple(labels(*args, **kwargs))
+        return tuple(labels or ())
+
+    def decorator(function):
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                values = label_values(args, kwargs)
+                gauge = in_flight.labels(*values) if in_flight else None
+                if gauge:
+                    gauge.inc()
+                outcome = "error"
+                start = time.perf_counter()
+                try:
+                    result = await function(*args, **kwargs)
+                    outcome = "ok"
+                    return result
+                finally:
+                    histogram.labels(*values).observe(time.perf_counter() - start)
+                    if counter:
+                        counter.labels(*values, outcome).inc()
+                    if gauge:
+                        gauge.dec()
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            values = label_values(args, kwargs)
+            gauge = in_flight.labels(*values) if in_flight else None
+            if gauge:
+                gauge.inc()
+            outcome = "error"
+            start = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                histogram.labels(*values).observe(time.perf_counter() - start)
+                if counter:
+                    counter.labels(*values, outcome).inc()
+                if gauge:
+                    gauge.dec()
+        return wrapper
+    return decorator
+
+
+def mongo_operation(function):
+    """Times a link store function under its own name."""
+    name = function.__name__
+    return timed(MONGO_LATENCY, MONGO_OPERATIONS, labels=(name,))(function)
+
+
+def _response_status(result) -> int:
+    """The status code of whatever a Flask/Quart view returned."""
+    if isinstance(result, tuple) and len(result) > 1 and isinstance(result[1], int):
+        return result[1]
+    if result is None:
+        return 500  # the framework turns a missing response into an error
+    return getattr(result, "status_code", 200)
+
+
+def observed_route(route: str, method_getter):
+    """
+    Decorator for a view: counts requests by status, times them and tracks how many are in flight.
+
+    Args:
+        route (str): The label to use (the URL rule, so URL parameters don't add series).
+        method_getter (callable): Returns the current request's HTTP method.
+    """
+    def decorator(view):
+        def begin():
+            gauge = HTTP_IN_FLIGHT.labels(route)
+            gauge.inc()
+            return gauge, method_getter(), time.perf_counter()
+
+        def finish(gauge, method, start, status):
+            HTTP_LATENCY.labels(route, method).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(route, method, status).inc()
+            gauge.dec()
+
+        if inspect.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(*args, **kwargs):
+                gauge, method, start = begin()
+                status = 500
+                try:
+                    result = await view(*args, **kwargs)
+                    status = _response_status(result)
+                    return result
+                finally:
+                    finish(gauge, method, start, status)
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            gauge, method, start = begin()
+            status = 500
+            try:
+                result = view(*args, **kwargs)
+                status = _response_status(result)
+                return result
+            finally:
+                finish(gauge, method, start, status)
+        return wrapper
+    return decorator
+
+
+def instrument_views(app, method_getter):
+    """
+    Wraps every view registered on a Flask or Quart app with observed_route, labelled
+    with its URL rule ("/plan_event"). Call it after the routes are defined; /metrics
+    itself is left out.
+    """
+    rules = {rule.endpoint: rule.rule for rule in app.url_map.iter_rules()}
+    for endpoint, view in list(app.view_functions.items()):
+        if endpoint in ("metrics", "static"):
+            continue
+        app.view_functions[endpoint] = observed_route(rules.get(endpoint, endpoint), method_getter)(view)
@@ -0,0 +1,225 @@
+# Purpose: Client-side quota handling for Google Calendar, Google Tasks and Gemini.
+#
+# Every outbound call first takes a token from the bucket of its API and user, so bursts are
+# spread out to the configured rate instead of being rejected by Google. Calls that still fail
+# with 429, a rate-limit 403 or a 5xx are retried with jittered exponential backoff; a
+# Retry-After header, when present, sets the wait instead. A rate-limit answer also pauses the
+# whole bucket, so the other threads (and coroutines) slow down too instead of piling on.
+# Calls that create something (POST without a client-chosen id) may have been carried out
+# before a 5xx came back, so they are only retried after a rate-limit answer.
+#
+# Settings (environment variables, API = CALENDAR, TASKS or GEMINI):
+#     RATE_LIMIT_<API>_PER_SECOND   sustained calls per second per user
+#     RATE_LIMIT_<API>_BURST        calls allowed at once after an idle period
+#     RATE_LIMIT_MAX_RETRIES        retries after the first attempt (default 5)
+#     RATE_LIMIT_BACKOFF_BASE       first backoff in seconds (default 0.5)
+#     RATE_LIMIT_BACKOFF_MAX        longest single wait in seconds (default 32)
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# (calls per second, burst) per API. Calendar allows 600 queries/minute/user by default,
+# Tasks a similar per-user rate; gemini-2.0-flash allows 2000 requests/minute on the paid tier.
+DEFAULT_LIMITS = {
+    "calendar": (10.0, 20),
+    "tasks": (10.0, 20),
+    "gemini": (30.0, 30),
+}
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# Calendar and Tasks report quota errors as 403 with one of these reasons.
+RATE_LIMIT_REASONS = (b"rateLimitExceeded", b"userRateLimitExceeded", b"quotaExceeded")
+# POST methods that only read, so sending them twice cannot create anything twice.
+READ_ONLY_POSTS = {"calendar.freebusy.query"}
+# Inserts that accept a client-chosen id: sent again, they fail with 409 instead of duplicating.
+CLIENT_ID_INSERTS = {"calendar.events.insert", "calendar.events.import"}
+MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", 5))
+BACKOFF_BASE = float(os.getenv("RATE_LIMIT_BACKOFF_BASE", 0.5))
+BACKOFF_MAX = float(os.getenv("RATE_LIMIT_BACKOFF_MAX", 32))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, at most `capacity` saved up.
+
+    Args:
+        rate (float): Tokens added per second.
+        capacity (float): Bucket size, i.e. the largest burst.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        """Takes the tokens (possibly going into debt) and returns how long to wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def acquire(self, tokens: float = 1.0):
+        """Blocks until the tokens are available."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: float = 1.0):
+        """Like acquire, but sleeps without blocking the event loop."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Lets no call through for `seconds` (the server said we are over quota)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = min(self._tokens, 0.0)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(api: str, user: str = "default") -> TokenBucket:
+    """The shared bucket for one API ("calendar", "tasks", "gemini") and user."""
+    key = (api, user)
+    bucket = _buckets.get(key)
+    if bucket is None:
+        with _buckets_lock:
+            bucket = _buckets.get(key)
+            if bucket is None:
+                rate, burst = DEFAULT_LIMITS.get(api, DEFAULT_LIMITS["calendar"])
+                rate = float(os.getenv(f"RATE_LIMIT_{api.upper()}_PER_SECOND", rate))
+                burst = float(os.getenv(f"RATE_LIMIT_{api.upper()}_BURST", burst))
+                bucket = _buckets[key] = TokenBucket(rate, burst)
+    return bucket
+
+
+def error_status(error) -> int:
+    """HTTP status of a googleapiclient HttpError or a google.api_core (Gemini) error, else None."""
+    response = getattr(error, "resp", None)
+    if response is not None and getattr(response, "status", None) is not None:
+        return int(response.status)
+    code = getattr(error, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_rate_limited(error) -> bool:
+    status = error_status(error)
+    if status == 429:
+        return True
+    return status == 403 and any(reason in (getattr(error, "content", b"") or b"") for reason in RATE_LIMIT_REASONS)
+
+
+def is_retryable(error, idempotent: bool = True) -> bool:
+    """Rate limits are always worth another try; 5xx answers only for idempotent calls."""
+    if is_rate_limited(error):
+        return True
+    return idempotent and error_status(error) in RETRYABLE_STATUSES
+
+
+def is_idempotent_request(request) -> bool:
+    """
+    Whether a googleapiclient HttpRequest can safely be sent again after a 5xx: anything but a
+    POST, read-only POSTs, and inserts that carry a client-chosen id.
+    """
+    if getattr(request, "method", "GET") != "POST" or request.methodId in READ_ONLY_POSTS:
+        return True
+    if request.methodId not in CLIENT_ID_INSERTS:
+        return False
+    try:
+        return bool(json.loads(request.body or "{}").get("id"))
+    except (TypeError, ValueError):
+        return False
+
+
+def retry_after(error):
+    """Seconds from the error's Retry-After header (delta or HTTP date), or None."""
+    response = getattr(error, "resp", None)
+    value = response.get("retry-after") if hasattr(response, "get") else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, error=None) -> float:
+    """Retry-After when the server sent one, else full-jitter exponential backoff."""
+    delay = retry_after(error) if error is not None else None
+    if delay is None:
+        delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    return min(delay, BACKOFF_MAX)
+
+
+def call_with_retry(function, api: str, user: str = "default", tokens: float = 1.0,
+                    max_retries: int = None, idempotent: bool = True):
+    """
+    Calls function() under the (api, user) rate limit, retrying rate-limit and server errors.
+
+    Args:
+        function (callable): The call to make, e.g. request.execute.
+        api (str): "calendar", "tasks" or "gemini".
+        user (str): Whose quota the call counts against.
+        tokens (float): How many calls this is (a batch counts every call inside it).
+        max_retries (int): Retries after the first attempt (default RATE_LIMIT_MAX_RETRIES).
+        idempotent (bool): False for calls that must not run twice (e.g. an insert without a
+                           client-chosen id); those are not retried after a server error.
+
+    Returns:
+        Whatever function returns. The last error is raised once retries run out, so callers'
+        existing error handling still applies.
+    """
+    bucket = get_bucket(api, user)
+    max_retries = MAX_RETRIES if max_retries is None else max_retries
+    attempt = 0
+    while True:
+        bucket.acquire(tokens)
+        try:
+            return function()
+        except Exception as error:
+            if attempt >= max_retries or not is_retryable(error, idempotent):
+                raise
+            delay = backoff_delay(attempt, error)
+            if is_rate_limited(error):
+                bucket.pause(delay)
+            print(f"[RATE_LIMIT] {api} call failed ({error_status(error)}), retry {attempt + 1} in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1
+
+
+async def call_with_retry_async(function, api: str, user: str = "default", tokens: float = 1.0,
+                                max_retries: int = None, idempotent: bool = True):
+    """call_with_retry for a coroutine function: awaits function() and sleeps with asyncio."""
+    bucket = get_bucket(api, user)
+    max_retries = MAX_RETRIES if max_retries is None else max_retries
+    attempt = 0
+    while True:
+        await bucket.acquire_async(tokens)
+        try:
+            return await function()
+        except Exception as error:
+            if attempt >= max_retries or not is_retryable(error, idempotent):
+                raise
+            delay = backoff_delay(attempt, error)
+            if is_rate_limited(error):
+                bucket.pause(delay)
+            print(f"[RATE_LIMIT] {api} call failed ({error_status(error)}), retry {attempt + 1} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -0,0 +1,278 @@
+# Purpose: Deterministic planner for recurring events ("4 hours a week of lemonade making").
+# It replaces the part of GeminiParser.suggest_recurring_event that asked the LLM to fit
+# chunks around busy times. Gemini is only used to pull the goal out of the user's prose;
+# the packing itself happens here and never overlaps a busy slot.
+#
+# Output lines use the "[Event Name] Every [Day of Week]: [Start Time] - [End Time] ([Duration])"
+# format that GeminiParser.parse_event_details_1 already consumes.
+from datetime import datetime, time, timedelta
+import pytz
+from services.free_slots import find_free_slots, to_timestamp, DEFAULT_TIMEZONE
+
+DAYS_OF_WEEK = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Part of the day recurring events may be placed in.
+DEFAULT_DAY_START = time(8, 0)
+DEFAULT_DAY_END = time(22, 0)
+
+# Chunk bounds used by the original prompt ("as short as 15 mins and as long as 7 hours").
+DEFAULT_MIN_CHUNK_MINUTES = 15
+DEFAULT_MAX_CHUNK_MINUTES = 7 * 60
+GRANULARITY_MINUTES = 15
+# Block length the planner aims for before spreading time over more days.
+TARGET_CHUNK_MINUTES = 120
+
+
+def weekly_free_pattern(time_min, time_max, busy_slots: list, tz_name: str = DEFAULT_TIMEZONE,
+                        day_start: time = DEFAULT_DAY_START, day_end: time = DEFAULT_DAY_END) -> dict:
+    """
+    Builds the free time that repeats every week in the range.
+
+    A weekday's pattern is the part of the day that is free on *every* occurrence of that
+    weekday between time_min and time_max, so a weekly event placed in it never collides.
+    Days cut by the range (e.g. today, when the range starts now) only count for the part
+    inside it; a minute is free when no occurrence that covers it is busy. Minutes never
+    covered by the range are not known to be free and are left out.
+
+    Returns:
+        dict: {weekday index (Monday is 0): [(start_minute, end_minute), ...]}
+              with minutes counted from local midnight.
+    """
+    tz = pytz.timezone(tz_name)
+    range_start = datetime.fromtimestamp(to_timestamp(time_min), tz)
+    range_end = datetime.fromtimestamp(to_timestamp(time_max), tz)
+    day_open = day_start.hour * 60 + day_start.minute
+    day_close = day_end.hour * 60 + day_end.minute
+
+    # Free minutes per local date, restricted to the allowed part of the day.
+    free_by_date = {}
+    for slot in find_free_slots(time_min, time_max, busy_slots, duration_minutes=0,
+                                tz_name=tz_name, work_start=day_start, work_end=day_end):
+        start = datetime.fromisoformat(slot['start'])
+        end = datetime.fromisoformat(slot['end'])
+        start_minute = start.hour * 60 + start.minute
+        end_minute = end.hour * 60 + end.minute if end.date() == start.date() else day_close
+        free_by_date.setdefault(start.date(), []).append((start_minute, end_minute))
+
+    # Per weekday: minutes not busy on any occurrence seen so far, and minutes seen at all.
+    not_busy = {}
+    covered = {}
+    day = range_start.date()
+    while day <= range_end.date():
+        # The part of the day the range covers (all of it, except on the first and last day).
+        window_start = max(day_open, range_start.hour * 60 + range_start.minute if day == range_start.date() else 0)
+        window_end = min(day_close, range_end.hour * 60 + range_end.minute if day == range_end.date() else day_close)
+        if window_start < window_end:
+            weekday = day.weekday()
+            window = [(window_start, window_end)]
+            outside = _subtract_minutes([(day_open, day_close)], window)
+            # Minutes outside the window say nothing about this occurrence, so they don't rule anything out.
+            day_not_busy = _union_minutes(_intersect_minutes(free_by_date.get(day, []), window), outside)
+            not_busy[weekday] = _intersect_minutes(not_busy.get(weekday, [(day_open, day_close)]), day_not_busy)
+            covered[weekday] = _union_minutes(covered.get(weekday, []), window)
+        day += timedelta(days=1)
+
+    # Weekdays the range never reached get no free time rather than being assumed open.
+    return {weekday: _intersect_minutes(not_busy[weekday], covered[weekday]) if weekday in covered else []
+            for weekday in range(7)}
+
+
+def _intersect_minutes(first: list, second: list) -> list:
+    """Intersection of two sorted lists of (start_minute, end_minute) intervals."""
+    result = []
+    i = j = 0
+    while i < len(first) and j < len(second):
+        start = max(first[i][0], second[j][0])
+        end = min(first[i][1], second[j][1])
+        if start < end:
+            result.append((start, end))
+        if first[i][1] < second[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def _union_minutes(first: list, second: list) -> list:
+    """Union of two lists of (start_minute, end_minute) intervals, sorted and merged."""
+    result = []
+    for start, end in sorted(list(first) + list(second)):
+        if result and start <= result[-1][1]:
+            result[-1] = (result[-1][0], max(result[-1][1], end))
+        else:
+            result.append((start, end))
+    return result
+
+
+def _subtract_minutes(first: list, second: list) -> list:
+    """The parts of the sorted intervals in `first` not covered by the sorted intervals in `second`."""
+    result = []
+    for start, end in first:
+        for cut_start, cut_end in second:
+            if cut_end <= start or cut_start >= end:
+                continue
+            if cut_start > start:
+                result.append((start, cut_start))
+            start = max(start, cut_end)
+        if start < end:
+            result.append((start, end))
+    return result
+
+
+def pack_weekly_chunks(pattern: dict, weekly_minutes: int,
+                       min_chunk: int = DEFAULT_MIN_CHUNK_MINUTES,
+                       max_chunk: int = DEFAULT_MAX_CHUNK_MINUTES,
+                       preferred_days=None) -> list:
+    """
+    Packs `weekly_minutes` into chunks that fit the weekly free pattern.
+
+    Chunks of roughly two hours are spread evenly over the preferred days (round robin,
+    one chunk per day per pass). Other days are only used when the preferred days run out of room.
+    Every chunk is a multiple of 15 minutes, starts on a quarter hour and lies fully
+    inside a free interval.
+
+    Args:
+        pattern (dict): Output of weekly_free_pattern.
+        weekly_minutes (int): Total minutes to schedule per week.
+        min_chunk (int): Shortest allowed chunk in minutes.
+        max_chunk (int): Longest allowed chunk in minutes.
+        preferred_days (list | None): Weekday indexes (Monday is 0) to use first.
+
+    Returns:
+        list[tuple]: (weekday, start_minute, end_minute) sorted by weekday and start.
+    """
+    min_chunk = max(GRANULARITY_MINUTES, _round_up(min_chunk))
+    max_chunk = max(min_chunk, max_chunk - max_chunk % GRANULARITY_MINUTES)
+    remaining = _round_up(weekly_minutes)
+
+    preferred = [day for day in (preferred_days or []) if day in pattern]
+    others = [day for day in range(7) if day not in preferred]
+    free = {day: [list(interval) for interval in pattern.get(day, [])] for day in range(7)}
+
+    chunks = []
+    for days in ([preferred, others] if preferred else [others]):
+        while remaining > 0:
+            usable = [day for day in days if _largest_free(free[day]) >= min_chunk]
+            if not usable:
+                break
+            # Aim for blocks of about TARGET_CHUNK_MINUTES, split evenly over the days that still have room.
+            chunk_count = min(len(usable), max(1, round(remaining / TARGET_CHUNK_MINUTES)))
+            target = _round_up(remaining / chunk_count)
+            target = min(max(target, min_chunk), max_chunk)
+            for day in usable:
+                if remaining <= 0:
+                    break
+                wanted = min(target, max(remaining, min_chunk))
+                chunk = _take_chunk(free[day], wanted, min_chunk)
+                if chunk is None:
+                    continue
+                chunks.append((day, chunk[0], chunk[1]))
+                remaining -= chunk[1] - chunk[0]
+        if remaining <= 0:
+            break
+
+    # Back-to-back chunks on the same day read better as one block.
+    merged = []
+    for day, start, end in sorted(chunks):
+        if merged and merged[-1][0] == day and merged[-1][2] == start and end - merged[-1][1] <= max_chunk:
+            merged[-1] = (day, merged[-1][1], end)
+        else:
+            merged.append((day, start, end))
+    return merged
+
+
+def _round_up(minutes) -> int:
+    """Rounds minutes up to the scheduling granularity."""
+    minutes = int(-(-minutes // 1))
+    return -(-minutes // GRANULARITY_MINUTES) * GRANULARITY_MINUTES
+
+
+def _largest_free(intervals: list) -> int:
+    """Longest granularity-aligned stretch of free minutes in a day."""
+    best = 0
+    for start, end in intervals:
+        aligned = _round_up(start)
+        best = max(best, (end - aligned) - (end - aligned) % GRANULARITY_MINUTES)
+    return best
+
+
+def _take_chunk(intervals: list, wanted: int, min_chunk: int):
+    """
+    Carves a chunk out of the largest free interval of a day and removes it from `intervals`.
+    Returns (start_minute, end_minute) or None when nothing of at least min_chunk fits.
+    """
+    best_index, best_length = None, 0
+    for index, (start, end) in enumerate(intervals):
+        aligned = _round_up(start)
+        length = (end - aligned) - (end - aligned) % GRANULARITY_MINUTES
+        if length > best_length:
+            best_index, best_length = index, length
+    if best_index is None or best_length < min_chunk:
+        return None
+
+    start, end = intervals[best_index]
+    chunk_start = _round_up(start)
+    chunk_end = chunk_start + min(wanted, best_length)
+    # Keep what is left of the interval; the minutes skipped for alignment are dropped.
+    if chunk_end < end:
+        intervals[best_index] = [chunk_end, end]
+    else:
+        del intervals[best_index]
+    return chunk_start, chunk_end
+
+
+def format_duration(minutes: int) -> str:
+    """Formats minutes the way the recurring suggestions do: '2 hours', '30 minutes', '1 hour 30 minutes'."""
+    hours, mins = divmod(minutes, 60)
+    parts = []
+    if hours:
+        parts.append(f"{hours} hour{'s' if hours != 1 else ''}")
+    if mins:
+        parts.append(f"{mins} minutes")
+    return " ".join(parts) or "0 minutes"
+
+
+def format_minute_of_day(minute: int) -> str:
+    """Formats minutes from midnight as a 12-hour clock time, e.g. 1230 -> '8:30 PM'."""
+    return (datetime.min + timedelta(minutes=minute % (24 * 60))).strftime('%I:%M %p').lstrip('0')
+
+
+def format_recurring_lines(summary: str, chunks: list) -> str:
+    """
+    Turns packed chunks into lines such as
+    'Gaming event Every Monday: 8:00 PM - 10:00 PM (2 hours)'.
+    """
+    return "\n".join(
+        f"{summary} Every {DAYS_OF_WEEK[day]}: {format_minute_of_day(start)} - "
+        f"{format_minute_of_day(end)} ({format_duration(end - start)})"
+        for day, start, end in chunks
+    )
+
+
+def plan_recurring_schedule(summary: str, weekly_hours: float, time_min, time_max, busy_slots: list,
+                            preferred_days=None, min_chunk: int = DEFAULT_MIN_CHUNK_MINUTES,
+                            max_chunk: int = DEFAULT_MAX_CHUNK_MINUTES,
+                            tz_name: str = DEFAULT_TIMEZONE) -> str:
+    """
+    Convenience wrapper: weekly pattern -> packed chunks -> suggestion lines.
+
+    Args:
+        summary (str): Event name, e.g. 'Lemonade making'.
+        weekly_hours (float): Target hours per week.
+        time_min / time_max: Range the busy slots were fetched for.
+        busy_slots (list): The 'busy' list from CalendarManager.get_free_busy_slots.
+        preferred_days (list | None): Day names ('Tuesday') or weekday indexes.
+
+    Returns:
+        str: One line per chunk, or an empty string when nothing fits.
+    """
+    preferred = []
+    for day in preferred_days or []:
+        if isinstance(day, int):
+            preferred.append(day)
+        elif isinstance(day, str) and day.strip().capitalize() in DAYS_OF_WEEK:
+            preferred.append(DAYS_OF_WEEK.index(day.strip().capitalize()))
+
+    pattern = weekly_free_pattern(time_min, time_max, busy_slots, tz_name)
+    chunks = pack_weekly_chunks(pattern, int(round(weekly_hours * 60)), min_chunk, max_chunk, preferred)
+    return format_recurring_lines(summary, chunks)
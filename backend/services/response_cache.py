@@ -0,0 +1,163 @@
+# Purpose: Two-tier cache for Gemini responses.
+# A small in-memory LRU sits in front of a persistent SQLite table, so identical prompts
+# ("gym every Tuesday 7am") are answered without another generate_content call, and the
+# answers survive restarts and are shared by every worker on the machine.
+#
+# Keys are built from the normalized user input, the prompt template version and the
+# reference date, so changing a prompt or crossing midnight never serves a stale answer.
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from services.metrics import record_cache
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gemini_cache.sqlite3")
+DEFAULT_MEMORY_ENTRIES = 1024
+DEFAULT_DISK_ENTRIES = 100_000
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+
+def normalize_input(user_input: str) -> str:
+    """Lowercases, trims and collapses whitespace so trivial rephrasings share an entry."""
+    text = re.sub(r"\s+", " ", str(user_input)).strip().lower()
+    return text.strip(" .!?")
+
+
+def make_key(kind: str, user_input: str, template_version, reference_date: str = "", extra=None) -> str:
+    """
+    Builds a cache key.
+
+    Args:
+        kind (str): Which prompt this is, e.g. 'parse_event_details'.
+        user_input (str): Raw user input (normalized here).
+        template_version: Version of the prompt template; bump it whenever the prompt changes.
+        reference_date (str): Date the answer is relative to, e.g. '2025-09-02'.
+        extra: Any other JSON-serializable input the prompt depends on (e.g. busy slots).
+    """
+    payload = json.dumps(
+        [kind, normalize_input(user_input), str(template_version), reference_date, extra],
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    In-memory LRU in front of an on-disk SQLite store, both with TTL and size-based eviction.
+    Safe to share between Flask request threads.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH, memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 disk_entries: int = DEFAULT_DISK_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._writes_since_trim = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+
+    def get(self, key: str):
+        """Returns the cached value or None (missing or expired)."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    record_cache("gemini_response", True)
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, expires_at = row
+                    if expires_at > now:
+                        self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._remember(key, expires_at, value)
+                        self.hits += 1
+                        record_cache("gemini_response", True)
+                        return value
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+            self.misses += 1
+            record_cache("gemini_response", False)
+            return None
+
+    def set(self, key: str, value: str, ttl_seconds: float = None):
+        """Stores a value in both tiers."""
+        now = time.time()
+        expires_at = now + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        with self._lock:
+            self._remember(key, expires_at, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, expires_at, now),
+                )
+                self._writes_since_trim += 1
+                # Trimming costs a COUNT, so only do it every so often.
+                if self._writes_since_trim >= 100:
+                    self._trim_disk(now)
+
+    def clear(self):
+        """Drops every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+
+    def _remember(self, key, expires_at, value):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _trim_disk(self, now):
+        """Removes expired rows, then the least recently used rows above disk_entries."""
+        self._writes_since_trim = 0
+        self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if count > self.disk_entries:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.disk_entries,),
+            )
+
+
+def cache_from_env():
+    """
+    Builds the cache from environment variables:
+    GEMINI_CACHE_DISABLED=1, GEMINI_CACHE_PATH (empty for memory only),
+    GEMINI_CACHE_TTL (seconds), GEMINI_CACHE_MEMORY_ENTRIES, GEMINI_CACHE_DISK_ENTRIES.
+    """
+    if os.getenv("GEMINI_CACHE_DISABLED") == "1":
+        return None
+    return ResponseCache(
+        db_path=os.getenv("GEMINI_CACHE_PATH", DEFAULT_CACHE_PATH),
+        memory_entries=int(os.getenv("GEMINI_CACHE_MEMORY_ENTRIES", DEFAULT_MEMORY_ENTRIES)),
+        disk_entries=int(os.getenv("GEMINI_CACHE_DISK_ENTRIES", DEFAULT_DISK_ENTRIES)),
+        ttl_seconds=float(os.getenv("GEMINI_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+    )
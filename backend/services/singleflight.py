@@ -0,0 +1,86 @@
+# Purpose: Request coalescing ("singleflight").
+# When identical requests arrive while the first one is still being answered, only that first
+# call goes upstream; the others wait for it and get the same result (or the same exception).
+# Nothing is kept after the call finishes, so this never serves stale data: it only collapses
+# herds of simultaneous identical requests (many tabs refreshing, the top of the hour, ...).
+#
+# Results are shared between callers, so callers must not modify them.
+import asyncio
+import os
+import threading
+import time
+from services.metrics import Counter
+from services.response_cache import normalize_input
+
+# /plan_event requests whose "now" falls in the same window of this many seconds share a key.
+PLAN_BUCKET_SECONDS = int(os.getenv("PLAN_COALESCE_SECONDS", 60))
+
+COALESCED = Counter("coalesced_requests_total", "Calls answered by an identical call already in flight.",
+                    ("group",))
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Args:
+        name (str): Label of this group in /metrics (coalesced_requests_total).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function):
+        """
+        Returns function(), unless a call with the same key is already running on another
+        thread, in which case it waits for that call and returns its result.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            COALESCED.labels(self.name).inc()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = function()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, function):
+        """
+        Async version of do for coroutine functions (one event loop). The upstream call runs
+        as its own task, so a caller that goes away doesn't cancel it for the others.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(function())
+            task.add_done_callback(lambda _, key=key: self._tasks.pop(key, None))
+        else:
+            COALESCED.labels(self.name).inc()
+        return await asyncio.shield(task)
+
+
+def plan_request_key(user_input: str, days: int, count: int, duration=None, calendar_id: str = 'primary',
+                     now: float = None) -> tuple:
+    """Key under which identical /plan_event requests are coalesced."""
+    bucket = int((time.time() if now is None else now) // PLAN_BUCKET_SECONDS)
+    return (calendar_id, days, bucket, normalize_input(user_input), count, None if duration is None else int(duration))
@@ -0,0 +1,63 @@
+# Purpose: Helpers for streaming responses to the frontend.
+# Gemini streams its answer in arbitrary text chunks; the frontend wants whole suggestions.
+# split_lines turns the chunks into complete lines as soon as each one is finished, and
+# format_sse / format_ndjson wrap every line for Server-Sent Events or newline-delimited JSON.
+import json
+
+SSE_MIMETYPE = "text/event-stream"
+NDJSON_MIMETYPE = "application/x-ndjson"
+# Proxies (nginx) buffer responses by default, which would hold back every event until the end.
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def split_lines(chunks):
+    """
+    Yields every non-empty line of a stream of text chunks as soon as the line is complete.
+
+    Args:
+        chunks (iterable): Text pieces, e.g. the .text of each streamed Gemini chunk.
+    """
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            if line.strip():
+                yield line.strip()
+    if buffer.strip():
+        yield buffer.strip()
+
+
+async def split_lines_async(chunks):
+    """Same as split_lines for an async iterable of text chunks."""
+    buffer = ""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            if line.strip():
+                yield line.strip()
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def format_sse(data: dict, event: str = None) -> str:
+    """One Server-Sent Event carrying data as JSON."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+def format_ndjson(data: dict, event: str = None) -> str:
+    """One line of newline-delimited JSON; the event name goes in the "event" key."""
+    if event:
+        data = {"event": event, **data}
+    return json.dumps(data) + "\n"
+
+
+def stream_format(name: str):
+    """
+    Returns (formatter, mimetype) for the ?format= query value: "ndjson", anything else is SSE.
+    """
+    if name == "ndjson":
+        return format_ndjson, NDJSON_MIMETYPE
+    return format_sse, SSE_MIMETYPE
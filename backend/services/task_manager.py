@@ -6,40 +6,63 @@ from googleapiclient.errors import HttpError
 from google.oauth2.credentials import Credentials 
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
-import json_manager
-from calender_manager import CalendarManager
-from db import *
+from services.calender_manager import CalendarManager
+from services.batching import BatchExecutor
+from services.google_services import get_service_pool
+from services.link_store import LinkStore
 
 # --- Configuration Constants ---
 # NOTE: Replace 'YOUR_TIMEZONE' with an actual timezone string like 'America/New_York'
 TIME_ZONE = 'America/Los_Angeles' 
-# The file path used to store the mapping between Task IDs and Event IDs
+TOKEN_PATH = "C:/Users/Temidayo Adeaga/Documents/Work/AI planer/venv/token.json"
+# The SQLite file storing the mapping between Task IDs and Event IDs (and the sync checkpoints)
+LINK_DB_FILE = 'linked_tasks.sqlite3'
+# The JSON file the mapping used to live in; imported into LINK_DB_FILE on first start
 LINK_DATA_FILE = 'linked_tasks.json'
 
 SCOPES = ["https://www.googleapis.com/auth/calendar", 'https://www.googleapis.com/auth/tasks']
 class TaskManager:
         
-    def __init__(self):
+    def __init__(self, token_path: str = TOKEN_PATH, link_db_path: str = LINK_DB_FILE,
+                 legacy_links_path: str = LINK_DATA_FILE):
+        """
+        Args:
+            token_path: The token.json with the user's Calendar and Tasks credentials.
+            link_db_path: SQLite file of the task <-> event links (see services/link_store.py).
+            legacy_links_path: Old linked_tasks.json, imported into link_db_path once.
+        """
         print("Initializing TaskManager...")
-        token_path = "C:/Users/Temidayo Adeaga/Documents/Work/AI planer/venv/token.json"
         if os.path.exists(token_path):
             print("token found.")
-            creds = Credentials.from_authorized_user_file(token_path, SCOPES)
         else:
             print("token.json not found.")
             return            
         # 1. Initialize Google API Services
-        # Assuming necessary scopes ('calendar', 'tasks') are in the credentials
-        self.tasks_service: Resource = build('tasks', 'v1', credentials=creds)
+        # Assuming necessary scopes ('calendar', 'tasks') are in the credentials.
+        # Clients come from a per-thread pool sharing one set of credentials.
+        self.service_pool = get_service_pool(token_path)
+        # One CalendarManager for the lifetime of the TaskManager
+        self.calendar_manager = CalendarManager()
 
         
         # 2. Initialize Local Data Store
         # Stores the mapping: {task_id: {event_id, calendar_id, task_list_id}}
+        self.link_store = LinkStore(link_db_path, legacy_json_path=legacy_links_path)
         self.linked_tasks: dict = self._load_links()
         
-        print(f"Loaded {len(self.linked_tasks)} linked tasks from {LINK_DATA_FILE}.")
+        print(f"Loaded {len(self.linked_tasks)} linked tasks from {link_db_path}.")
 
   
+    @property
+    def tasks_service(self) -> Resource:
+        """The Tasks client of the current thread."""
+        return self.service_pool.tasks()
+
+    @property
+    def calendar_service(self) -> Resource:
+        """The Calendar client of the current thread."""
+        return self.calendar_manager.service
+
     def create_task(self,task_body,task_list_id):
         # event_result = self.calendar_service.events().insert(calendarId=calendar_id, body=event_body).execute()
         task_result = self.tasks_service.tasks().insert(tasklist=task_list_id, body=task_body).execute()
@@ -97,7 +120,7 @@ class TaskManager:
                 'calendar_id': calendar_id,
                 'task_list_id': task_list_id
             }
-            self._save_links()
+            self._save_links([task_id])
             
             print(f"Success: Created Task (ID: {task_id}) and Event (ID: {event_id})")
             return task_id, event_id
@@ -114,65 +137,139 @@ class TaskManager:
         The core synchronization loop. Checks all linked tasks for completion 
         and deletes the corresponding Calendar event series if the task is done.
         This function should be run on a schedule (e.g., daily cron job).
+
+        The sync is incremental: each task list that has linked tasks is listed once with
+        updatedMin set to the newest 'updated' time seen by the previous run, so only tasks
+        changed since then come back (a few pages at most, however many links exist).
+        Those are joined against linked_tasks in memory. The high-water mark of a list is
+        only saved after its changes were handled, so a failed run is simply repeated.
+        Event deletions are sent in batches (up to 50 calls per HTTP round trip).
         """
         print(f"\n--- Starting Synchronization Check ({datetime.now().isoformat()}) ---")
         tasks_to_remove = []
-        
-        # We iterate over a copy of the dictionary to safely modify the original
-        for task_id, link_info in list(self.linked_tasks.items()):
-            event_id = link_info['event_id']
-            calendar_id = link_info['calendar_id']
-            task_list_id = link_info['task_list_id']
-            
-            print(f"Checking Task ID: {task_id} (Event ID: {event_id})...")
+        completed = []
+        sync_state = self.link_store.load_sync_state()
+        new_marks = {}
+
+        # 1. Group the links by task list (one list call per list instead of one get per task)
+        links_by_list = {}
+        for task_id, link_info in self.linked_tasks.items():
+            links_by_list.setdefault(link_info['task_list_id'], set()).add(task_id)
 
+        # 2. Fetch only the tasks changed since the last run and join them with the links
+        for task_list_id, linked_ids in links_by_list.items():
             try:
-                # 1. Fetch the Google Task details
-                task = self.tasks_service.tasks().get(tasklist=task_list_id, task=task_id).execute()
+                changed, high_water_mark = self._list_changed_tasks(task_list_id, sync_state.get(task_list_id))
+            except HttpError as e:
+                if e.resp.status in (404, 410):
+                    # The whole list was deleted, and its tasks with it
+                    print(f"-> Task list {task_list_id} not found on Google Tasks. Cleaning up its links.")
+                    tasks_to_remove.extend(linked_ids)
+                else:
+                    print(f"-> API Error listing task list {task_list_id}: {e}")
+                continue
+
+            for task in changed:
+                task_id = task['id']
+                if task_id not in linked_ids:
+                    continue
                 task_title = task.get('title', 'Unknown Task')
                 status = task.get('status')
-                
-                # 2. Check for completion status
-                if status == 'completed':
-                    print(f"-> Task '{task_title}' is COMPLETED. Deleting linked event series.")
-                    
-                    # 3. Delete the Calendar Event Series
-                    try:
-                        # Deleting the parent event_id deletes the entire recurring series
-                        self.calendar_service.events().delete(calendarId=calendar_id, eventId=event_id).execute()
-                        print(f"-> Successfully deleted Calendar Event Series.")
-                    except HttpError as e:
-                        # Event might have been manually deleted, check error code
-                        if e.resp.status == 404:
-                            print("-> Calendar Event already deleted or not found.")
-                        else:
-                            print(f"-> ERROR deleting event {event_id}: {e}")
-                    
-                    # 4. Mark the link for removal from local store
+                if task.get('deleted'):
+                    print(f"-> Task ID {task_id} was deleted on Google Tasks. Cleaning up link.")
                     tasks_to_remove.append(task_id)
-
+                elif status == 'completed':
+                    print(f"-> Task '{task_title}' is COMPLETED. Deleting linked event series.")
+                    completed.append(task_id)
                 else:
                     print(f"-> Task '{task_title}' is still '{status}'. No action needed.")
-
-            except HttpError as e:
-                # Handle 404: Task may have been manually deleted by the user
-                if e.resp.status == 404:
+            if task_list_id not in sync_state:
+                # A full listing (no checkpoint yet) shows every task, even deleted ones;
+                # links to tasks missing from it point at tasks that are long gone.
+                missing = linked_ids - {task['id'] for task in changed}
+                for task_id in missing:
                     print(f"-> Task ID {task_id} not found on Google Tasks. Cleaning up link.")
-                    tasks_to_remove.append(task_id)
-                else:
-                    print(f"-> API Error checking task {task_id}: {e}")
-            except Exception as e:
-                print(f"-> Unexpected error during check: {e}")
+                tasks_to_remove.extend(missing)
+            if high_water_mark:
+                new_marks[task_list_id] = high_water_mark
+
+        # 3. Delete the Calendar Event Series of completed tasks in batches
+        # Deleting the parent event_id deletes the entire recurring series
+        event_batch = BatchExecutor(self.calendar_service)
+        for task_id in completed:
+            link_info = self.linked_tasks[task_id]
+            event_batch.add(
+                self.calendar_service.events().delete(calendarId=link_info['calendar_id'],
+                                                      eventId=link_info['event_id']),
+                request_id=task_id
+            )
+
+        for task_id, (_, error) in event_batch.execute().items():
+            if error is None:
+                print(f"-> Successfully deleted Calendar Event Series for task {task_id}.")
+            elif error.not_found:
+                # Event might have been manually deleted
+                print(f"-> Calendar Event for task {task_id} already deleted or not found.")
+            else:
+                print(f"-> ERROR deleting event {self.linked_tasks[task_id]['event_id']}: {error}")
+            # 4. Mark the link for removal from local store
+            tasks_to_remove.append(task_id)
         
         # 5. Clean up the local data store
         if tasks_to_remove:
-            for task_id in tasks_to_remove:
-                if task_id in self.linked_tasks:
-                    del self.linked_tasks[task_id]
-                    print(f"Removed Task ID {task_id} from local store.")
-            self._save_links()
+            self._remove_links(tasks_to_remove)
+
+        # 6. Checkpoint: the next run only asks for tasks updated after these marks
+        if new_marks:
+            self.link_store.save_sync_state(new_marks)
         
         print(f"--- Synchronization Complete. {len(self.linked_tasks)} tasks remaining. ---\n")
+
+    def _list_changed_tasks(self, task_list_id: str, updated_min: str = None):
+        """
+        Lists the tasks of one list updated at or after updated_min (all tasks if None),
+        including completed, hidden and deleted ones.
+
+        Returns:
+            tuple: (tasks, high-water mark). The mark is the newest 'updated' timestamp
+                   seen, or updated_min when nothing changed.
+        """
+        tasks = []
+        high_water_mark = updated_min
+        page_token = None
+        while True:
+            query = {'tasklist': task_list_id, 'showCompleted': True, 'showHidden': True,
+                     'showDeleted': True, 'maxResults': 100}
+            if updated_min:
+                query['updatedMin'] = updated_min
+            if page_token:
+                query['pageToken'] = page_token
+            result = self.tasks_service.tasks().list(**query).execute()
+            for task in result.get('items', []):
+                tasks.append(task)
+                updated = task.get('updated')
+                # RFC 3339 timestamps in UTC ('Z') compare correctly as strings
+                if updated and (high_water_mark is None or updated > high_water_mark):
+                    high_water_mark = updated
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                return tasks, high_water_mark
+
+    def _load_links(self) -> dict:
+        """Reads every link from the link store into memory (for the join in the sync)."""
+        return self.link_store.load_all()
+
+    def _save_links(self, task_ids):
+        """Writes the given tasks' links from linked_tasks to the store (one row each)."""
+        self.link_store.put_many({task_id: self.linked_tasks[task_id] for task_id in task_ids})
+
+    def _remove_links(self, task_ids):
+        """Drops the links of these tasks from memory and from the store."""
+        for task_id in task_ids:
+            if self.linked_tasks.pop(task_id, None) is not None:
+                print(f"Removed Task ID {task_id} from local store.")
+        self.link_store.remove_many(task_ids)
+
     def print_all_tasks(self):
         if not self.tasks_service:
             print("Cannot list tasks: Service not initialized.")
@@ -246,11 +343,12 @@ class TaskManager:
             tasklist=tasklist_id,
             task=task_id
         ).execute()
-        events  = db.get_event_by_task_id(task_id)
-        for event in events:
-            event_id, calendar_id = event
-            CalendarManager().delete_event(event_id, calendar_id, True)
-        db.delete_task_id("task_id")
+        # The link store is the one record of which events belong to a task
+        link_info = self.linked_tasks.get(task_id) or self.link_store.get(task_id)
+        if link_info is not None:
+            # Linked events go out in batched deletes through the shared CalendarManager
+            self.calendar_manager.delete_events_batch([[link_info['event_id'], link_info['calendar_id']]])
+        self._remove_links([task_id])
      
     def complete_task(self):
         pass
@@ -0,0 +1,31 @@
+# Purpose: Lets the tests import the backend packages (services, Essentials, fakes) the same
+# way the apps do, however pytest is started, and provides the fake Google server fixture.
+# Run from the backend folder:
+#     python -m pytest -q tests
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Nothing under test should read or write the on-disk Gemini response cache.
+os.environ.setdefault("GEMINI_CACHE_DISABLED", "1")
+# The fake server answers instantly; client-side throttling would only slow the tests down.
+for api in ("CALENDAR", "TASKS", "GEMINI"):
+    os.environ.setdefault(f"RATE_LIMIT_{api}_PER_SECOND", "100000")
+    os.environ.setdefault(f"RATE_LIMIT_{api}_BURST", "100000")
+
+
+@pytest.fixture(scope="session")
+def google_server():
+    """
+    One FakeGoogleServer for the whole run. The Google client pools are process-wide and
+    read GOOGLE_API_ROOT when they are built, so every test talks to this same server.
+    """
+    from fakes.google_server import FakeGoogleServer
+    from services.google_services import GOOGLE_API_ROOT_ENV
+
+    server = FakeGoogleServer().start()
+    os.environ[GOOGLE_API_ROOT_ENV] = server.url
+    yield server
+    server.stop()
@@ -0,0 +1,57 @@
+import asyncio
+import importlib
+
+import pytest
+
+
+@pytest.fixture
+def app_module(google_server, tmp_path, monkeypatch):
+    monkeypatch.setenv("JOB_QUEUE_PATH", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setenv("JOB_WORKERS", "0")
+    return importlib.import_module("Essentials.app")
+
+
+def test_importing_the_app_does_not_start_the_job_queue(app_module):
+    assert not app_module.jobs.is_built
+
+
+def test_rerunning_a_create_event_job_inserts_the_event_once(app_module, google_server):
+    from services.calender_manager import new_event_id
+
+    payload = {"input": "Dentist on Friday at 14:30 for 45 minutes", "event_id": new_event_id()}
+    first = app_module.run_create_event_job(payload)
+    # The worker died before recording the outcome; another worker runs the job again.
+    second = app_module.run_create_event_job(payload)
+
+    assert first["event_id"] == second["event_id"] == payload["event_id"]
+    matching = [event for event in google_server.state.events["primary"].values()
+                if event["id"] == payload["event_id"] or event.get("summary") == "Dentist"]
+    assert len(matching) == 1
+
+
+class FailingCalendar:
+    def add_event(self, event_details):
+        return None
+
+
+def test_create_event_nlp_reports_a_failed_insert(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "cal", FailingCalendar())
+    response = app_module.app.test_client().post(
+        "/create_event_nlp", json={"input": "Dentist on Friday at 14:30 for 45 minutes"})
+
+    assert response.status_code == 502
+    assert response.get_json()["status"] == "error"
+
+
+def test_async_create_event_nlp_reports_a_failed_insert(monkeypatch):
+    async_app = importlib.import_module("Essentials.async_app")
+    monkeypatch.setattr(async_app, "cal", FailingCalendar())
+
+    async def post():
+        response = await async_app.app.test_client().post(
+            "/create_event_nlp", json={"input": "Dentist on Friday at 14:30 for 45 minutes"})
+        return response.status_code, await response.get_json()
+
+    status, body = asyncio.run(post())
+    assert status == 502
+    assert body["status"] == "error"
@@ -0,0 +1,51 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+from services.calender_manager import CalendarManager
+
+CALENDAR = "busy-cache-test"
+
+
+def rfc3339(moment):
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def add_event(server, start, hours=1):
+    return server.state.add_event(CALENDAR, {
+        "summary": "Busy",
+        "start": {"dateTime": rfc3339(start)},
+        "end": {"dateTime": rfc3339(start + timedelta(hours=hours))},
+    })["id"]
+
+
+def test_full_sync_skips_old_events_until_a_query_reaches_back(google_server):
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    old_id = add_event(google_server, now - timedelta(days=30))
+    upcoming_id = add_event(google_server, now + timedelta(days=1))
+    cache = CalendarManager().get_busy_cache(CALENDAR)
+
+    busy = cache.get_busy(rfc3339(now), rfc3339(now + timedelta(days=7)))
+    assert len(busy["busy"]) == 1
+    assert set(cache._events) == {upcoming_id}
+
+    busy = cache.get_busy(rfc3339(now - timedelta(days=31)), rfc3339(now + timedelta(days=7)))
+    assert len(busy["busy"]) == 2
+    assert set(cache._events) == {old_id, upcoming_id}
+
+
+def test_concurrent_first_requests_share_one_cache():
+    manager = CalendarManager()
+    barrier = threading.Barrier(8)
+    caches = []
+
+    def first_request():
+        barrier.wait()
+        caches.append(manager.get_busy_cache(CALENDAR))
+
+    threads = [threading.Thread(target=first_request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(cache) for cache in caches}) == 1
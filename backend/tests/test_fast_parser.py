@@ -0,0 +1,33 @@
+from datetime import datetime
+
+import pytest
+import pytz
+
+from services.fast_parser import FAST_PATH_MIN_CONFIDENCE, parse_event_text
+
+# Wednesday 2025-09-03, 9:00 AM in the parser's default time zone.
+NOW = pytz.timezone('America/Chicago').localize(datetime(2025, 9, 3, 9, 0))
+
+
+@pytest.mark.parametrize("text, summary, start", [
+    ("Dentist on Friday at 14:30 for 45 minutes", "Dentist", "2025-09-05T14:30:00-05:00"),
+    ("Gym tomorrow 7-8am", "Gym", "2025-09-04T07:00:00-05:00"),
+    ("Work out on Tuesday: 7:30 AM - 8:30 AM (1 hour)", "Work out", "2025-09-09T07:30:00-05:00"),
+])
+def test_structured_inputs_take_the_fast_path(text, summary, start):
+    event, confidence = parse_event_text(text, now=NOW)
+    assert confidence >= FAST_PATH_MIN_CONFIDENCE
+    assert event["summary"] == summary
+    assert event["start"]["dateTime"] == start
+
+
+@pytest.mark.parametrize("text", [
+    "Meeting at 3pm on Monday the 15th",
+    "Lunch on Friday at noon in March",
+    "Review at 10am on Monday the 3rd of next month",
+    "Watch movie tomorrow at 8 pm and then sleep at 11pm",
+    "Gym tomorrow at 6pm then dinner at 8pm",
+])
+def test_leftover_date_parts_fall_back_to_gemini(text):
+    _, confidence = parse_event_text(text, now=NOW)
+    assert confidence < FAST_PATH_MIN_CONFIDENCE
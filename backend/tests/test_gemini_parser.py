@@ -0,0 +1,85 @@
+import asyncio
+import threading
+from datetime import datetime
+
+import pytest
+
+from fakes.gemini import FakeGeminiError, FakeGenerativeModel
+from services.gemini_parser import GeminiParser, RECURRING_EVENT_WEEKS
+
+BUSY = {"busy": [{"start": "2025-09-02T13:00:00Z", "end": "2025-09-02T15:00:00Z"}]}
+
+
+def failing_parser():
+    return GeminiParser(model=FakeGenerativeModel(error_rate=1.0, error_status=400))
+
+
+def test_stream_suggest_time_raises_when_gemini_fails():
+    with pytest.raises(FakeGeminiError):
+        list(failing_parser().stream_suggest_time("Find an hour for the gym", BUSY))
+
+
+def test_stream_suggest_time_async_raises_when_gemini_fails():
+    async def consume():
+        return [line async for line in failing_parser().stream_suggest_time_async("Find an hour for the gym", BUSY)]
+
+    with pytest.raises(FakeGeminiError):
+        asyncio.run(consume())
+
+
+def test_stream_suggest_time_yields_lines():
+    lines = list(GeminiParser(model=FakeGenerativeModel()).stream_suggest_time("Find an hour for the gym", BUSY))
+    assert lines
+
+
+class ThreadRecordingCache:
+    """In-memory stand-in for ResponseCache that notes which thread every call ran on."""
+
+    def __init__(self):
+        self.values = {}
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.get_ident())
+        return self.values.get(key)
+
+    def set(self, key, value):
+        self.threads.append(threading.get_ident())
+        self.values[key] = value
+
+
+def test_async_paths_keep_cache_io_off_the_event_loop():
+    parser = GeminiParser(model=FakeGenerativeModel())
+    parser.cache = ThreadRecordingCache()
+
+    async def run():
+        loop_thread = threading.get_ident()
+        first = await parser.suggest_time_async("Find an hour for the gym", BUSY)
+        second = await parser.suggest_time_async("Find an hour for the gym", BUSY)
+        streamed = [line async for line in parser.stream_suggest_time_async("Find two hours to read", BUSY)]
+        return loop_thread, first, second, streamed
+
+    loop_thread, first, second, streamed = asyncio.run(run())
+    assert first == second and streamed
+    assert len(parser.cache.values) == 2
+    assert parser.cache.threads and loop_thread not in parser.cache.threads
+
+
+def rrule_until(event):
+    rule = event["recurrence"][0]
+    assert rule.startswith("RRULE:FREQ=WEEKLY;BYDAY=")
+    until = dict(part.split("=") for part in rule[len("RRULE:"):].split(";"))["UNTIL"]
+    return datetime.strptime(until + "+0000", "%Y%m%dT%H%M%SZ%z")
+
+
+@pytest.mark.parametrize("parse", [
+    lambda parser, line: parser.parse_event_details_1(line)[0],
+    lambda parser, line: parser.parse_recurring_event_line(line),
+])
+def test_weekly_events_end_after_their_first_occurrence(parse):
+    event = parse(GeminiParser(model=FakeGenerativeModel()), "Gym Every Monday: 6:00 PM - 7:00 PM (1 hour)")
+
+    start = datetime.fromisoformat(event["start"]["dateTime"])
+    until = rrule_until(event)
+    assert until > start
+    assert (until - start).days == RECURRING_EVENT_WEEKS * 7 - 1
@@ -0,0 +1,44 @@
+import gc
+import threading
+
+from services.google_services import GoogleServicePool
+
+
+def calendar_of_new_thread(pool, keep_running=None):
+    clients = []
+    ready = threading.Event()
+
+    def run():
+        clients.append(pool.calendar())
+        ready.set()
+        if keep_running is not None:
+            keep_running.wait()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    if keep_running is None:
+        thread.join()
+        del thread
+        gc.collect()
+    ready.wait()
+    return clients[0]
+
+
+def test_a_new_request_thread_takes_over_the_clients_of_an_ended_one(google_server, tmp_path):
+    pool = GoogleServicePool(token_path=str(tmp_path / "token.json"), api_root=google_server.url)
+
+    first = calendar_of_new_thread(pool)
+    second = calendar_of_new_thread(pool)
+
+    assert second is first
+
+
+def test_live_threads_never_share_a_client(google_server, tmp_path):
+    pool = GoogleServicePool(token_path=str(tmp_path / "token.json"), api_root=google_server.url)
+    release = threading.Event()
+
+    first = calendar_of_new_thread(pool, keep_running=release)
+    second = calendar_of_new_thread(pool, keep_running=release)
+    release.set()
+
+    assert second is not first
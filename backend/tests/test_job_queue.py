@@ -0,0 +1,50 @@
+import time
+
+from services.job_queue import JobQueue, RUNNING, SUCCEEDED
+
+
+def wait_for(queue, job_id, status, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] == status:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} is {queue.get(job_id)['status']}, expected {status}")
+
+
+def test_second_process_does_not_take_over_a_running_job(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    runs = []
+    first = JobQueue(path, workers=1, lease_seconds=0.3)
+    first.register("slow", lambda payload: runs.append("A") or time.sleep(1.0))
+    second = JobQueue(path, workers=1, lease_seconds=0.3)
+    second.register("slow", lambda payload: runs.append("B"))
+
+    first.start()
+    job_id = first.enqueue("slow", {})
+    wait_for(first, job_id, RUNNING)
+    second.start()  # a restart of another process sharing the file, while the job runs
+    job = wait_for(first, job_id, SUCCEEDED)
+    first.stop(2)
+    second.stop(2)
+
+    assert runs == ["A"]
+    assert job["attempts"] == 1
+
+
+def test_job_of_a_dead_process_is_picked_up_after_its_lease_expires(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    dead = JobQueue(path, workers=0, lease_seconds=0.2)
+    dead.register("double", lambda payload: payload["n"] * 2)
+    job_id = dead.enqueue("double", {"n": 21})
+    assert dead._claim()[0] == job_id  # claimed, then the process "dies" without heartbeats
+
+    survivor = JobQueue(path, workers=1, lease_seconds=0.2)
+    survivor.register("double", lambda payload: payload["n"] * 2)
+    survivor.start()
+    job = wait_for(survivor, job_id, SUCCEEDED)
+    survivor.stop(2)
+
+    assert job["result"] == 42
+    assert job["attempts"] == 2
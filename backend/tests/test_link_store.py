@@ -0,0 +1,54 @@
+import json
+
+from services.link_store import LinkStore
+
+LINK = {'event_id': 'event-1', 'calendar_id': 'primary', 'task_list_id': '@me'}
+
+
+def test_legacy_json_is_imported_once(tmp_path):
+    legacy = tmp_path / "linked_tasks.json"
+    legacy.write_text(json.dumps({"task-1": LINK, "task-2": dict(LINK, event_id="event-2")}))
+    db_path = str(tmp_path / "links.sqlite3")
+
+    store = LinkStore(db_path, legacy_json_path=str(legacy))
+    assert store.load_all() == {"task-1": LINK, "task-2": dict(LINK, event_id="event-2")}
+    store.remove_many(["task-2"])
+    store.close()
+
+    # Reopening must not bring back links removed since the import.
+    reopened = LinkStore(db_path, legacy_json_path=str(legacy))
+    assert reopened.load_all() == {"task-1": LINK}
+
+
+def test_unreadable_legacy_json_is_skipped(tmp_path):
+    legacy = tmp_path / "linked_tasks.json"
+    legacy.write_text("{not json")
+    assert LinkStore(str(tmp_path / "links.sqlite3"), legacy_json_path=str(legacy)).count() == 0
+
+
+def test_links_round_trip_and_lookups(tmp_path):
+    db_path = str(tmp_path / "links.sqlite3")
+    store = LinkStore(db_path)
+    store.put_many({"task-1": LINK, "task-2": dict(LINK, event_id="event-2", calendar_id="work")})
+    store.put_many({"task-1": dict(LINK, event_id="event-3")})  # replaces, does not duplicate
+    store.remove_many(["task-2", "unknown"])
+    store.close()
+
+    store = LinkStore(db_path)
+    assert store.count() == 1
+    assert store.get("task-1") == dict(LINK, event_id="event-3")
+    assert store.get("task-2") is None
+    assert store.find_task_by_event("event-3") == "task-1"
+    assert store.find_task_by_event("event-1") is None
+
+
+def test_sync_state_round_trip(tmp_path):
+    db_path = str(tmp_path / "links.sqlite3")
+    store = LinkStore(db_path)
+    assert store.load_sync_state() == {}
+    store.save_sync_state({"@me": "2026-10-18T10:00:00.000Z", "list-2": "2026-10-17T08:00:00.000Z"})
+    store.save_sync_state({"@me": "2026-10-18T11:00:00.000Z"})
+    store.close()
+
+    assert LinkStore(db_path).load_sync_state() == {"@me": "2026-10-18T11:00:00.000Z",
+                                                    "list-2": "2026-10-17T08:00:00.000Z"}
@@ -0,0 +1,75 @@
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from services import rate_limiter
+from services.google_services import GoogleServicePool
+from services.rate_limiter import call_with_retry, is_idempotent_request
+
+
+def http_error(status, reason=""):
+    return HttpError(httplib2.Response({"status": status}), reason.encode())
+
+
+def failing_call(error, calls):
+    def call():
+        calls.append(1)
+        raise error
+    return call
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "BACKOFF_BASE", 0.0)
+
+
+def test_inserts_are_not_retried_after_a_server_error():
+    calls = []
+    with pytest.raises(HttpError):
+        call_with_retry(failing_call(http_error(503), calls), "calendar", max_retries=2, idempotent=False)
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("error", [http_error(429), http_error(403, '{"reason": "rateLimitExceeded"}')])
+def test_inserts_are_retried_after_a_rate_limit(error):
+    calls = []
+    with pytest.raises(HttpError):
+        call_with_retry(failing_call(error, calls), "calendar", max_retries=2, idempotent=False)
+    assert len(calls) == 3
+
+
+def test_idempotent_calls_are_retried_after_a_server_error():
+    calls = []
+    with pytest.raises(HttpError):
+        call_with_retry(failing_call(http_error(503), calls), "calendar", max_retries=2)
+    assert len(calls) == 3
+
+
+def test_only_inserts_without_a_client_id_count_as_non_idempotent(google_server, tmp_path):
+    pool = GoogleServicePool(token_path=str(tmp_path / "token.json"), api_root=google_server.url)
+    events, tasks = pool.calendar().events(), pool.tasks().tasks()
+
+    assert not is_idempotent_request(events.insert(calendarId="primary", body={"summary": "New"}))
+    assert not is_idempotent_request(tasks.insert(tasklist="@default", body={"title": "New"}))
+    assert is_idempotent_request(events.insert(calendarId="primary", body={"id": "abc123def", "summary": "New"}))
+    assert is_idempotent_request(events.delete(calendarId="primary", eventId="abc123def"))
+    assert is_idempotent_request(pool.calendar().freebusy().query(body={"items": [{"id": "primary"}]}))
+
+
+def test_batched_inserts_are_not_resent_after_a_server_error(tmp_path):
+    from fakes.google_server import FakeGoogleServer
+    from services.batching import BatchExecutor
+
+    with FakeGoogleServer(error_rate=1.0, error_status=503) as server:
+        pool = GoogleServicePool(token_path=str(tmp_path / "token.json"), api_root=server.url)
+        service = pool.calendar()
+        batch = BatchExecutor(service)
+        for number in range(3):
+            batch.add(service.events().insert(calendarId="primary", body={"summary": f"Event {number}"}))
+        batch.add(service.events().delete(calendarId="primary", eventId="abc123def"), request_id="delete")
+
+        results = batch.execute()
+
+    assert all(error is not None and error.status == 503 for _, error in results.values())
+    assert server.state.calls["events.insert"] == 3
+    assert server.state.calls["events.delete"] == 1 + rate_limiter.MAX_RETRIES
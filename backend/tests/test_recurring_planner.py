@@ -0,0 +1,37 @@
+from services.recurring_planner import plan_recurring_schedule, weekly_free_pattern
+
+# Tuesday 2025-09-02 10:00 AM to Tuesday 2025-09-09 10:00 AM in America/Chicago (CDT, UTC-5),
+# the shape of the default "now -> now + 7 days" range.
+RANGE_START = '2025-09-02T15:00:00Z'
+RANGE_END = '2025-09-09T15:00:00Z'
+TUESDAY = 1
+
+
+def test_range_starting_mid_day_keeps_busy_time_of_partial_days():
+    # Busy 8:00 AM - 10:00 PM on both Tuesdays; the range only covers part of each.
+    busy = [{'start': '2025-09-02T13:00:00Z', 'end': '2025-09-03T03:00:00Z'},
+            {'start': '2025-09-09T13:00:00Z', 'end': '2025-09-10T03:00:00Z'}]
+
+    assert weekly_free_pattern(RANGE_START, RANGE_END, busy)[TUESDAY] == []
+    lines = plan_recurring_schedule('Lemonade', 4, RANGE_START, RANGE_END, busy, preferred_days=['Tuesday'])
+    assert lines
+    assert 'Tuesday' not in lines
+
+
+def test_partial_days_combine_into_the_whole_weekday():
+    # The first Tuesday is seen from 10:00 AM, the second one until 10:00 AM: together a whole day.
+    pattern = weekly_free_pattern(RANGE_START, RANGE_END, [])
+    assert pattern[TUESDAY] == [(8 * 60, 22 * 60)]
+
+    # Busy 2:00 - 3:00 PM on the first Tuesday only.
+    busy = [{'start': '2025-09-02T19:00:00Z', 'end': '2025-09-02T20:00:00Z'}]
+    pattern = weekly_free_pattern(RANGE_START, RANGE_END, busy)
+    assert pattern[TUESDAY] == [(8 * 60, 14 * 60), (15 * 60, 22 * 60)]
+
+
+def test_weekdays_outside_the_range_are_not_assumed_free():
+    # Tuesday 10:00 AM to Thursday 10:00 AM: Friday to Monday never occur.
+    pattern = weekly_free_pattern(RANGE_START, '2025-09-04T15:00:00Z', [])
+    assert pattern[2] == [(8 * 60, 22 * 60)]
+    assert pattern[3] == [(8 * 60, 10 * 60)]
+    assert all(pattern[weekday] == [] for weekday in (4, 5, 6, 0))
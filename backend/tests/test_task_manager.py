@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import pytest
+
+from services.task_manager import TaskManager
+
+
+@pytest.fixture
+def manager(google_server, tmp_path):
+    token_path = tmp_path / "token.json"
+    token_path.write_text("{}")  # only has to exist; the fake server needs no credentials
+    return TaskManager(token_path=str(token_path), link_db_path=str(tmp_path / "links.sqlite3"),
+                       legacy_links_path=str(tmp_path / "linked_tasks.json"))
+
+
+def spy_on_listings(manager, monkeypatch):
+    """Records (updatedMin, number of tasks returned) for every task list listing."""
+    listings = []
+    list_changed_tasks = manager._list_changed_tasks
+
+    def spy(task_list_id, updated_min=None):
+        tasks, mark = list_changed_tasks(task_list_id, updated_min)
+        listings.append((updated_min, len(tasks)))
+        return tasks, mark
+
+    monkeypatch.setattr(manager, "_list_changed_tasks", spy)
+    return listings
+
+
+def test_second_sync_only_fetches_changed_tasks(manager, google_server, monkeypatch):
+    created = [manager.create_linked_task_and_event(f"Task {i}", datetime(2026, 11, 2, 9 + i), 1)
+               for i in range(5)]
+    listings = spy_on_listings(manager, monkeypatch)
+
+    manager.synchronize_tasks_and_events()
+    assert listings[-1][0] is None  # no checkpoint yet: one full listing
+    assert listings[-1][1] >= 5
+    assert len(manager.linked_tasks) == 5
+
+    done_task, done_event = created[0]
+    deleted_task, _ = created[1]
+    manager.tasks_service.tasks().patch(tasklist='@me', task=done_task, body={'status': 'completed'}).execute()
+    manager.tasks_service.tasks().delete(tasklist='@me', task=deleted_task).execute()
+
+    manager.synchronize_tasks_and_events()
+    updated_min, fetched = listings[-1]
+    assert updated_min is not None
+    # The two changed tasks, plus at most the task sitting on the (inclusive) high-water mark.
+    assert 2 <= fetched <= 3
+    assert set(manager.linked_tasks) == {task_id for task_id, _ in created[2:]}
+    assert manager.link_store.load_all() == manager.linked_tasks
+    assert google_server.state.get_event("primary", done_event)["status"] == "cancelled"
+
+
+def test_checkpoint_survives_a_restart(manager, google_server, monkeypatch, tmp_path):
+    manager.create_linked_task_and_event("Checkpointed", datetime(2026, 11, 3, 9), 1)
+    manager.synchronize_tasks_and_events()
+
+    restarted = TaskManager(token_path=str(tmp_path / "token.json"), link_db_path=str(tmp_path / "links.sqlite3"),
+                            legacy_links_path=str(tmp_path / "linked_tasks.json"))
+    listings = spy_on_listings(restarted, monkeypatch)
+    restarted.synchronize_tasks_and_events()
+    assert listings[0][0] == manager.link_store.load_sync_state()['@me']
+    assert listings[0][1] <= 1
+
+
+def test_delete_task_removes_task_event_and_link(manager, google_server):
+    task_id, event_id = manager.create_linked_task_and_event("Delete me", datetime(2026, 11, 4, 9), 1)
+
+    manager.delete_task(task_id, '@me')
+
+    assert google_server.state.tasks[google_server.state._tasklist('@me')][task_id]["deleted"]
+    assert google_server.state.get_event("primary", event_id)["status"] == "cancelled"
+    assert task_id not in manager.linked_tasks
+    assert manager.link_store.get(task_id) is None
+
+
+def test_batched_event_deletes_span_several_batches(manager, google_server):
+    # More events than one batch request may carry (50), plus one already gone.
+    event_ids = [google_server.state.add_event("primary", {
+        "summary": f"Event {i}",
+        "start": {"dateTime": "2026-11-05T09:00:00Z"}, "end": {"dateTime": "2026-11-05T10:00:00Z"},
+    })["id"] for i in range(120)]
+    google_server.state.delete_event("primary", event_ids[0])
+
+    deleted = manager.calendar_manager.delete_events_batch([[event_id, "primary"] for event_id in event_ids])
+
+    assert deleted == {event_id: True for event_id in event_ids}
+    assert all(google_server.state.get_event("primary", event_id)["status"] == "cancelled"
+               for event_id in event_ids)